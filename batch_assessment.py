@@ -0,0 +1,287 @@
+"""Batch assessment for many customer profiles
+Reads entity mappings from a CSV or JSONL file and, for every profile, runs
+retrieval, the cost engine, cluster sizing and sectioned report generation,
+writing one markdown report per profile. Profiles are spread over a process
+pool and LLM requests from all processes share one concurrency bound.
+
+Input:
+    JSONL - one mapping per line in the prompt's schema (nested or with
+            dotted keys), plus an optional "profile_id"
+    CSV   - one profile per row, columns named by dotted schema path
+            (data_volume.warehouse_size_tb, ...); list fields separated by
+            ";" - print the header with --csv-template
+
+Usage:
+    python batch_assessment.py prospects.csv --output reports/
+    python batch_assessment.py prospects.jsonl --workers 4 --llm-concurrency 8 --no-kb
+    python batch_assessment.py --csv-template > prospects.csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from cluster_sizing import size_clusters
+from context_packer import ContextPacker
+from cost_engine import estimate_costs
+from entity_state import ENTITY_SCHEMA, EntityState
+from llm_backends import LLM_BACKEND, BACKEND_GROQ, ConcurrencyLimitedBackend, create_backend
+from llm_client import LLMClient
+from model_routing import ModelRouter, model_rate_limits, prompt_token_budget
+from report_generator import ReportGenerator
+from tco_projection import project_from_mapping
+from warehouse_simulator import simulate_for_estimate, with_simulated_warehouse
+from telemetry import chunk_usage
+
+logger = logging.getLogger("batch_assessment")
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PROMPT_TOKEN_BUDGET = 8000
+CONTEXT_TOKEN_BUDGET = 1500
+
+DEFAULT_WORKERS = 4
+DEFAULT_LLM_CONCURRENCY = 8
+
+# Unattended runs wait out the client rate limiter instead of failing the profile
+RATE_LIMIT_WAIT_S = 900.0
+
+PROFILE_ID_FIELD = "profile_id"
+
+REPORT_TEMPLATE = """# Databricks Migration Assessment: {profile_id}
+
+## Entity Mapping
+
+```json
+{mapping}
+```
+
+{report}
+"""
+
+# ============================================================================
+# INPUT
+# ============================================================================
+
+def csv_template() -> str:
+    """CSV header for batch input: profile id plus every schema field"""
+    return ",".join([PROFILE_ID_FIELD] + [
+        name for name, spec in ENTITY_SCHEMA.fields.items() if spec.default is None
+    ])
+
+
+def _read_rows(path: str) -> List[Dict]:
+    if path.lower().endswith(".csv"):
+        with open(path, newline="") as f:
+            return [
+                {key: value for key, value in row.items() if key and value not in (None, "")}
+                for row in csv.DictReader(f)
+            ]
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_profiles(path: str) -> List[Tuple[str, Dict]]:
+    """
+    (profile id, validated mapping) per input row
+
+    Rows go through EntityState, so values are coerced and checked against
+    the prompt's schemas exactly like facts extracted in the chat; missing
+    mandatory fields become assumptions in the mapping
+    """
+    profiles = []
+    for index, row in enumerate(_read_rows(path), start=1):
+        profile_id = str(row.pop(PROFILE_ID_FIELD, "") or f"profile-{index:04d}")
+        extra_assumptions = row.pop("assumptions", None) or []
+        if isinstance(extra_assumptions, str):
+            extra_assumptions = [a.strip() for a in extra_assumptions.split(";") if a.strip()]
+
+        state = EntityState()
+        state.apply(row)
+        if not state.values:
+            logger.warning("Skipping %s: no schema fields found", profile_id)
+            continue
+        missing = state.missing()
+        if missing:
+            logger.info("%s: %d mandatory fields missing, assumed", profile_id, len(missing))
+
+        mapping = state.to_mapping()
+        mapping["assumptions"] = mapping["assumptions"] + list(extra_assumptions)
+        profiles.append((profile_id, mapping))
+    return profiles
+
+# ============================================================================
+# WORKER (one per process)
+# ============================================================================
+
+class AssessmentWorker:
+    """Knowledge base, LLM client and report route of one worker process"""
+
+    def __init__(self, llm_semaphore, workers: int, use_kb: bool, backend: str):
+        api_key = os.getenv("GROQ_API_KEY") if backend == BACKEND_GROQ else None
+        # Each process gets an equal share of the per-model rate limits
+        rate_limits = {
+            model: (max(1, rpm // workers), max(1, tpm // workers))
+            for model, (rpm, tpm) in model_rate_limits().items()
+        }
+        self.client = LLMClient(
+            ConcurrencyLimitedBackend(create_backend(backend, api_key), llm_semaphore),
+            rate_limits=rate_limits,
+            max_rate_limit_wait_s=RATE_LIMIT_WAIT_S
+        )
+        self.route = ModelRouter().get("report")
+        # Prompt plus completion must fit this process's share of the model's tokens per minute
+        budget = prompt_token_budget(self.route, PROMPT_TOKEN_BUDGET, tokens_per_minute=rate_limits[self.route.model][1])
+        self.packer = ContextPacker(self.route.model, budget_tokens=budget, context_tokens=CONTEXT_TOKEN_BUDGET)
+        self.kb = self._load_kb() if use_kb else None
+
+    @staticmethod
+    def _load_kb():
+        from knowledge_base import DatabricksKnowledgeBase
+
+        kb = DatabricksKnowledgeBase()
+        if not kb.initialize():
+            logger.warning("Knowledge bases not built; reports are generated without documentation")
+            return None
+        return kb
+
+    def run(self, profile_id: str, mapping: Dict, output_dir: str) -> Dict:
+        """Generate and write one profile's report"""
+        start = time.perf_counter()
+        mapping_json = json.dumps(mapping, indent=2)
+        prompt_tokens = completion_tokens = 0
+        try:
+            estimate = estimate_costs(mapping, simulate=True)
+            warehouse = simulate_for_estimate(estimate)
+            if warehouse is not None:
+                estimate = with_simulated_warehouse(estimate, warehouse)
+            estimate.projection = project_from_mapping(estimate, mapping)
+            sizing = size_clusters(mapping)
+            parts = []
+            generator = ReportGenerator(self.client, self.packer, self.route, self.kb)
+            for chunk in generator.stream(mapping_json, estimate, sizing):
+                usage = chunk_usage(chunk)
+                if usage is not None:
+                    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+                    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+
+            path = os.path.join(output_dir, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', profile_id)}.md")
+            with open(path, "w") as f:
+                f.write(REPORT_TEMPLATE.format(profile_id=profile_id, mapping=mapping_json, report="".join(parts)))
+            error = None
+        except Exception as e:
+            path, error = None, str(e)
+
+        return {
+            "profile_id": profile_id,
+            "path": path,
+            "error": error,
+            "seconds": round(time.perf_counter() - start, 2),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        }
+
+
+_worker: Optional[AssessmentWorker] = None
+
+
+def _init_worker(llm_semaphore, workers: int, use_kb: bool, backend: str):
+    global _worker
+    logging.basicConfig(level=logging.WARNING)
+    _worker = AssessmentWorker(llm_semaphore, workers, use_kb, backend)
+
+
+def _run_profile(profile_id: str, mapping: Dict, output_dir: str) -> Dict:
+    return _worker.run(profile_id, mapping, output_dir)
+
+# ============================================================================
+# BATCH
+# ============================================================================
+
+def run_batch(profiles: List[Tuple[str, Dict]], output_dir: str, workers: int = DEFAULT_WORKERS,
+              llm_concurrency: int = DEFAULT_LLM_CONCURRENCY, use_kb: bool = True,
+              backend: str = LLM_BACKEND) -> Dict:
+    """Assess every profile across a process pool; returns the run summary"""
+    os.makedirs(output_dir, exist_ok=True)
+    # Spawned workers: no forked copies of threads, HTTP pools or vector store handles
+    context = multiprocessing.get_context("spawn")
+    llm_semaphore = context.BoundedSemaphore(llm_concurrency)
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context,
+        initializer=_init_worker, initargs=(llm_semaphore, workers, use_kb, backend)
+    ) as pool:
+        futures = [pool.submit(_run_profile, profile_id, mapping, output_dir) for profile_id, mapping in profiles]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            elapsed_min = (time.perf_counter() - start) / 60
+            logger.info(
+                "[%d/%d] %s %s in %.1fs - %.1f profiles/min",
+                len(results), len(profiles), result["profile_id"],
+                "failed" if result["error"] else "done", result["seconds"], len(results) / elapsed_min
+            )
+
+    wall_s = time.perf_counter() - start
+    failed = [r for r in results if r["error"]]
+    summary = {
+        "profiles": len(results),
+        "failed": len(failed),
+        "wall_s": round(wall_s, 2),
+        "profiles_per_minute": round(len(results) / (wall_s / 60), 2) if wall_s else None,
+        "workers": workers,
+        "llm_concurrency": llm_concurrency,
+        "completion_tokens": sum(r["completion_tokens"] for r in results),
+        "results": sorted(results, key=lambda r: r["profile_id"]),
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch migration assessments from CSV/JSONL entity mappings")
+    parser.add_argument("input", nargs="?", help="CSV or JSONL file of entity mappings")
+    parser.add_argument("--output", default="reports", help="Directory for the reports and summary.json")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker processes")
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY,
+                        help="LLM requests in flight across all workers")
+    parser.add_argument("--backend", default=LLM_BACKEND, help="LLM backend (groq or openai)")
+    parser.add_argument("--no-kb", action="store_true", help="Generate reports without retrieval")
+    parser.add_argument("--csv-template", action="store_true", help="Print the CSV header and exit")
+    args = parser.parse_args()
+
+    if args.csv_template:
+        print(csv_template())
+        return
+    if not args.input:
+        parser.error("an input file is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    profiles = load_profiles(args.input)
+    logger.info("Assessing %d profiles with %d workers", len(profiles), args.workers)
+
+    summary = run_batch(profiles, args.output, args.workers, args.llm_concurrency, not args.no_kb, args.backend)
+    logger.info(
+        "%d profiles (%d failed) in %.1fs - %.2f profiles/min",
+        summary["profiles"], summary["failed"], summary["wall_s"], summary["profiles_per_minute"] or 0
+    )
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""HNSW parameter sweep for the FinOps Advisor knowledge bases
+
+Rebuilds a persisted domain collection under a grid of HNSW settings and
+reports recall@k against exact search, p50/p99 query latency and index size.
+Queries are sampled from the stored chunk embeddings, so no embedding model
+or network access is needed.
+
+Usage:
+    python benchmarks/hnsw_sweep.py --domain migration
+    python benchmarks/hnsw_sweep.py --domain costing --M 8 16 32 --search-ef 10 50 100 --json sweep.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import chromadb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_base import hnsw_metadata  # noqa: E402
+
+ADD_BATCH_SIZE = 1000
+
+
+def load_collection(kb_dir: str, domain: str) -> Dict:
+    """Load embeddings of a persisted domain collection"""
+    client = chromadb.PersistentClient(path=os.path.join(kb_dir, domain))
+    collection = client.get_collection(domain)
+    data = collection.get(include=["embeddings"])
+    return {"ids": data["ids"], "embeddings": np.asarray(data["embeddings"], dtype=np.float32)}
+
+
+def exact_neighbours(embeddings: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Brute-force top-k neighbour indices for every query"""
+    if space == "cosine":
+        norm_e = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norm_q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        distances = -norm_q @ norm_e.T
+    elif space == "ip":
+        distances = -queries @ embeddings.T
+    else:
+        distances = (
+            (queries ** 2).sum(axis=1, keepdims=True)
+            - 2 * queries @ embeddings.T
+            + (embeddings ** 2).sum(axis=1)
+        )
+    top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    return top
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run_config(ids: List[str], embeddings: np.ndarray, queries: np.ndarray,
+               exact: np.ndarray, params: Dict, k: int) -> Dict:
+    """Build one index with the given parameters and measure it"""
+    work_dir = tempfile.mkdtemp(prefix="hnsw_sweep_")
+    try:
+        client = chromadb.PersistentClient(path=work_dir)
+        collection = client.create_collection("sweep", metadata=hnsw_metadata(params))
+
+        build_start = time.perf_counter()
+        for start in range(0, len(ids), ADD_BATCH_SIZE):
+            collection.add(
+                ids=ids[start:start + ADD_BATCH_SIZE],
+                embeddings=embeddings[start:start + ADD_BATCH_SIZE].tolist()
+            )
+        build_seconds = time.perf_counter() - build_start
+
+        id_to_index = {doc_id: i for i, doc_id in enumerate(ids)}
+        latencies = []
+        hits = 0
+        for query, truth in zip(queries, exact):
+            query_start = time.perf_counter()
+            result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+            latencies.append(time.perf_counter() - query_start)
+
+            found = {id_to_index[doc_id] for doc_id in result["ids"][0]}
+            hits += len(found & set(truth.tolist()))
+
+        latencies_ms = np.array(latencies) * 1000
+        return {
+            **params,
+            f"recall@{k}": round(hits / (len(queries) * k), 4),
+            "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+            "build_s": round(build_seconds, 2),
+            "index_mb": round(directory_size(work_dir) / 1e6, 2),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters for a knowledge base domain")
+    parser.add_argument("--kb-dir", default="./knowledge_bases")
+    parser.add_argument("--domain", default="migration", choices=["migration", "architecture", "costing"])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled query vectors")
+    parser.add_argument("--space", nargs="+", default=["cosine"])
+    parser.add_argument("--M", nargs="+", type=int, default=[8, 16, 32])
+    parser.add_argument("--construction-ef", nargs="+", type=int, default=[100, 200])
+    parser.add_argument("--search-ef", nargs="+", type=int, default=[10, 50, 100])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    data = load_collection(args.kb_dir, args.domain)
+    ids, embeddings = data["ids"], data["embeddings"]
+    if len(ids) <= args.k:
+        sys.exit(f"Collection {args.domain} has only {len(ids)} vectors")
+
+    # Sample stored vectors as queries, slightly perturbed so they are not exact hits
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = embeddings[sample] + rng.normal(0, 0.01, size=(len(sample), embeddings.shape[1])).astype(np.float32)
+
+    results = []
+    for space in args.space:
+        exact = exact_neighbours(embeddings, queries, args.k, space)
+        for m, construction_ef, search_ef in itertools.product(args.M, args.construction_ef, args.search_ef):
+            params = {"space": space, "M": m, "construction_ef": construction_ef, "search_ef": search_ef}
+            result = run_config(ids, embeddings, queries, exact, params, args.k)
+            results.append(result)
+            print(
+                f"{space:6} M={m:<3} cef={construction_ef:<4} sef={search_ef:<4} "
+                f"recall@{args.k}={result[f'recall@{args.k}']:.3f} "
+                f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+                f"size={result['index_mb']:.1f}MB"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "domain": args.domain,
+                "vectors": len(ids),
+                "queries": len(queries),
+                "results": results
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Offline load test of the RAG chat path
+
+Runs concurrent scripted sessions through chat_turn.ChatPipeline, the turn
+chatbot_with_rag.py renders (entity extraction, model routing, cost engine
+and sizing, report mode, retrieval gating and prefetch over the fixture
+knowledge base, history compaction, context packing and streaming through
+LLMClient), against an OpenAI-compatible endpoint. Without --base-url a local mock server is started in-process,
+so the test needs no network access or API key.
+
+Reports throughput, TTFT and end-to-end latency percentiles and the
+per-route summary as JSON. Turn records are also written to
+metrics/loadtest_turns.jsonl (see `python telemetry.py <file>`).
+
+Usage:
+    python benchmarks/load_test.py --sessions 16 --turns 6
+    python benchmarks/load_test.py --ttft-ms 800 --tokens-per-s 60 --output load.json
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8000/v1 --model my-model
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FINOPS_METRICS_FILE", os.path.join("metrics", "loadtest_turns.jsonl"))
+
+from chat_turn import ChatPipeline, ChatSession  # noqa: E402
+from llm_backends import OpenAICompatibleBackend  # noqa: E402
+from llm_client import LLMClient, LLMError  # noqa: E402
+from model_routing import load_model_config  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from retrieval_prefetch import RetrievalPrefetcher  # noqa: E402
+from telemetry import summarize_by_route  # noqa: E402
+
+from mock_llm_server import MockConfig, start_server  # noqa: E402
+from retrieval_bench import HashingEmbeddings, build_fixture_kb, git_commit  # noqa: E402
+
+# Scripted user turns; sessions cycle through them
+SCRIPT = [
+    "Hi, we want to migrate our data platform to Databricks",
+    "We are on AWS today running Hadoop with Hive and about 200 Spark batch jobs",
+    "Around 50 TB of data, growing 2 TB per month",
+    "What is Unity Catalog and do we need it?",
+    "We also have Tableau dashboards used by 80 analysts",
+    "That is all, please give me your recommendations",
+    "How much will the SQL warehouse cost per month?",
+]
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+def run_session(pipeline: ChatPipeline, kb, session: int, turns: int):
+    """Run the scripted turns of one session; returns their TurnMetrics"""
+    chat = ChatSession(RetrievalPrefetcher(kb) if kb is not None else None, session_id=f"load-{session:04d}")
+    metrics = []
+    for i in range(turns):
+        turn = pipeline.start(chat, SCRIPT[i % len(SCRIPT)])
+        try:
+            turn.answer = "".join(pipeline.stream(chat, turn))
+        except LLMError as e:
+            turn.error = str(e)
+        metrics.append(pipeline.finish(chat, turn))
+    return metrics
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def percentiles_ms(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    array = np.array(values) * 1000
+    return {f"p{q}": round(float(np.percentile(array, q)), 1) for q in (50, 95, 99)}
+
+
+def summarize(results, wall_s: float) -> Dict:
+    ok = [m for m in results if not m.error]
+    completion_tokens = sum(m.completion_tokens or 0 for m in ok)
+    return {
+        "turns": len(results),
+        "errors": len(results) - len(ok),
+        "wall_s": round(wall_s, 2),
+        "turns_per_s": round(len(ok) / wall_s, 2),
+        "completion_tokens_per_s": round(completion_tokens / wall_s, 1),
+        "ttft_ms": percentiles_ms([m.ttft_s for m in ok if m.ttft_s is not None]),
+        "total_ms": percentiles_ms([m.total_s for m in ok]),
+        "retrieval_ms": percentiles_ms([m.retrieval_s for m in ok]),
+        "prompt_build_ms": percentiles_ms([m.prompt_build_s for m in ok]),
+        "routes": summarize_by_route([vars(m) for m in results]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the RAG chat path")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--turns", type=int, default=len(SCRIPT), help="Turns per session")
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint (default: start the local mock server)")
+    parser.add_argument("--model", help="Send every request to this model instead of the routed one")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Mock server time-to-first-token")
+    parser.add_argument("--tokens-per-s", type=float, default=150.0, help="Mock server streaming rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server injected 429/503 rate")
+    parser.add_argument("--no-kb", action="store_true", help="Skip retrieval from the fixture knowledge base")
+    parser.add_argument("--cache", action="store_true", help="Enable the response cache")
+    parser.add_argument("--client-rate-limits", action="store_true", help="Apply the models.json rate limits")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        config = MockConfig(ttft_s=args.ttft_ms / 1000, tokens_per_s=args.tokens_per_s, error_rate=args.error_rate)
+        server, base_url = start_server(config=config)
+
+    rate_limits = None
+    if not args.client_rate_limits:
+        rate_limits = {model: (10 ** 6, 10 ** 9) for model in load_model_config()["models"]}
+
+    client = LLMClient(
+        OpenAICompatibleBackend(base_url=base_url, api_key=os.getenv("FINOPS_LLM_API_KEY"), model=args.model),
+        rate_limits=rate_limits,
+        cache=ResponseCache() if args.cache else None
+    )
+
+    work_dir = tempfile.mkdtemp(prefix="load_test_")
+    try:
+        kb = None if args.no_kb else build_fixture_kb(work_dir, HashingEmbeddings())
+        pipeline = ChatPipeline(client, "loadtest")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            sessions = list(pool.map(lambda s: run_session(pipeline, kb, s, args.turns), range(args.sessions)))
+        wall_s = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        client.backend.close()
+        if server is not None:
+            server.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "sessions": args.sessions, "turns": args.turns, "base_url": base_url if args.base_url else "mock",
+            "ttft_ms": args.ttft_ms, "tokens_per_s": args.tokens_per_s, "error_rate": args.error_rate,
+            "kb": not args.no_kb, "cache": args.cache,
+        },
+        **summarize([m for turns in sessions for m in turns], wall_s),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Local OpenAI-compatible stand-in for the LLM API
+
+Serves POST /v1/chat/completions (and Groq's /openai/v1/chat/completions)
+with canned text, streamed as SSE at a configurable token rate after a
+configurable time-to-first-token, so both apps and the load test run on a
+machine without network access or API keys. A fraction of requests can be
+failed with 429/503 to exercise the client's retries.
+
+Usage:
+    python benchmarks/mock_llm_server.py --port 8765 --ttft-ms 300 --tokens-per-s 150
+    FINOPS_LLM_BACKEND=openai FINOPS_LLM_BASE_URL=http://127.0.0.1:8765/v1 streamlit run chatbot_with_rag.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+DEFAULT_RESPONSE = (
+    "Thanks, that helps. Based on what you have shared so far, the main cost drivers "
+    "will be your nightly batch ETL on job clusters and the interactive SQL workload. "
+    "Moving the batch jobs to Jobs Compute with Photon and autoscaling typically lowers "
+    "DBU consumption, while a serverless SQL Warehouse with auto-stop keeps BI costs "
+    "proportional to usage. Next question: roughly how many concurrent BI users query "
+    "the warehouse at peak, and what is your target refresh window for the dashboards?"
+)
+
+CHAT_PATHS = ("/v1/chat/completions", "/openai/v1/chat/completions")
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+@dataclass
+class MockConfig:
+    ttft_s: float = 0.3
+    tokens_per_s: float = 150.0
+    response: str = DEFAULT_RESPONSE
+    error_rate: float = 0.0
+
+    @property
+    def tokens(self) -> List[str]:
+        return re.findall(r"\S+\s*", self.response)
+
+
+def _estimate_prompt_tokens(messages: List[dict]) -> int:
+    return sum(len(m.get("content") or "") for m in messages) // 4 + 4 * len(messages)
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _chunk(self, completion_id: str, model: str, content: Optional[str], finish_reason=None, usage=None) -> dict:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": content} if content else {}, "finish_reason": finish_reason}],
+        }
+        if usage is not None:
+            chunk["usage"] = usage
+        return chunk
+
+    def do_POST(self):
+        if self.path not in CHAT_PATHS:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        config = self.config
+        if config.error_rate and random.random() < config.error_rate:
+            status = random.choice([429, 503])
+            self._send_json(status, {"error": {"message": "Injected failure"}}, {"retry-after": "0.2"})
+            return
+
+        model = request.get("model", "mock")
+        tokens = config.tokens[:request.get("max_tokens") or None]
+        usage = {
+            "prompt_tokens": _estimate_prompt_tokens(request.get("messages", [])),
+            "completion_tokens": len(tokens),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        time.sleep(config.ttft_s)
+
+        if not request.get("stream"):
+            time.sleep(len(tokens) / config.tokens_per_s if config.tokens_per_s else 0)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        interval = 1.0 / config.tokens_per_s if config.tokens_per_s else 0.0
+        start = time.perf_counter()
+        try:
+            for i, token in enumerate(tokens):
+                # Pace against the start time so the rate does not drift with write overhead
+                delay = start + i * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self._send_event(self._chunk(completion_id, model, token))
+
+            self._send_event(self._chunk(completion_id, model, None, "stop", usage))
+            self._send_event("[DONE]")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, config: Optional[MockConfig] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """Run the mock server in a background thread; returns the server and its /v1 base URL"""
+    handler = type("ConfiguredMockLLMHandler", (MockLLMHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Delay before the first token")
+    parser.add_argument("--tokens-per-s", type=float, default=150.0, help="Streaming rate per request")
+    parser.add_argument("--response-file", help="Text file with the canned response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failed with 429/503")
+    args = parser.parse_args()
+
+    config = MockConfig(ttft_s=args.ttft_ms / 1000, tokens_per_s=args.tokens_per_s, error_rate=args.error_rate)
+    if args.response_file:
+        with open(args.response_file) as f:
+            config.response = f.read()
+
+    server, base_url = start_server(args.host, args.port, config)
+    print(f"Mock LLM server on {base_url} (TTFT {args.ttft_ms:.0f}ms, {args.tokens_per_s:.0f} tokens/s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
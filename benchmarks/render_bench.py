@@ -0,0 +1,135 @@
+"""Streaming render benchmark: per-token markdown updates vs StreamRenderer
+
+Streams a canned response of --tokens tokens at --tokens-per-s into a
+placeholder that serializes every update into the ForwardMsg Streamlit
+sends over the websocket. Reports server CPU time, websocket bytes and the
+number of renders (each one a full markdown re-parse in the browser) per
+response for the old per-token loop and for the buffered renderer.
+
+Usage:
+    python benchmarks/render_bench.py --tokens 2000 --tokens-per-s 400
+    python benchmarks/render_bench.py --flush-interval-ms 50 --output render.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+
+from stream_renderer import StreamRenderer, FLUSH_INTERVAL_S, FLUSH_BYTES  # noqa: E402
+
+from mock_llm_server import DEFAULT_RESPONSE  # noqa: E402
+from retrieval_bench import git_commit  # noqa: E402
+
+# ============================================================================
+# RENDERERS
+# ============================================================================
+
+class ForwardMsgPlaceholder:
+    """Stands in for st.empty(): serializes each update like the Streamlit server does"""
+
+    def __init__(self):
+        self.renders = 0
+        self.websocket_bytes = 0
+
+    def markdown(self, body: str):
+        msg = ForwardMsg()
+        msg.delta.new_element.markdown.body = body
+        self.websocket_bytes += len(msg.SerializeToString())
+        self.renders += 1
+
+
+def render_per_token(placeholder, deltas) -> str:
+    """The original loop: re-render the whole response on every token"""
+    full_response = ""
+    for delta in deltas:
+        full_response += delta
+        placeholder.markdown(full_response + "▌")
+    placeholder.markdown(full_response)
+    return full_response
+
+
+def render_buffered(flush_interval_s: float, flush_bytes: int) -> Callable:
+    def render(placeholder, deltas) -> str:
+        renderer = StreamRenderer(placeholder, flush_interval_s=flush_interval_s, flush_bytes=flush_bytes)
+        for delta in deltas:
+            renderer.write(delta)
+        return renderer.finish()
+    return render
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def canned_tokens(count: int) -> List[str]:
+    tokens = re.findall(r"\S+\s*", DEFAULT_RESPONSE)
+    return [tokens[i % len(tokens)] for i in range(count)]
+
+
+def paced(tokens: List[str], tokens_per_s: float):
+    """Yield tokens at the given rate (as fast as possible when 0)"""
+    interval = 1.0 / tokens_per_s if tokens_per_s else 0.0
+    start = time.perf_counter()
+    for i, token in enumerate(tokens):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        yield token
+
+
+def measure(render: Callable, tokens: List[str], tokens_per_s: float) -> Dict:
+    placeholder = ForwardMsgPlaceholder()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    text = render(placeholder, paced(tokens, tokens_per_s))
+    return {
+        "cpu_ms": round((time.process_time() - cpu_start) * 1000, 2),
+        "wall_s": round(time.perf_counter() - wall_start, 3),
+        "renders": placeholder.renders,
+        "websocket_kb": round(placeholder.websocket_bytes / 1024, 1),
+        "response_kb": round(len(text.encode("utf-8")) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-token vs buffered stream rendering")
+    parser.add_argument("--tokens", type=int, default=2000, help="Tokens per response")
+    parser.add_argument("--tokens-per-s", type=float, default=400.0, help="Stream rate (0 = unpaced)")
+    parser.add_argument("--flush-interval-ms", type=float, default=FLUSH_INTERVAL_S * 1000)
+    parser.add_argument("--flush-bytes", type=int, default=FLUSH_BYTES)
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    tokens = canned_tokens(args.tokens)
+    before = measure(render_per_token, tokens, args.tokens_per_s)
+    after = measure(render_buffered(args.flush_interval_ms / 1000, args.flush_bytes), tokens, args.tokens_per_s)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "tokens": args.tokens, "tokens_per_s": args.tokens_per_s,
+            "flush_interval_ms": args.flush_interval_ms, "flush_bytes": args.flush_bytes,
+        },
+        "per_token": before,
+        "buffered": after,
+        "cpu_reduction": round(1 - after["cpu_ms"] / before["cpu_ms"], 3) if before["cpu_ms"] else None,
+        "websocket_bytes_reduction": round(1 - after["websocket_kb"] / before["websocket_kb"], 3),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
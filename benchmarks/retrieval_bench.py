@@ -0,0 +1,188 @@
+"""Offline retrieval benchmark for the FinOps Advisor knowledge bases
+
+Indexes the fixture corpus into temporary vector stores and runs the golden
+query set through DatabricksKnowledgeBase. Reports recall@k, MRR, domain
+routing accuracy of _detect_domain and p50/p95/p99 retrieval latency per
+domain as JSON, so results can be compared across commits.
+
+By default a deterministic hashing embedding is used so the benchmark runs
+without network access; pass --embeddings minilm to use the production
+sentence-transformers model (must already be cached locally).
+
+Usage:
+    python benchmarks/retrieval_bench.py --output bench.json
+    python benchmarks/retrieval_bench.py --embeddings minilm --k 5
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from collections import defaultdict
+from typing import List, Dict
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_base import DatabricksKnowledgeBase, EMBEDDING_MODEL  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DOMAINS = ["migration", "architecture", "costing"]
+
+# ============================================================================
+# OFFLINE EMBEDDINGS
+# ============================================================================
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings (unigrams and bigrams hashed into a fixed dimension)"""
+
+    model_name = "hashing"
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        tokens = re.findall(r"[a-z0-9]+", text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for feature in features:
+            digest = zlib.crc32(feature.encode())
+            vector[digest % self.dimension] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def load_embeddings(name: str) -> Embeddings:
+    if name == "hashing":
+        return HashingEmbeddings()
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={'device': 'cpu'})
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def build_fixture_kb(work_dir: str, embeddings: Embeddings) -> DatabricksKnowledgeBase:
+    """Index the fixture corpus into a fresh knowledge base"""
+    with open(os.path.join(FIXTURES_DIR, "corpus.json")) as f:
+        corpus = json.load(f)
+
+    kb = DatabricksKnowledgeBase(base_directory=work_dir, embeddings=embeddings)
+    for domain in DOMAINS:
+        documents = [
+            Document(page_content=doc["text"], metadata={"source": doc["source"], "domain": domain})
+            for doc in corpus if doc["domain"] == domain
+        ]
+        kb.index_documents(documents, domain, os.path.join(work_dir, domain))
+
+    if not kb.initialize():
+        sys.exit("Failed to load fixture knowledge bases")
+    return kb
+
+
+def percentile_ms(latencies: List[float], q: float) -> float:
+    return round(float(np.percentile(np.array(latencies) * 1000, q)), 3)
+
+
+def evaluate(kb: DatabricksKnowledgeBase, queries: List[Dict], k: int, repeat: int) -> Dict:
+    """Run the golden queries and aggregate metrics per domain and overall"""
+    per_domain = defaultdict(lambda: {"recall": [], "rr": [], "routed": [], "latency": []})
+
+    for item in queries:
+        stats = per_domain[item["domain"]]
+        relevant = set(item["relevant_sources"])
+
+        stats["routed"].append(kb._detect_domain(item["query"]) == item["domain"])
+
+        documents = kb.get_relevant_documents(item["query"], k=k)
+        sources = [doc.metadata.get("source") for doc in documents]
+        stats["recall"].append(len(relevant & set(sources)) / len(relevant))
+        first_hit = next((rank for rank, source in enumerate(sources, 1) if source in relevant), None)
+        stats["rr"].append(1.0 / first_hit if first_hit else 0.0)
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            kb.get_relevant_context(item["query"], k=k)
+            stats["latency"].append(time.perf_counter() - start)
+
+    def summarize(stats: Dict) -> Dict:
+        return {
+            "queries": len(stats["recall"]),
+            f"recall@{k}": round(float(np.mean(stats["recall"])), 4),
+            "mrr": round(float(np.mean(stats["rr"])), 4),
+            "routing_accuracy": round(float(np.mean(stats["routed"])), 4),
+            "latency_p50_ms": percentile_ms(stats["latency"], 50),
+            "latency_p95_ms": percentile_ms(stats["latency"], 95),
+            "latency_p99_ms": percentile_ms(stats["latency"], 99),
+        }
+
+    overall = {"recall": [], "rr": [], "routed": [], "latency": []}
+    for stats in per_domain.values():
+        for key in overall:
+            overall[key].extend(stats[key])
+
+    return {
+        "domains": {domain: summarize(per_domain[domain]) for domain in DOMAINS if domain in per_domain},
+        "overall": summarize(overall),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark on the fixture corpus")
+    parser.add_argument("--embeddings", default="hashing", choices=["hashing", "minilm"])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, "golden_queries.json")) as f:
+        queries = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="retrieval_bench_")
+    try:
+        kb = build_fixture_kb(work_dir, load_embeddings(args.embeddings))
+        metrics = evaluate(kb, queries, args.k, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {"embeddings": args.embeddings, "k": args.k, "repeat": args.repeat},
+        **metrics,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
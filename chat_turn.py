@@ -0,0 +1,302 @@
+"""Per-turn chat pipeline of the FinOps Advisor
+One turn of the RAG chat without Streamlit: entity extraction, model
+routing, the cost engine with warehouse simulation, TCO projection and
+cluster sizing, then the sectioned report or gated retrieval, history
+compaction and context packing, streamed through LLMClient.
+chatbot_with_rag.py renders it and benchmarks/load_test.py drives it, so
+the load test measures the app's path"""
+
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from cluster_sizing import ClusterSizing, size_clusters
+from context_packer import ContextPacker, prepare_chunks
+from conversation_stage import detect_stage, STAGE_COSTING, STAGE_RECOMMENDATIONS
+from cost_engine import CostEstimate, estimate_costs
+from entity_state import EntityState, EntityExtractor, extracts_turn, renders_mapping
+from history_manager import HistoryManager, ConversationMemory, extract_entity_mapping
+from knowledge_base import MIGRATION_KEYWORDS, ARCHITECTURE_KEYWORDS, COSTING_KEYWORDS
+from llm_client import LLMClient
+from model_routing import ModelRouter, Route, prompt_token_budget
+from prompts import SYSTEM_PROMPT, build_system_prompt, build_cost_engine_prompt, build_cluster_sizing_prompt
+from report_generator import ReportGenerator, is_report_turn, latest_entity_mapping, sizing_tables
+from retrieval_gate import RetrievalGate, GateStats
+from retrieval_prefetch import RetrievalPrefetcher
+from tco_projection import project_from_mapping
+from telemetry import TurnMetrics, TurnRecorder
+from warehouse_simulator import simulate_for_estimate, with_simulated_warehouse
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Prompts are packed to the route's TPM minus max_tokens, at most PROMPT_TOKEN_BUDGET
+PROMPT_TOKEN_BUDGET = 8000
+CONTEXT_TOKEN_BUDGET = 1500
+
+# Older turns are folded into the running summary by the "summary" route
+HISTORY_KEEP_TURNS = 6
+HISTORY_TOKEN_CEILING = 5000
+
+RETRIEVAL_K = 3
+
+
+@dataclass(frozen=True)
+class TurnOptions:
+    """Feature switches of the chat path"""
+    report_mode: bool = True            # final report as concurrent sections once the mapping is confirmed
+    cost_simulation: bool = True        # Monte Carlo percentile ranges on the estimate
+    warehouse_simulation: bool = True   # BI priced from a SQL Warehouse simulation (~0.5s, once per mapping)
+    tco_projection_years: int = 3
+    entity_state_mode: bool = True      # facts tracked per turn by the "entity_extraction" route
+
+# ============================================================================
+# SESSION AND TURN
+# ============================================================================
+
+@dataclass
+class ChatSession:
+    """Conversation state of one user (kept in Streamlit session state by the app)"""
+    retriever: Any = None     # RetrievalPrefetcher or a knowledge base; None answers without documentation
+    session_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    messages: List[Dict[str, str]] = field(default_factory=lambda: [{"role": "system", "content": SYSTEM_PROMPT}])
+    memory: ConversationMemory = field(default_factory=ConversationMemory)
+    entity_state: EntityState = field(default_factory=EntityState)
+    gate_stats: GateStats = field(default_factory=GateStats)
+    turn_metrics: List[TurnMetrics] = field(default_factory=list)
+
+
+@dataclass
+class Turn:
+    """What a turn does, decided before anything is streamed"""
+    prompt: str
+    stage: str
+    route: Route
+    mapping: Optional[str]
+    mapping_turn: bool              # answered with the mapping rendered from the entity state
+    report_mode: bool
+    cost_estimate: Optional[CostEstimate]
+    sizing: Optional[ClusterSizing]
+    recorder: TurnRecorder
+    answer: str = ""
+    error: Optional[str] = None
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+class ChatPipeline:
+    """
+    The chat turn, shared by all sessions of a process
+
+    Usage:
+        turn = pipeline.start(session, prompt)
+        try:
+            turn.answer = "".join(pipeline.stream(session, turn))
+        except LLMError as e:
+            turn.error = str(e)
+        pipeline.finish(session, turn)
+    """
+
+    def __init__(self, client: LLMClient, app: str = "rag", options: TurnOptions = TurnOptions(),
+                 router: Optional[ModelRouter] = None):
+        self.client = client
+        self.app = app
+        self.options = options
+        self.router = router or ModelRouter()
+        self.gate = RetrievalGate(domain_keywords=MIGRATION_KEYWORDS + ARCHITECTURE_KEYWORDS + COSTING_KEYWORDS)
+        self.packers: Dict[str, ContextPacker] = {}
+        self.packers_lock = threading.Lock()
+        self.history_manager = HistoryManager(
+            self.packer(self.router.get("summary")).counter,
+            summarize=self.summarize_turns,
+            keep_turns=HISTORY_KEEP_TURNS,
+            token_ceiling=HISTORY_TOKEN_CEILING
+        )
+        self.entity_extractor = EntityExtractor(self.extract_entities)
+
+    def packer(self, route: Route) -> ContextPacker:
+        """Packer whose budget leaves room for the route's completion within the model's tokens per minute"""
+        with self.packers_lock:
+            if route.name not in self.packers:
+                self.packers[route.name] = ContextPacker(
+                    route.model, budget_tokens=prompt_token_budget(route, PROMPT_TOKEN_BUDGET),
+                    context_tokens=CONTEXT_TOKEN_BUDGET
+                )
+            return self.packers[route.name]
+
+    def summarize_turns(self, messages: List[Dict[str, str]]) -> str:
+        """Summarize folded turns with the small model"""
+        route = self.router.get("summary")
+        response = self.client.complete(
+            estimated_tokens=self.packer(route).counter.count_messages(messages) + route.max_tokens,
+            model=route.model, messages=messages, max_tokens=route.max_tokens, temperature=route.temperature
+        )
+        return response.choices[0].message.content
+
+    def extract_entities(self, messages: List[Dict[str, str]]) -> str:
+        """JSON-mode fact extraction over one turn with the small model"""
+        route = self.router.get("entity_extraction")
+        response = self.client.complete(
+            estimated_tokens=self.packer(route).counter.count_messages(messages) + route.max_tokens,
+            model=route.model,
+            messages=messages,
+            max_tokens=route.max_tokens,
+            temperature=route.temperature,
+            response_format={"type": "json_object"}
+        )
+        return response.choices[0].message.content
+
+    def cost_figures(self, mapping: str) -> Optional[CostEstimate]:
+        """Cost engine estimate of a mapping with the warehouse simulation and TCO projection"""
+        cost_estimate = estimate_costs(mapping, simulate=self.options.cost_simulation)
+        if cost_estimate is None:
+            return None
+        warehouse = simulate_for_estimate(cost_estimate) if self.options.warehouse_simulation else None
+        if warehouse is not None:
+            cost_estimate = with_simulated_warehouse(cost_estimate, warehouse)
+        cost_estimate.projection = project_from_mapping(
+            cost_estimate, mapping, years=self.options.tco_projection_years
+        )
+        return cost_estimate
+
+    def start(self, session: ChatSession, prompt: str) -> Turn:
+        """
+        Add the user message, update the entity state and decide route, cost
+        figures and sizing. If that fails the message is removed again and
+        the error raised, as for a failed turn in finish
+        """
+        session.messages.append({"role": "user", "content": prompt})
+        try:
+            return self._plan(session, prompt)
+        except Exception:
+            session.messages.pop()
+            raise
+
+    def _plan(self, session: ChatSession, prompt: str) -> Turn:
+        stage = detect_stage(session.messages)
+
+        # Update the entity state from this turn only; complete or edited facts are shown as the mapping
+        mapping_turn = False
+        extraction_s = 0.0
+        if self.options.entity_state_mode and extracts_turn(stage, prompt):
+            started = time.perf_counter()
+            previous = session.messages[-2]
+            previous = previous["content"] if previous["role"] == "assistant" else ""
+            changed = self.entity_extractor.update(session.entity_state, prompt, previous)
+            extraction_s = round(time.perf_counter() - started, 4)
+            mapping_turn = renders_mapping(session.entity_state, stage, prompt, changed)
+
+        mapping = latest_entity_mapping(session.messages)
+        report_mode = self.options.report_mode and mapping is not None and is_report_turn(session.messages, stage)
+        if mapping_turn:
+            route = self.router.get("entity_extraction")
+        elif report_mode:
+            route = self.router.get("report")
+        else:
+            route = self.router.route(stage, prompt)
+
+        # Cost figures come from the cost engine; the LLM only explains them
+        cost_estimate = self.cost_figures(mapping) if mapping and (report_mode or stage == STAGE_COSTING) else None
+        # Batch cluster sizes come from the sizing solver (memoized, ~ms per mapping)
+        sizing = size_clusters(mapping) if mapping and (report_mode or stage == STAGE_RECOMMENDATIONS) else None
+
+        recorder = TurnRecorder(self.app, route.model, session.session_id, stage, route.name)
+        recorder.metrics.extraction_s = extraction_s
+        return Turn(prompt, stage, route, mapping, mapping_turn, report_mode, cost_estimate, sizing, recorder)
+
+    def _chat_stream(self, session: ChatSession, turn: Turn, tables: str) -> Iterator[Any]:
+        """Gate retrieval, compact history and pack the prompt, then stream the routed model"""
+        recorder = turn.recorder
+        with recorder.phase("retrieval"):
+            decision = self.gate.decide(turn.prompt, session.messages, turn.stage)
+            session.gate_stats.record(decision)
+
+            documents = []
+            if decision.retrieve and session.retriever is not None:
+                documents = session.retriever.get_relevant_documents(decision.query, k=RETRIEVAL_K)
+
+        with recorder.phase("prompt_build"):
+            # Fold older turns into the running summary
+            memory_message, recent_history = self.history_manager.compact(
+                session.messages[1:-1],  # Skip system message and latest prompt
+                session.memory
+            )
+
+            # Pack the stage's system prompt, memory, documentation and history into the token budget
+            system_prompt = build_system_prompt(turn.stage)
+            if turn.cost_estimate is not None:
+                system_prompt += "\n\n" + build_cost_engine_prompt(turn.cost_estimate.to_markdown())
+            if tables:
+                system_prompt += "\n\n" + build_cluster_sizing_prompt(tables)
+            packed = self.packer(turn.route).pack(
+                system_prompt,
+                recent_history,
+                turn.prompt,
+                prepare_chunks(documents),
+                memory=memory_message
+            )
+
+        recorder.start_generation()
+        return self.client.stream_chat(
+            estimated_tokens=packed.total_tokens + turn.route.max_tokens,
+            model=turn.route.model,
+            messages=packed.messages,
+            max_tokens=turn.route.max_tokens,
+            temperature=turn.route.temperature,
+            cacheable=turn.route.cacheable,
+            cache_window=turn.route.cache_window
+        )
+
+    def stream(self, session: ChatSession, turn: Turn) -> Iterator[str]:
+        """
+        Text of the answer: engine tables or the rendered mapping first,
+        then the streamed tokens. Failures raise (LLMError from the client)
+        """
+        if turn.mapping_turn:
+            # Rendered from the entity state, no generation needed
+            yield session.entity_state.render_message()
+            return
+
+        if turn.report_mode:
+            # Report sections retrieve their own documentation and are generated concurrently
+            turn.recorder.start_generation()
+            chunks = ReportGenerator(
+                self.client, self.packer(turn.route), turn.route, session.retriever
+            ).stream(turn.mapping, turn.cost_estimate, turn.sizing)
+        else:
+            # Cluster and warehouse sizing tables, shown to the user and explained by the model
+            tables = sizing_tables(turn.sizing, turn.cost_estimate)
+            chunks = self._chat_stream(session, turn, tables)
+            shown = [tables] + ([turn.cost_estimate.to_markdown()] if turn.cost_estimate else [])
+            yield "".join(table + "\n\n" for table in shown if table)
+
+        for chunk in chunks:
+            turn.recorder.observe_chunk(chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def finish(self, session: ChatSession, turn: Turn) -> TurnMetrics:
+        """Record the turn's metrics and update history, entity state and the retrieval prefetch"""
+        metrics = turn.recorder.finish(turn.error)
+        session.turn_metrics.append(metrics)
+
+        if turn.error:
+            # Failed turns never enter the history; the user can resend the message
+            session.messages.pop()
+            return metrics
+
+        session.messages.append({"role": "assistant", "content": turn.answer})
+
+        # A mapping the LLM wrote itself (e.g. after a failed extraction) updates the state too
+        llm_mapping = None if turn.mapping_turn else extract_entity_mapping(turn.answer)
+        if llm_mapping:
+            session.entity_state.load_mapping(llm_mapping)
+
+        # Start retrieval for the turn the conversation is heading to
+        if isinstance(session.retriever, RetrievalPrefetcher):
+            session.retriever.prefetch_next(session.messages, self.gate, self.options.report_mode)
+        return metrics
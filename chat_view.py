@@ -0,0 +1,80 @@
+"""Page assets and chat history rendering for the FinOps Advisor apps
+Styles and the homepage block live in static/ and are read once per
+process; the stylesheet is linked from Streamlit's static file server so
+the browser fetches it once. Long histories show the latest messages as
+chat bubbles and older ones as cached, paged markdown"""
+
+import os
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import streamlit as st
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"   # served when server.enableStaticServing is on (.streamlit/config.toml)
+STYLESHEET = "finops.css"
+HOMEPAGE = "homepage.html"
+
+# Messages shown as chat bubbles; older ones move to the paged view
+RECENT_MESSAGES = 6
+HISTORY_PAGE_SIZE = 10
+
+ROLE_LABELS = {"user": "🧑 You", "assistant": "💼 Advisor"}
+
+# ============================================================================
+# STATIC ASSETS
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def read_static(name: str) -> str:
+    """Contents of a file in static/, read once per process"""
+    with open(os.path.join(STATIC_DIR, name)) as f:
+        return f.read()
+
+
+def render_page_assets():
+    """Stylesheet and homepage block; a link tag when static serving is on, inline CSS otherwise"""
+    if st.get_option("server.enableStaticServing"):
+        styles = f'<link rel="stylesheet" href="{STATIC_URL}/{STYLESHEET}">'
+    else:
+        styles = f"<style>\n{read_static(STYLESHEET)}\n</style>"
+    st.markdown(styles + "\n\n" + read_static(HOMEPAGE), unsafe_allow_html=True)
+
+# ============================================================================
+# CHAT HISTORY
+# ============================================================================
+
+@lru_cache(maxsize=512)
+def page_markdown(page: Tuple[Tuple[str, str], ...]) -> str:
+    """One markdown document for a page of (role, content) messages"""
+    return "\n\n---\n\n".join(f"**{ROLE_LABELS.get(role, role)}**\n\n{content}" for role, content in page)
+
+
+def render_history(messages: List[Dict[str, str]], recent: int = RECENT_MESSAGES,
+                   page_size: int = HISTORY_PAGE_SIZE):
+    """
+    Render the conversation without the system prompt
+
+    The last `recent` messages are chat bubbles. Older messages are paged
+    from the start of the conversation, so full pages never change and
+    their markdown comes from the page_markdown cache; they are only
+    sent to the browser when the user opens them
+    """
+    visible = [(m["role"], m["content"]) for m in messages if m["role"] != "system"]
+    older, latest = visible[:-recent], visible[-recent:]
+
+    if older:
+        pages = -(-len(older) // page_size)
+        if st.toggle(f"Show {len(older)} earlier messages", key="history_show_earlier"):
+            page = st.number_input("Page", min_value=1, max_value=pages, value=pages, key="history_page")
+            start = (page - 1) * page_size
+            with st.container(border=True):
+                st.markdown(page_markdown(tuple(older[start:start + page_size])))
+
+    for role, content in latest:
+        with st.chat_message(role):
+            st.markdown(content)
@@ -1,5 +1,18 @@
 import streamlit as st
-from groq import Groq
+import uuid
+
+from telemetry import TurnRecorder, render_operator_sidebar
+from llm_client import LLMClient, LLMError
+from llm_backends import LLM_BACKEND, BACKEND_GROQ, create_backend
+from conversation_stage import detect_stage
+from model_routing import ModelRouter
+from response_cache import ResponseCache
+from stream_renderer import StreamRenderer
+from context_packer import TokenCounter
+from chat_view import render_page_assets, render_history
+
+# Model, max_tokens and temperature per turn come from the routes in models.json
+router = ModelRouter()
 
 # Page configuration
 # st.set_page_config(page_title="Databricks FinOps Advisor", page_icon="💼", layout="centered")
@@ -119,7 +132,7 @@ Once you have collected all mandatory information (or user requests recommendati
   "data_location": "<on-prem|region>",
   "streaming_required": <boolean>,
   "compliance_requirements": ["<if mentioned>"],
-  "current_cost_usd": <number if mentioned>,
+  "current_cost_usd": <number per month if mentioned>,
   "pain_points": ["<if mentioned>"],
   "assumptions": [
     "<list any assumptions made for skipped questions>"
@@ -192,317 +205,35 @@ Provide these recommendations in a clear, structured format that a non-technical
 Remember: You're helping users who are NEW to Databricks. Be patient, educational, and supportive throughout the conversation. Allow users to update their answers and refine recommendations at any point."""
 
 
-st.markdown("""
-<link rel="stylesheet"
-href="https://fonts.googleapis.com/css2?family=Poppins:wght@400;600;700&display=swap">
-            
-<style>
-
-    /* Full-page background gradient */
-    .stApp {
-        background: #e9fdfa;
-        background-attachment: fixed;
-    }
-
-    /* Optional – remove white gaps */
-    main {
-        background: transparent !important;
-    }
-                
-    /* Hide Streamlit default header (hamburger + Deploy) */
-    header[data-testid="stHeader"] {
-        visibility: hidden;
-        height: 0px;
-    }
-
-    /* Also remove extra spacing it leaves */
-    header[data-testid="stHeader"] * {
-        display: none;
-    }
-
-    #             /* 1️⃣ Set full-page background everywhere */
-    # html, body, .stApp {
-    #     # background: linear-gradient(135deg, #1e3a8a, #020617) !important;
-    #             background: #abf8ea;
-    #     background-attachment: fixed;
-    # }
-
-    # /* 2️⃣ Header bar (Streamlit default menu and Deploy button area) */
-    # header[data-testid="stHeader"] {
-    #     background: linear-gradient(135deg, #1e3a8a, #020617) !important;
-    # }
-
-    # /* 3️⃣ Main content container */
-    # [data-testid="stAppViewContainer"] {
-    #     background: transparent !important;
-    # }
-
-    # /* 4️⃣ Sidebar background (match page) */
-    # section[data-testid="stSidebar"] {
-    #     background: linear-gradient(135deg, #1e3a8a, #020617) !important;
-    # }
-
-    /* 5️⃣ Bottom chat input container (white strip issue) */
-    [data-testid="stBottomBlockContainer"] {
-        # background: linear-gradient(135deg, #1e3a8a, #020617) !important;
-                background: #71b6b1;
-                width: 100% !important;
-        max-width: 100% !important;
-        flex-grow: 1 !important;
-        flex-shrink: 0 !important;
-    }
-
-    #stBottomBlockContainer > div {
-        width: 100% !important;
-    }
-                
-    # /* Also style the chat input box background */
-    # [data-baseweb="textarea"] > div {
-    #     background: rgba(0,0,0,0.3) !important;
-    #     color: white !important;
-    # }
-                
-                            
-    /* Make the entire app full-width */
-    [data-testid="stAppViewContainer"] > .main {
-        max-width: 100%;
-        padding-left: 0;
-        padding-right: 0;
-    }
-
-    /* Remove Streamlit default padding and centering */
-    .block-container {
-        max-width: 100%;
-        padding-top: 0;
-        padding-left: 0;
-        padding-right: 0;
-    }
-
-    /* Full-width top navigation bar */
-    .top-nav {
-        width: 100vw;               /* full viewport width */
-        margin-top:50px;
-        margin-left: calc(-50vw + 50%); /* stretch beyond centered container */
-        # background: #B7D3C8;
-        background: linear-gradient(180deg,#71b6b1 0%,#B7D3C8 100% );
-        padding: 16px 28px;
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        position: sticky;
-        top: 0;
-        z-index: 999;
-        position: fixed;
-    }
-
-    .top-nav .title {
-        font-family: "Poppins", sans-serif !important;
-        font-size: 22px;
-        font-weight: bold;
-        color: #1F3D36;
-        padding-left: 20px;
-    }
-                
-    .top-nav .menu{
-        padding-right: 20px;         
-    }
-
-    .top-nav .menu a {
-        font-family: "Poppins", sans-serif !important;
-        color: #1F3D36;
-        margin-left: 18px;
-        text-decoration: none;
-        padding-right: 20px;
-    }
-
-    .top-nav .menu a:hover {
-        text-decoration: none;
-    }
-                
-    .header-logo {
-        position: fixed;
-        width:100%;
-        margin: 0 !important;
-        height:50px;
-        top: 0;
-        left: 0;
-        z-index: 9999;
-        display: flex;
-        /*border: 1px solid red;*/
-        background: #e9fdfa;
-    }  
-
-    .header-logo img{
-        padding-top:10px;
-        padding-left:50px;
-    }        
-                
-    .two-col-block {
-        font-family: "Poppins", sans-serif !important;
-        display: flex;
-        gap: 50px;
-        margin-top: 70px;
-        padding: 80px;
-        padding-bottom: 40px;
-        min-height: 30vh;        /* height of each box */
-    }
-
-    .col {
-        flex: 1;
-        # border: 5px solid red;
-        padding: 20px;
-        border-radius: 12px;
-        background: white;
-        box-sizing: border-box;
-        box-shadow: rgba(0, 0, 0, 0.1) 1px 1px 0px 0px, rgba(0, 0, 0, 0.1) -1px 1px 0px 0px;
-    }            
-
-    .col ol {
-        padding-left: 20px;
-    }
-
-    .col ol ul {
-        margin-top: 6px;
-        padding-left: 24px;
-        list-style-type: disc;
-    }
-
-    .col ol ul li {
-        font-size: 0.95rem;
-        color: #555;
-    }
-
-    .col ul {
-        list-style: none;
-        padding-left: 0;
-        margin-top: 8px;
-    }
-
-    .col ul li {
-        margin-bottom: 6px;
-    }
-                
-    .section-title {
-        display: flex;
-        align-items: center;
-        gap: 10px;
-        font-weight: 600;
-    }
-
-    .title-icon {
-        font-size: 1.2em;
-    }
-                
-    /* Make chat input stack vertically instead of side-by-side */
-    [data-testid="stChatInput"] {
-        display: flex !important;
-        flex-direction: column !important;
-        align-items: flex-start !important;
-        padding-top: 24px !important;     /* space ABOVE chat box  */
-        padding-bottom: 24px !important;  /* space BELOW chat box  */
-        min-height: 140px !important;     /* overall bar height    */
-    }
-
-    /* Title above chat box */
-    [data-testid="stChatInput"]::before {
-        content: "💬 Start a conversation";
-        width: 100%;
-        display: block;
-        text-align: left;
-        margin-bottom: 8px;
-        font-size: 18px;
-        font-weight: 700;
-        color: white;
-    }
-
-    /* Nice spacing for the input box itself */
-    [data-testid="stChatInput"] > div {
-        width: 100%;
-        border-radius: 12px;
-    }
-   
-</style>
-
-
-<div class="header-logo">
-    <img src="https://mresult.com/wp-content/uploads/2025/06/Mlogo-e1665656493505-1.png" height="40">
-</div>
-            
-<div class="top-nav">
-    <div class="title">Databricks FinOps Advisor</div>
-    <div class="menu">
-        <a href="#home">Home</a>
-        <a href="#features">Features</a>
-        <a href="#about">About</a>
-    </div>
-</div>
-            
-<div class="two-col-block">
-
-  <div class="col">
-    <h3><span class="title-icon">💡</span>What is Databricks FinOps Advisor?</h3>
-    <p>
-    This advisor helps organizations plan, optimize, and govern costs while
-    migrating to Databricks.
-    </p>
-    <ul>
-        <li>🔍 Understand existing workloads</li>
-        <li>🧱 Design cost-efficient architectures</li>
-        <li>💰 Estimate and control Databricks costs</li>
-        <li>📊 Improve cost visibility and accountability</li>
-    </ul>
-            
-  </div>
-
-  <div class="col">
-    <h3>🧭 How It Works? </h3>
-    <ol>
-        <li>Describe your data and workload needs</li>
-            <ul>
-                <li>Share your current data platform, workloads, and scale.</li>
-            </ul>
-        <li>Answer guided FinOps questions</li>
-            <ul>
-                <li>The advisor will ask about data volume, frequency, users, and SLAs.</li>
-            </ul>
-        <li>Receive architecture & cost recommendations</li>
-            <ul>
-                <li>Receive recommendations on:   
-                    <ul>
-                        <li>cluster types</li>
-                        <li>job vs all-purpose compute</li>
-                        <li>storage & networking</li>
-                        <li>cost-saving levers</li>
-                    </ul>
-                </li>
-            </ul>
-        <li>Iterate to optimize performance and spend</li>
-            <ul>
-                <li>Update inputs anytime to see optimized recommendations.</li>
-            </ul>
-    </ol>
-  </div>
-
-</div>
-            
-""", unsafe_allow_html=True)
+# Styles and homepage block from static/ (read once per process, stylesheet cached by the browser)
+render_page_assets()
 
 
 
 
-# Initialize Groq client
+# Initialize LLM client (Groq unless FINOPS_LLM_BACKEND says otherwise)
 @st.cache_resource
-def get_groq_client():
+def get_llm_client():
     import os
-    api_key = st.secrets.get("GROQ_API_KEY", None) or os.getenv("GROQ_API_KEY")
+    api_key = None
+    if LLM_BACKEND == BACKEND_GROQ:
+        api_key = st.secrets.get("GROQ_API_KEY", None) or os.getenv("GROQ_API_KEY")
+        
+        if not api_key:
+            st.error("⚠️ Please set GROQ_API_KEY environment variable or in Streamlit secrets")
+            st.info("Get your API key from: https://console.groq.com")
+            st.stop()
     
-    if not api_key:
-        st.error("⚠️ Please set GROQ_API_KEY environment variable or in Streamlit secrets")
-        st.info("Get your API key from: https://console.groq.com")
-        st.stop()
-    return Groq(api_key=api_key)
+    # Shared by all sessions: one connection pool, one set of rate limiters and one response cache
+    return LLMClient(create_backend(LLM_BACKEND, api_key), cache=ResponseCache())
+
+client = get_llm_client()
+
 
-client = get_groq_client()
+@st.cache_resource(show_spinner=False)
+def get_token_counter(model):
+    """One tokenizer per routed model, to reserve the request's real size with the rate limiter"""
+    return TokenCounter(model)
 
 
 # Initialize chat history with system prompt
@@ -511,54 +242,95 @@ if "messages" not in st.session_state:
         {"role": "system", "content": SYSTEM_PROMPT}
     ]
 
-# Display chat history (skip system message)
-for message in st.session_state.messages:
-    if message["role"] != "system":
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-
-
-# st.write("Ask a question or describe your use case below:")
-if prompt := st.chat_input("Ask a question or describe your use case here..."):
-    # Add user message to chat history
-    st.session_state.messages.append({"role": "user", "content": prompt})
+# Initialize per-turn telemetry
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:12]
+
+if "turn_metrics" not in st.session_state:
+    st.session_state.turn_metrics = []
+
+# Chat area as a fragment: sending a message reruns only this function,
+# not the page assets above. Inside a fragment st.chat_input renders inline,
+# so the history and the new turn go to a container above it
+@st.fragment
+def chat_area():
+    # Latest messages as chat bubbles, older ones paged (skips the system message)
+    history = st.container()
+    with history:
+        render_history(st.session_state.messages)
+
+    # st.write("Ask a question or describe your use case below:")
+    if prompt := st.chat_input("Ask a question or describe your use case here..."):
+        # Add user message to chat history
+        st.session_state.messages.append({"role": "user", "content": prompt})
     
-    # Display user message
-    with st.chat_message("user"):
-        st.markdown(prompt)
+        # Display user message
+        with history, st.chat_message("user"):
+            st.markdown(prompt)
     
-    # Get AI response
-    with st.chat_message("assistant"):
-        message_placeholder = st.empty()
-        full_response = ""
+        # Get AI response
+        with history, st.chat_message("assistant"):
+            message_placeholder = st.empty()
+            full_response = ""
+        
+            stage = detect_stage(st.session_state.messages)
+            route = router.route(stage, prompt)
+            recorder = TurnRecorder("poc", route.model, st.session_state.session_id, stage, route.name)
+            error = None
         
-        try:
-            # Stream response from Groq
-            stream = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[
-                    {"role": m["role"], "content": m["content"]}
-                    for m in st.session_state.messages
-                ],
-                stream=True,
-                max_tokens=2048,  # Increased for detailed recommendations
-                temperature=0.7
-            )
+            try:
+                with recorder.phase("prompt_build"):
+                    request_messages = [
+                        {"role": m["role"], "content": m["content"]}
+                        for m in st.session_state.messages
+                    ]
             
-            # Display streaming response
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    full_response += chunk.choices[0].delta.content
-                    message_placeholder.markdown(full_response + "▌")
+                # Stream response from Groq
+                recorder.start_generation()
+                stream = client.stream_chat(
+                    estimated_tokens=get_token_counter(route.model).count_messages(request_messages) + route.max_tokens,
+                    model=route.model,
+                    messages=request_messages,
+                    max_tokens=route.max_tokens,
+                    temperature=route.temperature,
+                    cacheable=route.cacheable,
+                    cache_window=route.cache_window
+                )
             
-            message_placeholder.markdown(full_response)
+                # Display streaming response, re-rendering at most every FLUSH_INTERVAL_S
+                renderer = StreamRenderer(message_placeholder)
+                for chunk in stream:
+                    recorder.observe_chunk(chunk)
+                    if chunk.choices:
+                        renderer.write(chunk.choices[0].delta.content)
             
-        except Exception as e:
-            full_response = f"Error: {str(e)}"
-            message_placeholder.markdown(full_response)
+                full_response = renderer.finish()
+            
+            except LLMError as e:
+                error = str(e)
+                message_placeholder.empty()
+                st.error(f"⚠️ {e.user_message}")
+        
+            except Exception as e:
+                error = str(e)
+                message_placeholder.empty()
+                st.error("⚠️ Something went wrong while preparing the response. Please try again.")
+                print(f"Error generating response: {error}")
+        
+            st.session_state.turn_metrics.append(recorder.finish(error))
     
-    # Add assistant response to chat history
-    st.session_state.messages.append({"role": "assistant", "content": full_response})
+        if error:
+            # Failed turns never enter the history; the user can resend the message
+            st.session_state.messages.pop()
+        else:
+            # Add assistant response to chat history
+            st.session_state.messages.append({"role": "assistant", "content": full_response})
+
+    # Operator metrics sidebar, refreshed with every turn
+    render_operator_sidebar(st.session_state.turn_metrics, client.cache.stats)
+
+
+chat_area()
 
 # # Sidebar with options
 # with st.sidebar:
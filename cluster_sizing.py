@@ -0,0 +1,351 @@
+"""Batch cluster sizing for the FinOps Advisor
+Searches instance types x Photon x worker counts x autoscaling bounds with a
+throughput model and returns the cheapest job cluster that finishes the
+daily batch workload inside the batch window, so cluster sizes in the
+architecture recommendations are computed rather than guessed"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from cost_engine import (
+    resolve_inputs,
+    DAYS_PER_MONTH,
+    ETL_NODE_HOURS_PER_TB,
+    ETL_NODE_HOURS_PER_JOB,
+)
+from entity_state import parse_mapping
+from pricing_catalog import PricingCatalog, load_pricing_catalog, COMPUTE_JOBS
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# THROUGHPUT MODEL
+# ============================================================================
+
+# The cost engine's ETL node-hours are hours of an 8 vCPU, 4 GB/vCPU worker without Photon
+REFERENCE_VCPUS = 8
+REFERENCE_GB_PER_VCPU = 4.0
+
+MEMORY_SPEEDUP = 0.1          # throughput change per doubling of memory per vCPU (fewer spills)
+PHOTON_SPEEDUP = 2.5          # Photon vs the JVM engine on ETL; its DBU cost is the catalog's multiplier
+
+SCALING_OVERHEAD = 0.015      # per extra worker: shuffle and coordination (parallel efficiency 1 / (1 + a(n-1)))
+PARALLEL_SHARE = 0.85         # share of the work that keeps every worker busy
+TAIL_WORKERS = 2              # workers the remainder (skewed stages, small jobs) can use
+
+CLUSTER_START_HOURS = 5 / 60  # launch, billed on the driver and the minimum workers
+SCALE_UP_HOURS = 10 / 60      # autoscaling ramp from min to max workers
+SCALE_DOWN_HOURS = 10 / 60    # idle workers kept before autoscaling releases them
+
+MAX_WORKERS = 64
+DEFAULT_BATCH_WINDOW_HOURS = 6.0
+ALTERNATIVES = 3              # cheapest configuration of the next best instance types
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+@dataclass(frozen=True)
+class ClusterConfig:
+    """One job cluster configuration and its modelled daily run"""
+    instance: str
+    vcpus: int
+    memory_gb: float
+    photon: bool
+    min_workers: int
+    max_workers: int
+    runtime_hours: float
+    dbu_per_day: float
+    monthly_cost: float
+
+    @property
+    def workers(self) -> str:
+        if self.min_workers == self.max_workers:
+            return f"{self.max_workers} (fixed)"
+        return f"{self.min_workers}-{self.max_workers} (autoscaling)"
+
+
+@dataclass
+class ClusterSizing:
+    """Cheapest job cluster that meets the batch window, with alternatives"""
+    cloud: str
+    region: str
+    pricing: str
+    work_node_hours: float              # daily batch work in reference node-hours
+    batch_window_hours: float
+    best: Optional[ClusterConfig]       # None when nothing in the search space fits the window
+    alternatives: List[ClusterConfig]
+    fastest: ClusterConfig
+    candidates: int
+    elapsed_ms: float
+    assumptions: List[str] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        lines = [
+            f"**Batch cluster sizing** ({self.work_node_hours:,.1f} reference node-hours/day in a "
+            f"{self.batch_window_hours:g} h window; {self.candidates:,} configurations searched)",
+            "",
+            "| | Instance | vCPUs / memory | Photon | Workers | Runtime | DBUs/day | Jobs $/month |",
+            "|---|---|---|---|---|---:|---:|---:|",
+        ]
+        rows = [("Recommended", self.best)] if self.best else [("Fastest (misses window)", self.fastest)]
+        rows += [("Alternative", config) for config in self.alternatives]
+        for label, c in rows:
+            lines.append(
+                f"| {label} | {c.instance} | {c.vcpus} / {c.memory_gb:g} GB | {'Yes' if c.photon else 'No'} | "
+                f"{c.workers} | {c.runtime_hours:.1f} h | {c.dbu_per_day:,.1f} | ${c.monthly_cost:,.0f} |"
+            )
+        if self.best is None:
+            lines += ["", f"*No configuration up to {MAX_WORKERS} workers finishes within "
+                          f"{self.batch_window_hours:g} h; split the batch or widen the window*"]
+        if self.assumptions:
+            lines += ["", "*Assumptions:*"] + [f"- {a}" for a in self.assumptions]
+        return "\n".join(lines)
+
+# ============================================================================
+# BATCH WINDOW
+# ============================================================================
+
+# "6 hours", "4-6 h" (the shorter bound), "6.5hrs"
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:-\s*\d+(?:\.\d+)?\s*)?(?:h|hrs?|hours?)\b", re.IGNORECASE)
+# "10pm-4am", "10 PM to 4 AM", "22:00-04:00", "midnight until 5am", "between 1am and 5am"
+CLOCK_TIME = r"(?:(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\.?|(\d{1,2}):(\d{2})|(midnight|noon))"
+TIME_RANGE_PATTERN = re.compile(
+    r"(?:\b(?:between|from)\s+)?" + CLOCK_TIME + r"\s*(?:-|–|—|\bto\b|\buntil\b|\btill\b|\band\b)\s*" + CLOCK_TIME,
+    re.IGNORECASE
+)
+PLAIN_NUMBER_PATTERN = re.compile(r"\s*(\d+(?:\.\d+)?)\s*")
+
+
+def _clock_hours(hour, minute, meridiem, hour_24, minute_24, word) -> Optional[float]:
+    """Hours after midnight of one end of a time range (None when it is not a valid time)"""
+    if word:
+        return 0.0 if word.lower() == "midnight" else 12.0
+    if meridiem:
+        hour, minute = int(hour), int(minute or 0)
+        if not 1 <= hour <= 12 or minute >= 60:
+            return None
+        return hour % 12 + (12 if meridiem.lower() == "p" else 0) + minute / 60
+    hour, minute = int(hour_24), int(minute_24)
+    if hour > 24 or minute >= 60:
+        return None
+    return hour % 24 + minute / 60
+
+
+def parse_batch_window(value: Any) -> Optional[float]:
+    """
+    Batch window in hours from a mapping value: a number of hours, a
+    duration ("6 hours") or a clock range ("10pm-4am", "22:00-04:00",
+    "between 1am and 5am"), which may wrap past midnight. None when the value is ambiguous, e.g.
+    "overnight" or "10-4" without am/pm
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not isinstance(value, str):
+        return None
+
+    match = DURATION_PATTERN.search(value)
+    if match:
+        hours = float(match.group(1))
+        return hours if 0 < hours <= 24 else None
+
+    match = TIME_RANGE_PATTERN.search(value)
+    if match:
+        start, end = _clock_hours(*match.groups()[:6]), _clock_hours(*match.groups()[6:])
+        if start is None or end is None or start == end:
+            return None
+        return (end - start) % 24
+
+    match = PLAIN_NUMBER_PATTERN.fullmatch(value)
+    if match:
+        hours = float(match.group(1))
+        return hours if 0 < hours <= 24 else None
+    return None
+
+
+def _window_provided(value: Any) -> bool:
+    """Whether the mapping has a batch window at all (placeholders like "<timeframe>" do not count)"""
+    if isinstance(value, str):
+        return bool(value.strip()) and not value.strip().startswith("<")
+    return value is not None
+
+# ============================================================================
+# SOLVER
+# ============================================================================
+
+def _efficiency(workers: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + SCALING_OVERHEAD * (workers - 1))
+
+
+def _evaluate(work: float, speed: np.ndarray, min_workers: np.ndarray,
+              max_workers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (runtime hours, billed node-hours incl. driver) of every configuration
+
+    speed is (engine,) in reference workers per worker; worker bounds are
+    (pair,), so results are (engine, pair). Autoscaled clusters start at
+    min workers, lose part of the ramp to scale-up and bill only the
+    workers the tail keeps busy, after the scale-down delay
+    """
+    speed = speed[:, None]
+    n = max_workers[None, :].astype(float)
+    m = min_workers[None, :].astype(float)
+
+    parallel = PARALLEL_SHARE * work / (speed * n * _efficiency(n))
+    tail_workers = np.minimum(n, TAIL_WORKERS)
+    tail = (1 - PARALLEL_SHARE) * work / (speed * tail_workers * _efficiency(tail_workers))
+
+    # During the ramp the cluster averages (m + n) / 2 workers instead of n
+    ramp_loss = np.minimum(SCALE_UP_HOURS, parallel) * (n - m) / (2 * n)
+    runtime = CLUSTER_START_HOURS + parallel + ramp_loss + tail
+
+    tail_billed = np.maximum(m, tail_workers)
+    idle = (n - tail_billed) * np.minimum(SCALE_DOWN_HOURS, tail)
+    node_hours = runtime + m * CLUSTER_START_HOURS + n * parallel + tail_billed * tail + idle
+    return runtime, node_hours
+
+
+@lru_cache(maxsize=256)
+def _worker_pairs(max_workers: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(min, max) worker bounds with min <= max; min == max is a fixed-size cluster"""
+    upper, lower = np.tril_indices(max_workers)
+    return lower + 1, upper + 1
+
+
+@lru_cache(maxsize=1024)
+def _solve(catalog: PricingCatalog, cloud: str, region: str, work: float, window: float,
+           max_workers: int) -> Tuple[Optional[ClusterConfig], Tuple[ClusterConfig, ...], ClusterConfig, int]:
+    instances = catalog.instances(cloud)
+    engines = [(instance, photon) for instance in instances for photon in (False, True)]
+    speed = np.array([
+        instance.vcpus / REFERENCE_VCPUS
+        * (1 + MEMORY_SPEEDUP * np.log2(instance.memory_gb / instance.vcpus / REFERENCE_GB_PER_VCPU))
+        * (PHOTON_SPEEDUP if photon else 1.0)
+        for instance, photon in engines
+    ])
+    usd_per_node_hour = np.array([
+        catalog.instance_dbu_per_hour(cloud, instance.name, photon)
+        * catalog.dbu_rate(cloud, COMPUTE_JOBS, region, photon=photon)
+        for instance, photon in engines
+    ])
+    dbu_per_node_hour = np.array([catalog.instance_dbu_per_hour(cloud, i.name, p) for i, p in engines])
+
+    lower, upper = _worker_pairs(max_workers)
+    runtime, node_hours = _evaluate(work, speed, lower, upper)
+    monthly = node_hours * usd_per_node_hour[:, None] * DAYS_PER_MONTH
+
+    def config(engine: int, pair: int) -> ClusterConfig:
+        instance, photon = engines[engine]
+        return ClusterConfig(
+            instance=instance.name,
+            vcpus=instance.vcpus,
+            memory_gb=instance.memory_gb,
+            photon=photon,
+            min_workers=int(lower[pair]),
+            max_workers=int(upper[pair]),
+            runtime_hours=round(float(runtime[engine, pair]), 2),
+            dbu_per_day=round(float(node_hours[engine, pair] * dbu_per_node_hour[engine]), 1),
+            monthly_cost=round(float(monthly[engine, pair]), 2),
+        )
+
+    fastest = config(*np.unravel_index(np.argmin(runtime), runtime.shape))
+    feasible = np.where(runtime <= window, monthly, np.inf)
+    if not np.isfinite(feasible).any():
+        return None, (), fastest, runtime.size
+
+    # Cheapest feasible configuration per engine, then per instance type
+    per_engine = feasible.argmin(axis=1)
+    engine_cost = feasible[np.arange(len(engines)), per_engine]
+    ranked, seen = [], set()
+    for engine in np.argsort(engine_cost, kind="stable"):
+        instance = engines[engine][0].name
+        if np.isfinite(engine_cost[engine]) and instance not in seen:
+            seen.add(instance)
+            ranked.append(config(int(engine), int(per_engine[engine])))
+    return ranked[0], tuple(ranked[1:1 + ALTERNATIVES]), fastest, runtime.size
+
+
+def size_batch_cluster(cloud: str, region: str, daily_ingest_tb: float, daily_jobs: float,
+                       batch_window_hours: float, catalog: Optional[PricingCatalog] = None,
+                       max_workers: int = MAX_WORKERS,
+                       assumptions: Optional[List[str]] = None) -> ClusterSizing:
+    """
+    Cheapest job cluster that processes a day's batch inside the window
+
+    Every instance type of the cloud, with and without Photon, is evaluated
+    for all min/max worker bounds up to max_workers in one array pass; the
+    result is memoized per input combination
+    """
+    start = time.perf_counter()
+    catalog = catalog or load_pricing_catalog()
+    work = daily_ingest_tb * ETL_NODE_HOURS_PER_TB + daily_jobs * ETL_NODE_HOURS_PER_JOB
+    best, alternatives, fastest, candidates = _solve(
+        catalog, cloud, region, round(float(work), 4), float(batch_window_hours), max_workers
+    )
+    return ClusterSizing(
+        cloud=cloud,
+        region=region,
+        pricing=catalog.label,
+        work_node_hours=work,
+        batch_window_hours=batch_window_hours,
+        best=best,
+        alternatives=list(alternatives),
+        fastest=fastest,
+        candidates=candidates,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+        assumptions=list(assumptions or []),
+    )
+
+
+def size_clusters(mapping: Union[str, Dict], catalog: Optional[PricingCatalog] = None) -> Optional[ClusterSizing]:
+    """
+    Batch cluster sizing from an entity mapping
+
+    Returns:
+        ClusterSizing, or None when the mapping cannot be parsed or has no
+        batch/ETL workload
+    """
+    data = parse_mapping(mapping)
+    if data is None:
+        return None
+
+    catalog = catalog or load_pricing_catalog()
+    assumed: List[str] = []
+    inputs = resolve_inputs(data, catalog, [], assumed)
+    if "etl" not in inputs.workloads:
+        return None
+
+    assumptions = []
+    if "daily_ingest_tb" in assumed:
+        assumptions.append(f"Daily ingest not provided; assumed {inputs.daily_ingest_tb:g} TB")
+    if "batch_jobs" in assumed:
+        assumptions.append(f"Batch job count not provided; assumed {inputs.jobs_per_month / DAYS_PER_MONTH:g} per day")
+    volume = data.get("data_volume") if isinstance(data.get("data_volume"), dict) else {}
+    window_value = volume.get("batch_window_hours")
+    window = parse_batch_window(window_value)
+    if window is None:
+        window = DEFAULT_BATCH_WINDOW_HOURS
+        if _window_provided(window_value):
+            assumptions.append(
+                f"Batch window \"{window_value}\" is not a clear duration or time range; "
+                f"assumed {DEFAULT_BATCH_WINDOW_HOURS:g} hours"
+            )
+        else:
+            assumptions.append(f"Batch window not provided; assumed {DEFAULT_BATCH_WINDOW_HOURS:g} hours")
+    assumptions.append(
+        f"Throughput model: Photon {PHOTON_SPEEDUP:g}x faster on ETL, {PARALLEL_SHARE:.0%} of the work "
+        f"parallelizes across all workers; validate with a representative pipeline run"
+    )
+
+    return size_batch_cluster(
+        inputs.cloud, inputs.region, inputs.daily_ingest_tb, inputs.jobs_per_month / DAYS_PER_MONTH, window,
+        catalog, assumptions=assumptions
+    )
@@ -0,0 +1,322 @@
+"""Token-budgeted context assembly for the FinOps Advisor
+Counts tokens with the target model's tokenizer, merges and de-duplicates
+retrieved chunks, and packs system prompt, documentation and history into
+a fixed budget"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Hugging Face tokenizers matching the models served by Groq
+MODEL_TOKENIZERS = {
+    "llama-3.3-70b-versatile": "unsloth/Llama-3.3-70B-Instruct",
+    "llama-3.1-8b-instant": "unsloth/Meta-Llama-3.1-8B-Instruct",
+    "meta-llama/llama-4-scout-17b-16e-instruct": "unsloth/Llama-4-Scout-17B-16E-Instruct",
+    "meta-llama/llama-4-maverick-17b-128e-instruct": "unsloth/Llama-4-Maverick-17B-128E-Instruct",
+}
+
+# Prompt tokens available per request (completion tokens are budgeted separately)
+DEFAULT_TOKEN_BUDGET = 8000
+
+# Upper bound for the documentation section within the budget
+DEFAULT_CONTEXT_TOKENS = 1500
+
+# Chat-template tokens added around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Shortest shared text that marks two chunks without offsets as adjacent
+MIN_TEXT_OVERLAP = 20
+
+# Texts at least this long (system prompt modules) have their counts cached
+COUNT_CACHE_MIN_CHARS = 2000
+COUNT_CACHE_SIZE = 64
+
+# Characters per token when no tokenizer is available (offline)
+FALLBACK_CHARS_PER_TOKEN = 4
+
+CONTEXT_TEMPLATE = """
+RELEVANT DATABRICKS DOCUMENTATION (use this to provide accurate information):
+
+{context}
+
+Use the above documentation to answer questions accurately. The documentation is tagged by domain (MIGRATION, OPTIMIZATION, or COSTING). Reference the appropriate domain when answering.
+"""
+
+# ============================================================================
+# TOKEN COUNTING
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def _load_tokenizer(model: str):
+    """Load the tokenizer for a model once per process (None if unavailable)"""
+    tokenizer_name = MODEL_TOKENIZERS.get(model)
+    if tokenizer_name is None:
+        return None
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(tokenizer_name)
+    except Exception as e:
+        logger.warning("Tokenizer for %s unavailable, estimating tokens: %s", model, e)
+        return None
+
+
+class TokenCounter:
+    """Counts tokens with the target model's tokenizer"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.tokenizer = _load_tokenizer(model)
+        self._cached_counts = {}
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            return max(1, len(text) // FALLBACK_CHARS_PER_TOKEN)
+        if len(text) >= COUNT_CACHE_MIN_CHARS:
+            if text not in self._cached_counts:
+                if len(self._cached_counts) >= COUNT_CACHE_SIZE:
+                    self._cached_counts.clear()
+                self._cached_counts[text] = len(self.tokenizer.encode(text, add_special_tokens=False))
+            return self._cached_counts[text]
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def count_message(self, message: Dict[str, str]) -> int:
+        return self.count(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self.count_message(m) for m in messages)
+
+# ============================================================================
+# CHUNK MERGING
+# ============================================================================
+
+@dataclass
+class ContextChunk:
+    """A retrieved passage, possibly merged from several adjacent chunks"""
+    source: str
+    domain: str
+    content: str
+    start_index: Optional[int] = None
+    rank: int = 0
+
+    @property
+    def end_index(self) -> Optional[int]:
+        if self.start_index is None:
+            return None
+        return self.start_index + len(self.content)
+
+
+def _text_overlap(left: str, right: str, max_overlap: int = 100) -> int:
+    """Length of the longest suffix of left that is a prefix of right"""
+    for size in range(min(max_overlap, len(left), len(right)), MIN_TEXT_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_pair(first: ContextChunk, second: ContextChunk) -> Optional[ContextChunk]:
+    """Merge two chunks of the same source if they touch or overlap"""
+    if first.source != second.source:
+        return None
+
+    if first.start_index is not None and second.start_index is not None:
+        if second.start_index < first.start_index:
+            first, second = second, first
+        if second.start_index > first.end_index:
+            return None
+        overlap = first.end_index - second.start_index
+        content = first.content + second.content[overlap:]
+    else:
+        overlap = _text_overlap(first.content, second.content)
+        if overlap == 0:
+            overlap = _text_overlap(second.content, first.content)
+            if overlap == 0:
+                return None
+            first, second = second, first
+        content = first.content + second.content[overlap:]
+
+    return ContextChunk(
+        source=first.source,
+        domain=first.domain,
+        content=content,
+        start_index=first.start_index,
+        rank=min(first.rank, second.rank)
+    )
+
+
+def prepare_chunks(documents: List[Any]) -> List[ContextChunk]:
+    """
+    Convert retrieved documents into merged, de-duplicated chunks
+
+    Args:
+        documents: Retrieved LangChain documents in rank order
+
+    Returns:
+        Chunks in rank order, adjacent chunks of one source merged
+    """
+    chunks = []
+    seen = set()
+    for rank, doc in enumerate(documents):
+        digest = hashlib.sha1(" ".join(doc.page_content.split()).lower().encode()).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        chunks.append(ContextChunk(
+            source=doc.metadata.get("source", "Unknown"),
+            domain=doc.metadata.get("domain", "unknown"),
+            content=doc.page_content,
+            start_index=doc.metadata.get("start_index"),
+            rank=rank
+        ))
+
+    # Repeatedly merge touching chunks of the same source
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(chunks)):
+            for j in range(i + 1, len(chunks)):
+                combined = _merge_pair(chunks[i], chunks[j])
+                if combined is not None:
+                    chunks[i] = combined
+                    del chunks[j]
+                    merged = True
+                    break
+            if merged:
+                break
+
+    # Drop chunks fully contained in another one
+    unique = []
+    for chunk in sorted(chunks, key=lambda c: len(c.content), reverse=True):
+        if not any(chunk.source == kept.source and chunk.content in kept.content for kept in unique):
+            unique.append(chunk)
+
+    return sorted(unique, key=lambda c: c.rank)
+
+
+def format_chunk(chunk: ContextChunk, number: int) -> str:
+    """Format a chunk as a tagged documentation reference"""
+    source_display = chunk.source.split('/')[-1] if '/' in chunk.source else chunk.source
+    return f"[{chunk.domain.upper()} - Reference {number}: {source_display}]\n{chunk.content}"
+
+# ============================================================================
+# CONTEXT PACKER
+# ============================================================================
+
+@dataclass
+class PackedPrompt:
+    """Messages ready to send plus the token count of every section"""
+    messages: List[Dict[str, str]]
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+
+class ContextPacker:
+    """
+    Packs the prompt to a token budget in priority order:
+    system prompt, latest user message, conversation memory (summary
+    and entity mapping), retrieved documentation (best ranked first),
+    then conversation history (newest first)
+    """
+
+    def __init__(self, model: str, budget_tokens: int = DEFAULT_TOKEN_BUDGET,
+                 context_tokens: int = DEFAULT_CONTEXT_TOKENS):
+        self.counter = TokenCounter(model)
+        self.budget_tokens = budget_tokens
+        self.context_tokens = context_tokens
+
+    def _pack_context(self, chunks: List[ContextChunk], limit: int) -> Tuple[str, int, int]:
+        kept = []
+        used = self.counter.count(CONTEXT_TEMPLATE.format(context="")) + MESSAGE_OVERHEAD_TOKENS
+        for chunk in chunks:
+            text = format_chunk(chunk, len(kept) + 1)
+            tokens = self.counter.count(text) + 2  # separator
+            if used + tokens > limit:
+                continue
+            kept.append(text)
+            used += tokens
+        if not kept:
+            return "", 0, 0
+        return "\n\n---\n\n".join(kept), used, len(kept)
+
+    def pack(self, system_prompt: str, history: List[Dict[str, str]], prompt: str,
+             chunks: Optional[List[ContextChunk]] = None,
+             memory: Optional[Dict[str, str]] = None) -> PackedPrompt:
+        """
+        Assemble the messages for one turn
+
+        Args:
+            system_prompt: System prompt for this turn
+            history: Previous user/assistant messages (without the latest prompt)
+            prompt: Latest user message
+            chunks: Prepared documentation chunks in rank order
+            memory: Summary of earlier turns from the history manager
+
+        Returns:
+            PackedPrompt with messages and per-section token counts
+        """
+        chunks = chunks or []
+        system_message = {"role": "system", "content": system_prompt}
+        user_message = {"role": "user", "content": prompt}
+
+        system_tokens = self.counter.count_message(system_message)
+        prompt_tokens = self.counter.count_message(user_message)
+        memory_tokens = self.counter.count_message(memory) if memory else 0
+        remaining = self.budget_tokens - system_tokens - prompt_tokens - memory_tokens
+
+        # Documentation has priority over older history, up to its own cap
+        context_text, context_tokens, context_count = self._pack_context(
+            chunks, min(self.context_tokens, max(0, remaining))
+        )
+        remaining -= context_tokens
+
+        # Keep the most recent history that still fits
+        kept_history = []
+        history_tokens = 0
+        for message in reversed(history):
+            tokens = self.counter.count_message(message)
+            if history_tokens + tokens > remaining:
+                break
+            kept_history.insert(0, message)
+            history_tokens += tokens
+
+        messages = [system_message] + ([memory] if memory else []) + kept_history
+        if context_text:
+            messages.append({"role": "system", "content": CONTEXT_TEMPLATE.format(context=context_text)})
+        messages.append(user_message)
+
+        packed = PackedPrompt(
+            messages=messages,
+            section_tokens={
+                "system": system_tokens,
+                "memory": memory_tokens,
+                "history": history_tokens,
+                "context": context_tokens,
+                "user": prompt_tokens
+            },
+            dropped={
+                "history_messages": len(history) - len(kept_history),
+                "context_chunks": len(chunks) - context_count
+            }
+        )
+
+        logger.info(
+            "prompt tokens: system=%d memory=%d history=%d context=%d user=%d total=%d/%d "
+            "(dropped %d history messages, %d chunks)",
+            system_tokens, memory_tokens, history_tokens, context_tokens, prompt_tokens,
+            packed.total_tokens, self.budget_tokens,
+            packed.dropped["history_messages"], packed.dropped["context_chunks"]
+        )
+        return packed
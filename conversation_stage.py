@@ -0,0 +1,77 @@
+"""Conversation stage detection for the FinOps Advisor
+Derives where the guided assessment currently is from the chat history"""
+
+import re
+from typing import List, Dict
+
+# ============================================================================
+# STAGES
+# ============================================================================
+
+STAGE_INFO_GATHERING = "info_gathering"
+STAGE_MAPPING_CONFIRMATION = "mapping_confirmation"
+STAGE_RECOMMENDATIONS = "recommendations"
+STAGE_COSTING = "costing"
+
+# Fields that only appear in the entity mapping JSON the advisor produces
+MAPPING_MARKERS = ["\"cloud_provider\"", "\"data_volume\"", "\"workload_types\""]
+
+CONFIRMATION_PATTERN = re.compile(
+    r"^\s*(yes|yep|yeah|y|correct|looks good|looks correct|that's right|that is right|"
+    r"confirmed?|go ahead|proceed|perfect|ok|okay|sure|all good)\b",
+    re.IGNORECASE
+)
+
+# Cost questions after the mapping is confirmed switch to the costing stage
+COSTING_PATTERN = re.compile(
+    r"\b(cost|costs|price|pricing|expensive|budget|spend|billing|dbus?|tco|savings|estimate|fee)\b",
+    re.IGNORECASE
+)
+
+
+def is_entity_mapping(content: str) -> bool:
+    """Check whether an assistant message carries the entity mapping JSON"""
+    return "```json" in content and any(marker in content for marker in MAPPING_MARKERS)
+
+
+def is_confirmation(content: str) -> bool:
+    """Check whether a user message confirms the previous assistant turn"""
+    return bool(CONFIRMATION_PATTERN.match(content))
+
+
+def detect_stage(messages: List[Dict[str, str]]) -> str:
+    """
+    Detect the current conversation stage from the chat history
+
+    Args:
+        messages: Chat history (system messages are ignored)
+
+    Returns:
+        One of STAGE_INFO_GATHERING, STAGE_MAPPING_CONFIRMATION,
+        STAGE_RECOMMENDATIONS, STAGE_COSTING
+    """
+    chat = [m for m in messages if m["role"] != "system"]
+
+    # Find the most recent entity mapping produced by the advisor
+    mapping_index = None
+    for i in range(len(chat) - 1, -1, -1):
+        if chat[i]["role"] == "assistant" and is_entity_mapping(chat[i]["content"]):
+            mapping_index = i
+            break
+
+    if mapping_index is None:
+        return STAGE_INFO_GATHERING
+
+    # The mapping counts as confirmed once the user agreed to it
+    confirmed = any(
+        msg["role"] == "user" and is_confirmation(msg["content"])
+        for msg in chat[mapping_index + 1:]
+    )
+    if not confirmed:
+        return STAGE_MAPPING_CONFIRMATION
+
+    # After confirmation, cost questions are answered in the costing stage
+    if chat[-1]["role"] == "user" and COSTING_PATTERN.search(chat[-1]["content"]):
+        return STAGE_COSTING
+
+    return STAGE_RECOMMENDATIONS
@@ -0,0 +1,655 @@
+"""Deterministic DBU cost engine for the FinOps Advisor
+Turns the confirmed entity mapping into per-workload DBU hours and monthly
+cost, plus Conservative/Expected/High scenarios, so cost figures shown to
+the user are computed rather than generated by the LLM"""
+
+import logging
+import re
+import time
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from entity_state import parse_mapping, parse_number
+from pricing_catalog import (
+    PricingCatalog,
+    load_pricing_catalog,
+    normalize_cloud,
+    COMPUTE_JOBS,
+    COMPUTE_ALL_PURPOSE,
+    COMPUTE_SQL_SERVERLESS,
+)
+
+if TYPE_CHECKING:
+    # Both modules import this one; only type checkers follow these imports
+    from tco_projection import TcoProjection
+    from warehouse_simulator import WarehouseSimulation
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# SIZING MODEL
+# ============================================================================
+
+DAYS_PER_MONTH = 30
+WEEKS_PER_MONTH = 4.33
+BUSINESS_DAYS_PER_MONTH = 22
+HOURS_PER_MONTH = 730
+
+DEFAULT_CLOUD = "AWS"
+
+# General-purpose 8 vCPU worker per cloud, sized from the pricing catalog
+WORKER_INSTANCE = {"AWS": "m5d.2xlarge", "Azure": "Standard_D8ds_v5", "GCP": "n2-standard-8"}
+
+# Batch ETL on job clusters
+ETL_NODE_HOURS_PER_TB = 8.0
+ETL_NODE_HOURS_PER_JOB = 0.5
+
+# BI on SQL warehouses: one cluster per SQL_USERS_PER_CLUSTER concurrent users
+SQL_USERS_PER_CLUSTER = 10
+SQL_SMALL_SIZE = "Small"    # for warehouses under SQL_MEDIUM_FROM_TB
+SQL_MEDIUM_SIZE = "Medium"
+SQL_MEDIUM_FROM_TB = 5.0
+SQL_HOURS_PER_BUSINESS_DAY = 10
+
+# Data science / ML on a shared all-purpose cluster
+ML_NODES = 4
+ML_HOURS_PER_BUSINESS_DAY = 8
+
+# Always-on streaming job cluster (driver + 2 workers)
+STREAMING_NODES = 3
+
+# Defaults for values the mapping leaves out
+DEFAULT_DAILY_INGEST_SHARE = 0.01   # of warehouse size
+DEFAULT_WAREHOUSE_TB = 1.0
+DEFAULT_DAILY_JOBS = 20
+DEFAULT_CONCURRENT_USERS = 10
+
+WORKLOAD_PATTERNS = {
+    "etl": re.compile(r"\b(etl|elt|pipelines?|batch|ingest\w*|transform\w*)\b"),
+    "sql": re.compile(r"\b(reports?|reporting|bi|dashboards?|analytics?|sql|quer(y|ies)|warehous\w*)\b"),
+    "ml": re.compile(r"\b(ml|machine learning|data science|ai|models?)\b"),
+    "streaming": re.compile(r"\b(stream\w*|real[- ]?time|events?)\b"),
+}
+
+# Scenario multipliers per workload kind: conservative (optimized), expected, high (non-optimized)
+SCENARIOS = ["Conservative", "Expected", "High"]
+SCENARIO_FACTORS = {
+    "etl": (0.7, 1.0, 1.5),        # spot, autoscaling, right-sizing vs over-provisioned clusters
+    "sql": (0.6, 1.0, 1.6),        # aggressive auto-stop vs warehouses left running
+    "ml": (0.6, 1.0, 1.5),
+    "streaming": (0.8, 1.0, 1.3),
+}
+
+WORKLOAD_LABELS = {
+    "etl": ("ETL / batch processing", "Jobs Compute", COMPUTE_JOBS),
+    "sql": ("BI / analytics", "SQL Warehouse (Serverless)", COMPUTE_SQL_SERVERLESS),
+    "ml": ("Data science / ML", "All-Purpose Compute", COMPUTE_ALL_PURPOSE),
+    "streaming": ("Streaming", "Jobs Compute (always on)", COMPUTE_JOBS),
+}
+
+# Monte Carlo ranges: uncertain inputs are drawn per simulated month
+SIMULATION_DRAWS = 100_000
+SIMULATION_SEED = 7              # fixed, so a mapping gets the same bands every turn
+SIMULATION_MONTHS = 12           # growth is averaged over the first year
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Triangular (low, mode, high) factors on the expected figures; the wide
+# variants apply when the mapping left the driving input to an assumption
+UTILIZATION = (0.6, 1.0, 1.3)            # SQL/ML uptime vs planned hours
+UTILIZATION_ASSUMED = (0.4, 1.0, 2.0)
+AUTOSCALING_EFFICIENCY = (0.75, 1.0, 1.35)  # billed vs nominal cluster capacity
+MONTHLY_GROWTH = (0.0, 0.02, 0.05)       # data volume growth per month
+# Lognormal sigma on ETL runtime hours and storage volume
+RUNTIME_SIGMA = 0.2
+RUNTIME_SIGMA_ASSUMED = 0.45
+STORAGE_SIGMA_ASSUMED = 0.5
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+@dataclass
+class WorkloadEstimate:
+    """Expected-scenario DBU usage and cost of one workload"""
+    kind: str
+    name: str
+    compute: str
+    dbu_per_hour: float
+    hours_per_month: float
+    dbu_per_month: float
+    dbu_price: float
+    monthly_cost: float
+
+
+@dataclass
+class CostSimulation:
+    """Percentile bands of monthly cost from the Monte Carlo simulation"""
+    draws: int
+    months: int
+    percentiles: Tuple[int, ...]
+    totals: np.ndarray                  # (percentile,) monthly total incl. storage
+    by_workload: Dict[str, np.ndarray]  # workload name -> (percentile,) monthly cost
+    widened: List[str]                  # inputs sampled with the wide (assumed) ranges
+    elapsed_ms: float
+
+    def to_markdown(self) -> str:
+        header = " | ".join(f"P{p}" for p in self.percentiles)
+        lines = [
+            f"**Simulated monthly cost range** ({self.draws:,} draws, average of the first {self.months} months)",
+            "",
+            f"| | {header} |",
+            "|---" + "|---:" * len(self.percentiles) + "|",
+        ]
+        for name, values in self.by_workload.items():
+            lines.append(f"| {name} | " + " | ".join(f"${v:,.0f}" for v in values) + " |")
+        lines.append("| **Total** | " + " | ".join(f"**${v:,.0f}**" for v in self.totals) + " |")
+        if self.widened:
+            lines += ["", f"*Wider ranges used for assumed inputs: {', '.join(self.widened)}*"]
+        return "\n".join(lines)
+
+
+@dataclass
+class CostEstimate:
+    """Monthly cost estimate for a confirmed entity mapping"""
+    cloud: str
+    region: str
+    pricing: str                        # catalog version the rates come from
+    workloads: List[WorkloadEstimate]
+    scenario_costs: np.ndarray          # (scenario, workload) monthly DBU cost
+    storage_monthly: float
+    assumptions: List[str] = field(default_factory=list)
+    assumed: List[str] = field(default_factory=list)   # mapping inputs filled with defaults
+    simulation: Optional[CostSimulation] = None
+    inputs: Optional["CostInputs"] = None
+    projection: Optional["TcoProjection"] = None   # multi-year curves, set by tco_projection
+    warehouse: Optional["WarehouseSimulation"] = None  # BI hours source, set by warehouse_simulator
+
+    @property
+    def scenario_totals(self) -> Dict[str, float]:
+        totals = self.scenario_costs.sum(axis=1) + self.storage_monthly
+        return dict(zip(SCENARIOS, totals.round(2).tolist()))
+
+    def to_markdown(self) -> str:
+        lines = [
+            f"**Estimated monthly cost** ({self.cloud} {self.region}; {self.pricing})",
+            "",
+            "| Workload | Compute | DBU/hour | Hours/month | DBUs/month | $/DBU | Expected $/month |",
+            "|---|---|---:|---:|---:|---:|---:|",
+        ]
+        for w in self.workloads:
+            lines.append(
+                f"| {w.name} | {w.compute} | {w.dbu_per_hour:,.1f} | {w.hours_per_month:,.0f} | "
+                f"{w.dbu_per_month:,.0f} | ${w.dbu_price:.2f} | ${w.monthly_cost:,.0f} |"
+            )
+        lines.append(f"| Storage | Cloud object storage | | | | | ${self.storage_monthly:,.0f} |")
+
+        lines += ["", "| Scenario | Monthly | Annual |", "|---|---:|---:|"]
+        for scenario, total in self.scenario_totals.items():
+            lines.append(f"| {scenario} | ${total:,.0f} | ${total * 12:,.0f} |")
+
+        if self.simulation is not None:
+            lines += ["", self.simulation.to_markdown()]
+
+        if self.projection is not None:
+            lines += ["", self.projection.to_markdown()]
+
+        if self.assumptions:
+            lines += ["", "*Assumptions:*"] + [f"- {a}" for a in self.assumptions]
+        return "\n".join(lines)
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+def _cloud(value: Any, assumptions: List[str]) -> str:
+    cloud = normalize_cloud(value)
+    if cloud is not None:
+        return cloud
+    assumptions.append(f"{CLOUD_ASSUMPTION}; priced on {DEFAULT_CLOUD}")
+    return DEFAULT_CLOUD
+
+
+def _workload_kinds(data: Dict, assumptions: List[str]) -> List[str]:
+    text = " ".join(str(w).lower() for w in data.get("workload_types") or [])
+    kinds = [kind for kind, pattern in WORKLOAD_PATTERNS.items() if pattern.search(text)]
+    if data.get("streaming_required") is True and "streaming" not in kinds:
+        kinds.append("streaming")
+    if not kinds:
+        kinds = ["etl", "sql"]
+        assumptions.append("No workload types given; assumed batch ETL and BI reporting")
+    return kinds
+
+
+def _value(section: Dict, key: str, default: float, label: str,
+           assumptions: List[str], assumed: List[str]) -> float:
+    value = parse_number(section.get(key))
+    if value is None:
+        assumptions.append(f"{label} not provided; assumed {default:g}")
+        assumed.append(key)
+        return default
+    return value
+
+
+def _catalog_for(pricing: str) -> PricingCatalog:
+    """The loaded catalog whose label an estimate carries"""
+    catalog = load_pricing_catalog()
+    if catalog.label != pricing:
+        raise ValueError(f"Estimate was priced with {pricing}, loaded catalog is {catalog.label}")
+    return catalog
+
+# ============================================================================
+# WORKLOAD TERMS (array-friendly, so one formula serves estimates and sweeps)
+# ============================================================================
+
+def _etl_sizing(catalog: PricingCatalog, cloud: str, daily_ingest_tb, jobs_per_month):
+    hours = daily_ingest_tb * ETL_NODE_HOURS_PER_TB * DAYS_PER_MONTH + jobs_per_month * ETL_NODE_HOURS_PER_JOB
+    return catalog.instance_dbu_per_hour(cloud, WORKER_INSTANCE[cloud]), hours
+
+
+def _sql_sizing(catalog: PricingCatalog, cloud: str, concurrent_users, warehouse_tb):
+    size_dbu = np.where(
+        np.asarray(warehouse_tb) >= SQL_MEDIUM_FROM_TB,
+        catalog.warehouse_dbu_per_hour(SQL_MEDIUM_SIZE),
+        catalog.warehouse_dbu_per_hour(SQL_SMALL_SIZE)
+    )
+    clusters = np.ceil(np.asarray(concurrent_users) / SQL_USERS_PER_CLUSTER)
+    return clusters * size_dbu, SQL_HOURS_PER_BUSINESS_DAY * BUSINESS_DAYS_PER_MONTH
+
+
+def _ml_sizing(catalog: PricingCatalog, cloud: str):
+    return ML_NODES * catalog.instance_dbu_per_hour(cloud, WORKER_INSTANCE[cloud]), \
+        ML_HOURS_PER_BUSINESS_DAY * BUSINESS_DAYS_PER_MONTH
+
+
+def _streaming_sizing(catalog: PricingCatalog, cloud: str):
+    return STREAMING_NODES * catalog.instance_dbu_per_hour(cloud, WORKER_INSTANCE[cloud]), HOURS_PER_MONTH
+
+
+# Sizing function and the CostInputs fields each workload term depends on
+WORKLOAD_SIZING = {
+    "etl": (_etl_sizing, ("daily_ingest_tb", "jobs_per_month")),
+    "sql": (_sql_sizing, ("concurrent_users", "warehouse_tb")),
+    "ml": (_ml_sizing, ()),
+    "streaming": (_streaming_sizing, ()),
+}
+
+SWEEP_FIELDS = ("warehouse_tb", "daily_ingest_tb", "jobs_per_month", "concurrent_users")
+
+# Inputs a what-if may change; a new cloud also gets that cloud's region
+WHAT_IF_FIELDS = SWEEP_FIELDS + ("cloud", "region")
+
+INPUT_LABELS = {
+    "warehouse_tb": "Warehouse size (TB)",
+    "daily_ingest_tb": "Daily ingest (TB)",
+    "jobs_per_month": "Batch jobs per month",
+    "concurrent_users": "Concurrent users",
+    "cloud": "Cloud provider",
+    "region": "Region",
+}
+
+# Keys recorded in CostEstimate.assumed: the input each one fills and how its assumption reads
+ASSUMED_INPUTS = {
+    "warehouse_size_tb": ("warehouse_tb", "Warehouse size (TB)"),
+    "daily_ingest_tb": ("daily_ingest_tb", "Daily ingest (TB)"),
+    "batch_jobs": ("jobs_per_month", "Batch job count"),
+    "concurrent_users": ("concurrent_users", "Concurrent users"),
+}
+CLOUD_ASSUMPTION = "Cloud provider not fixed"
+
+TERM_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class CostInputs:
+    """The cost model's inputs, resolved from an entity mapping"""
+    cloud: str
+    region: str
+    warehouse_tb: float
+    daily_ingest_tb: float
+    jobs_per_month: float
+    concurrent_users: float
+    workloads: Tuple[str, ...]
+
+
+@lru_cache(maxsize=TERM_CACHE_SIZE)
+def workload_term(kind: str, catalog: PricingCatalog, cloud: str, region: str,
+                  *args: float) -> Tuple[float, float, float]:
+    """
+    (DBU/hour, hours/month, $/DBU) of one workload
+
+    Memoized on the inputs the workload depends on only, so a what-if that
+    changes concurrent users recomputes the SQL term and reuses the rest
+    """
+    sizing, _ = WORKLOAD_SIZING[kind]
+    dbu_per_hour, hours = sizing(catalog, cloud, *args)
+    return float(dbu_per_hour), float(hours), catalog.dbu_rate(cloud, WORKLOAD_LABELS[kind][2], region)
+
+
+def _term_args(kind: str, inputs: CostInputs) -> Tuple[float, ...]:
+    return tuple(getattr(inputs, name) for name in WORKLOAD_SIZING[kind][1])
+
+# ============================================================================
+# ESTIMATES
+# ============================================================================
+
+def resolve_inputs(data: Dict, catalog: PricingCatalog, assumptions: List[str],
+                   assumed: List[str]) -> CostInputs:
+    """Cost model inputs from a parsed mapping, filling gaps with stated defaults"""
+    cloud = _cloud(data.get("cloud_provider"), assumptions)
+    region = catalog.resolve_region(cloud, data.get("data_location"))
+
+    volume = data.get("data_volume") if isinstance(data.get("data_volume"), dict) else {}
+    jobs = data.get("batch_jobs") if isinstance(data.get("batch_jobs"), dict) else {}
+
+    warehouse_tb = _value(volume, "warehouse_size_tb", DEFAULT_WAREHOUSE_TB,
+                          ASSUMED_INPUTS["warehouse_size_tb"][1], assumptions, assumed)
+    daily_ingest_tb = _value(
+        volume, "daily_ingest_tb", round(warehouse_tb * DEFAULT_DAILY_INGEST_SHARE, 3),
+        ASSUMED_INPUTS["daily_ingest_tb"][1], assumptions, assumed
+    )
+    daily_jobs = parse_number(jobs.get("daily_count"))
+    weekly_jobs = parse_number(jobs.get("weekly_count")) or 0.0
+    if daily_jobs is None and not weekly_jobs:
+        daily_jobs = DEFAULT_DAILY_JOBS
+        assumptions.append(f"{ASSUMED_INPUTS['batch_jobs'][1]} not provided; assumed {DEFAULT_DAILY_JOBS} per day")
+        assumed.append("batch_jobs")
+    jobs_per_month = (daily_jobs or 0.0) * DAYS_PER_MONTH + weekly_jobs * WEEKS_PER_MONTH
+
+    users = parse_number(data.get("concurrent_users"))
+    if users is None:
+        users = DEFAULT_CONCURRENT_USERS
+        assumptions.append(f"{ASSUMED_INPUTS['concurrent_users'][1]} not provided; assumed {DEFAULT_CONCURRENT_USERS}")
+        assumed.append("concurrent_users")
+
+    return CostInputs(
+        cloud=cloud,
+        region=region,
+        warehouse_tb=warehouse_tb,
+        daily_ingest_tb=daily_ingest_tb,
+        jobs_per_month=jobs_per_month,
+        concurrent_users=users,
+        workloads=tuple(_workload_kinds(data, assumptions)),
+    )
+
+
+def estimate_from_inputs(inputs: CostInputs, catalog: Optional[PricingCatalog] = None,
+                         assumptions: Optional[List[str]] = None,
+                         assumed: Optional[List[str]] = None) -> CostEstimate:
+    """Estimate for resolved inputs, built from the memoized workload terms"""
+    catalog = catalog or load_pricing_catalog()
+    kinds = inputs.workloads
+    terms = np.array([
+        workload_term(kind, catalog, inputs.cloud, inputs.region, *_term_args(kind, inputs)) for kind in kinds
+    ]).reshape(len(kinds), 3)
+    dbu_per_hour, hours, price = terms.T
+    factors = np.array([SCENARIO_FACTORS[k] for k in kinds]).reshape(len(kinds), 3).T  # (scenario, workload)
+
+    dbu_per_month = dbu_per_hour * hours
+    expected_cost = dbu_per_month * price
+    scenario_costs = factors * expected_cost
+
+    workloads = [
+        WorkloadEstimate(
+            kind=kind,
+            name=WORKLOAD_LABELS[kind][0],
+            compute=WORKLOAD_LABELS[kind][1],
+            dbu_per_hour=float(dbu_per_hour[i]),
+            hours_per_month=float(hours[i]),
+            dbu_per_month=float(dbu_per_month[i]),
+            dbu_price=float(price[i]),
+            monthly_cost=float(expected_cost[i]),
+        )
+        for i, kind in enumerate(kinds)
+    ]
+    return CostEstimate(
+        cloud=inputs.cloud,
+        region=inputs.region,
+        pricing=catalog.label,
+        workloads=workloads,
+        scenario_costs=scenario_costs,
+        storage_monthly=round(inputs.warehouse_tb * catalog.storage_rate(inputs.cloud), 2),
+        assumptions=list(assumptions or []),
+        assumed=list(assumed or []),
+        inputs=inputs,
+    )
+
+
+def estimate_costs(mapping: Union[str, Dict], catalog: Optional[PricingCatalog] = None,
+                   simulate: bool = False) -> Optional[CostEstimate]:
+    """
+    Estimate monthly DBU and storage cost from an entity mapping
+
+    Args:
+        mapping: Entity mapping JSON (string or parsed)
+        catalog: Pricing catalog (defaults to the local pricing.json)
+        simulate: Also compute Monte Carlo percentile bands
+
+    Returns:
+        CostEstimate, or None when the mapping cannot be parsed
+    """
+    data = parse_mapping(mapping)
+    if data is None:
+        logger.warning("Entity mapping is not valid JSON; cost engine skipped")
+        return None
+
+    catalog = catalog or load_pricing_catalog()
+    assumptions: List[str] = []
+    assumed: List[str] = []
+    inputs = resolve_inputs(data, catalog, assumptions, assumed)
+
+    assumptions.append("DBU charges only; cloud VM charges for classic compute are billed separately by the cloud provider")
+    assumptions.extend(str(a) for a in data.get("assumptions") or [] if a and not str(a).startswith("<"))
+
+    estimate = estimate_from_inputs(inputs, catalog, assumptions, assumed)
+    if simulate:
+        estimate.simulation = simulate_costs(estimate)
+    return estimate
+
+# ============================================================================
+# WHAT-IF
+# ============================================================================
+
+def _what_if_note(name: str, value: Any) -> str:
+    return f"What-if: {INPUT_LABELS[name]} set to {value:g}" if isinstance(value, float) else \
+        f"What-if: {INPUT_LABELS[name]} set to {value}"
+
+
+def what_if(estimate: CostEstimate, catalog: Optional[PricingCatalog] = None, **changes: Any) -> CostEstimate:
+    """
+    The estimate with some inputs changed, e.g. what_if(estimate, concurrent_users=200)
+
+    Only workload terms that depend on a changed input are recomputed; the
+    others come from the workload_term cache. Inputs whose value changes
+    no longer count as assumed: their default-value assumptions give way
+    to what-if notes. A new cloud is priced in that cloud's region (the
+    default one unless `region` names another). An estimate whose BI row
+    comes from the warehouse simulation is re-simulated for the new inputs
+    (memoized, so only a changed user count, size or price runs it again)
+    """
+    unknown = set(changes) - set(WHAT_IF_FIELDS)
+    if unknown:
+        raise ValueError(f"Inputs that cannot be changed: {sorted(unknown)} (choose from {WHAT_IF_FIELDS})")
+    pricing = catalog or _catalog_for(estimate.pricing)
+    current = estimate.inputs
+    if "cloud" in changes:
+        cloud = normalize_cloud(changes["cloud"])
+        if cloud is None:
+            raise ValueError(f"Unknown cloud: {changes['cloud']!r}")
+        changes = {**changes, "cloud": cloud, "region": pricing.resolve_region(cloud, changes.get("region"))}
+    elif "region" in changes:
+        changes = {**changes, "region": pricing.resolve_region(current.cloud, changes["region"])}
+    changes = {name: float(value) if name in SWEEP_FIELDS else value for name, value in changes.items()}
+    changed = [name for name, value in changes.items() if value != getattr(current, name)]
+
+    stale = [key for key, (name, _) in ASSUMED_INPUTS.items() if name in changed]
+    prefixes = tuple(f"{ASSUMED_INPUTS[key][1]} not provided" for key in stale)
+    prefixes += (CLOUD_ASSUMPTION,) if "cloud" in changed else ()
+    assumptions = [a for a in estimate.assumptions if not (prefixes and a.startswith(prefixes))]
+    assumptions += [_what_if_note(name, changes[name]) for name in changed]
+    assumed = [key for key in estimate.assumed if key not in stale]
+    updated = estimate_from_inputs(replace(current, **changes), pricing, assumptions, assumed)
+
+    if estimate.warehouse is not None:
+        # warehouse_simulator imports this module
+        from warehouse_simulator import simulate_for_estimate, with_simulated_warehouse
+
+        simulation = simulate_for_estimate(updated, estimate.warehouse.pattern, catalog)
+        if simulation is not None:
+            updated = with_simulated_warehouse(updated, simulation)
+    return updated
+
+
+@dataclass
+class CostSweep:
+    """Expected monthly cost over a grid of inputs (one array axis per swept input)"""
+    axes: Dict[str, np.ndarray]
+    by_workload: Dict[str, np.ndarray]
+    total: np.ndarray
+
+    def to_frame(self):
+        """Long-format DataFrame (one row per grid point) for st.line_chart and friends"""
+        import pandas as pd
+
+        grids = np.meshgrid(*self.axes.values(), indexing="ij")
+        columns = {name: grid.ravel() for name, grid in zip(self.axes, grids)}
+        columns.update({name: np.broadcast_to(values, self.total.shape).ravel()
+                        for name, values in self.by_workload.items()})
+        columns["total"] = self.total.ravel()
+        return pd.DataFrame(columns)
+
+
+def sweep(inputs: CostInputs, catalog: Optional[PricingCatalog] = None, scenario: str = "Expected",
+          workload_scale: Optional[Dict[str, float]] = None, **axes: Sequence[float]) -> CostSweep:
+    """
+    Evaluate the cost model over a grid in one vectorized pass
+
+    Usage:
+        grid = sweep(estimate.inputs, concurrent_users=np.arange(10, 501, 10),
+                     daily_ingest_tb=np.linspace(0.1, 5, 50))
+        grid.total.shape  # (50, 50)
+
+    workload_scale multiplies a workload kind's cost across the grid (see
+    sweep_estimate)
+    """
+    unknown = set(axes) - set(SWEEP_FIELDS)
+    if unknown:
+        raise ValueError(f"Inputs that cannot be swept: {sorted(unknown)} (choose from {SWEEP_FIELDS})")
+    catalog = catalog or load_pricing_catalog()
+    scenario_index = SCENARIOS.index(scenario)
+
+    # Each swept input gets its own axis; the others stay scalar and broadcast
+    values = {name: getattr(inputs, name) for name in SWEEP_FIELDS}
+    grid_axes = {}
+    for i, (name, points) in enumerate(axes.items()):
+        points = np.asarray(points, dtype=float)
+        grid_axes[name] = points
+        values[name] = points.reshape([-1 if j == i else 1 for j in range(len(axes))])
+
+    by_workload = {}
+    for kind in inputs.workloads:
+        sizing, needs = WORKLOAD_SIZING[kind]
+        dbu_per_hour, hours = sizing(catalog, inputs.cloud, *(values[name] for name in needs))
+        price = catalog.dbu_rate(inputs.cloud, WORKLOAD_LABELS[kind][2], inputs.region)
+        by_workload[WORKLOAD_LABELS[kind][0]] = (
+            np.asarray(dbu_per_hour * hours * price) * SCENARIO_FACTORS[kind][scenario_index]
+        )
+    for kind, scale in (workload_scale or {}).items():
+        if kind in inputs.workloads:
+            name = WORKLOAD_LABELS[kind][0]
+            by_workload[name] = by_workload[name] * scale
+    by_workload["Storage"] = np.asarray(values["warehouse_tb"] * catalog.storage_rate(inputs.cloud))
+
+    shape = tuple(len(points) for points in grid_axes.values())
+    total = np.zeros(shape)
+    for cost in by_workload.values():
+        total = total + cost
+    return CostSweep(axes=grid_axes, by_workload=by_workload, total=total)
+
+
+def sweep_estimate(estimate: CostEstimate, catalog: Optional[PricingCatalog] = None,
+                   scenario: str = "Expected", **axes: Sequence[float]) -> CostSweep:
+    """
+    Sweep around an estimate that passes through the estimate's own costs
+
+    Workloads priced outside the sizing rules (BI from the warehouse
+    simulation) keep the rules' shape across the grid, scaled by the ratio
+    of the estimate's cost to the rules' cost at the estimate's inputs
+    """
+    catalog = catalog or _catalog_for(estimate.pricing)
+    rules = estimate_from_inputs(estimate.inputs, catalog)
+    workload_scale = {
+        ours.kind: ours.monthly_cost / theirs.monthly_cost
+        for ours, theirs in zip(estimate.workloads, rules.workloads)
+        if theirs.monthly_cost and not np.isclose(ours.monthly_cost, theirs.monthly_cost)
+    }
+    return sweep(estimate.inputs, catalog, scenario, workload_scale=workload_scale, **axes)
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+def _triangular(rng: np.random.Generator, bounds: Tuple[float, float, float], n: int) -> np.ndarray:
+    low, mode, high = bounds
+    return rng.triangular(low, mode, high, n)
+
+
+def simulate_costs(estimate: CostEstimate, draws: int = SIMULATION_DRAWS, seed: int = SIMULATION_SEED,
+                   months: int = SIMULATION_MONTHS) -> CostSimulation:
+    """
+    Monte Carlo percentile bands around an estimate
+
+    Samples utilization, ETL runtime hours, autoscaling efficiency and data
+    growth, with wider ranges for inputs the mapping left to assumptions,
+    and evaluates every workload's cost for all draws in one array pass
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    assumed = set(estimate.assumed)
+    widened = []
+
+    sql_wide = "concurrent_users" in assumed
+    runtime_wide = bool(assumed & {"daily_ingest_tb", "batch_jobs"})
+    storage_wide = "warehouse_size_tb" in assumed
+    widened += ["concurrent users"] * sql_wide + ["ingest/job volume"] * runtime_wide + ["warehouse size"] * storage_wide
+
+    utilization = _triangular(rng, UTILIZATION_ASSUMED if sql_wide else UTILIZATION, draws)
+    runtime = rng.lognormal(0.0, RUNTIME_SIGMA_ASSUMED if runtime_wide else RUNTIME_SIGMA, draws)
+    autoscaling = _triangular(rng, AUTOSCALING_EFFICIENCY, draws)
+    growth_rate = _triangular(rng, MONTHLY_GROWTH, draws)
+
+    # Average volume multiplier over the horizon: mean of (1 + g)^m for m = 0..months-1
+    growth = np.ones(draws)
+    growing = growth_rate > 0
+    g = growth_rate[growing]
+    growth[growing] = np.expm1(months * np.log1p(g)) / (months * g)
+
+    factors = {
+        "etl": runtime * autoscaling * growth,
+        "sql": utilization,
+        "ml": utilization * autoscaling,
+        "streaming": autoscaling * growth,
+    }
+    expected = np.array([w.monthly_cost for w in estimate.workloads])
+    costs = np.column_stack([factors[w.kind] for w in estimate.workloads]) * expected   # (draw, workload)
+
+    storage = estimate.storage_monthly * growth
+    if storage_wide:
+        storage = storage * rng.lognormal(0.0, STORAGE_SIGMA_ASSUMED, draws)
+    totals = costs.sum(axis=1) + storage
+
+    by_workload = dict(zip(
+        [w.name for w in estimate.workloads] + ["Storage"],
+        np.percentile(np.column_stack([costs, storage]), PERCENTILES, axis=0).T
+    ))
+    return CostSimulation(
+        draws=draws,
+        months=months,
+        percentiles=PERCENTILES,
+        totals=np.percentile(totals, PERCENTILES),
+        by_workload=by_workload,
+        widened=widened,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
@@ -0,0 +1,390 @@
+"""Incremental entity state for the FinOps Advisor
+Keeps the assessment facts as typed fields in the session, updates them
+after each user turn from a small JSON-mode extraction over that turn only,
+validates them against the entity mapping schemas in the system prompt and
+renders the mapping from state instead of regenerating it with the LLM"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from conversation_stage import STAGE_INFO_GATHERING, STAGE_MAPPING_CONFIRMATION, is_confirmation
+from history_manager import JSON_BLOCK_PATTERN
+from model_routing import REQUEST_RECOMMENDATIONS, detect_request_type
+from prompts import ENTITY_MAPPING_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# SCHEMA (parsed from the extended and simplified schemas in the prompt)
+# ============================================================================
+
+KIND_STRING = "string"
+KIND_NUMBER = "number"
+KIND_BOOLEAN = "boolean"
+KIND_LIST = "list"
+KIND_ENUM = "enum"
+
+PLACEHOLDER_PATTERN = re.compile(r"(:\s*)(<[^>\"]*>)")
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+# "500 GB", "500GB", "2 PiB": no word boundary between a number and a glued unit
+VOLUME_UNIT_PATTERN = re.compile(r"(?<![a-z])([gtp])i?b\b", re.IGNORECASE)
+TB_PER_UNIT = {"g": 0.001, "t": 1.0, "p": 1000.0}
+
+# Costs are kept per month: "$40k", "$1.2M per year" -> 100000
+AMOUNT_PATTERN = re.compile(r"(-?\d+(?:\.\d+)?)\s*(k|m|thousand|million)?\b", re.IGNORECASE)
+AMOUNT_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "million": 1e6}
+ANNUAL_PATTERN = re.compile(r"\b(year|yearly|annual\w*|per annum|/\s*yr|p\.?a\.?)\b", re.IGNORECASE)
+
+# Values the pricing catalog supports beyond the prompt's <Azure|AWS|Flexible>
+EXTRA_OPTIONS = {"cloud_provider": ("GCP",)}
+OPTION_ALIASES = {"amazon": "AWS", "microsoft": "Azure", "google": "GCP", "any": "Flexible"}
+
+# Sections where one answered field answers the question (jobs per day or per week)
+ANY_OF_SECTIONS = ("batch_jobs",)
+
+# Not extracted: filled from skipped questions
+ASSUMPTIONS_FIELD = "assumptions"
+
+MAPPING_MESSAGE = """Here's what I've understood about your environment:
+
+```json
+{mapping}
+```
+
+Does this look correct? Would you like to modify anything before I provide recommendations?"""
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """One entity mapping field; `name` is the dotted path in the schema"""
+    name: str
+    kind: str
+    options: Tuple[str, ...] = ()
+    default: Any = None
+    mandatory: bool = False
+    extended_only: bool = False
+
+    def coerce(self, value: Any) -> Any:
+        """Validated value for this field, or None when it does not fit"""
+        if value is None or value == "" or value == []:
+            return None
+        if self.kind == KIND_NUMBER:
+            if self.name.endswith("_cost_usd"):
+                number = parse_monthly_cost(value)
+            else:
+                number = parse_number(value)
+            unit = VOLUME_UNIT_PATTERN.search(value) if isinstance(value, str) else None
+            if number is not None and unit and self.name.endswith("_tb"):
+                number *= TB_PER_UNIT[unit.group(1).lower()]
+            # Counts, volumes, hours and costs: a negative value is a misread, not a fact
+            return None if number is not None and number < 0 else number
+        if self.kind == KIND_BOOLEAN:
+            if isinstance(value, bool):
+                return value
+            text = str(value).strip().lower()
+            return True if text in ("true", "yes", "y") else False if text in ("false", "no", "n") else None
+        if self.kind == KIND_LIST:
+            items = value if isinstance(value, list) else re.split(r"\s*[,;]\s*", str(value))
+            items = [str(item).strip() for item in items if str(item).strip()]
+            return items or None
+        text = str(value).strip()
+        if self.kind == KIND_ENUM:
+            lowered = text.lower()
+            for option in self.options:
+                if option.lower() in lowered:
+                    return option
+            for alias, option in OPTION_ALIASES.items():
+                if alias in lowered and option in self.options:
+                    return option
+            return None
+        return None if text.startswith("<") else text
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """Numeric value of a mapping field ('4 hours', 12, '<number>' -> None)"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_PATTERN.search(value.replace(",", ""))
+        return float(match.group()) if match else None
+    return None
+
+
+def parse_monthly_cost(value: Any) -> Optional[float]:
+    """Monthly cost in USD of a mapping field ('$40k', '$1.2M per year' -> 100000)"""
+    if not isinstance(value, str):
+        return parse_number(value)
+    match = AMOUNT_PATTERN.search(value.replace(",", ""))
+    if match is None:
+        return None
+    amount = float(match.group(1)) * AMOUNT_MULTIPLIERS.get((match.group(2) or "").lower(), 1.0)
+    return amount / 12 if ANNUAL_PATTERN.search(value) else amount
+
+
+def parse_mapping(mapping: Union[str, Dict]) -> Optional[Dict]:
+    """An entity mapping as a dict (None when the JSON cannot be parsed)"""
+    if isinstance(mapping, dict):
+        return mapping
+    try:
+        data = json.loads(mapping)
+    except ValueError:
+        # Models sometimes leave unquoted <placeholders> or trailing commas
+        cleaned = re.sub(r":\s*<[^>]*>", ": null", mapping)
+        cleaned = re.sub(r",\s*([}\]])", r"\1", cleaned)
+        try:
+            data = json.loads(cleaned)
+        except ValueError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def _flatten(data: Dict, prefix: str = "") -> Dict[str, Any]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _spec(name: str, placeholder: Any, mandatory: bool, extended_only: bool) -> FieldSpec:
+    """Field type from its schema placeholder ('<number>', '<boolean>', '<A|B>', [...], literal)"""
+    if isinstance(placeholder, list):
+        return FieldSpec(name, KIND_LIST, mandatory=mandatory, extended_only=extended_only)
+    text = str(placeholder)
+    if not text.startswith("<"):
+        return FieldSpec(name, KIND_STRING, default=placeholder, extended_only=extended_only)
+    inner = text.strip("<>")
+    if inner.startswith("number"):
+        return FieldSpec(name, KIND_NUMBER, mandatory=mandatory, extended_only=extended_only)
+    if inner == "boolean":
+        return FieldSpec(name, KIND_BOOLEAN, mandatory=mandatory, extended_only=extended_only)
+    options = tuple(inner.split("|"))
+    # Capitalized alternatives are a closed set (<Azure|AWS|Flexible>); <on-prem|region> is a description
+    if len(options) > 1 and all(option[:1].isupper() for option in options):
+        options += EXTRA_OPTIONS.get(name, ())
+        return FieldSpec(name, KIND_ENUM, options, mandatory=mandatory, extended_only=extended_only)
+    return FieldSpec(name, KIND_STRING, mandatory=mandatory, extended_only=extended_only)
+
+
+def _schema_blocks(prompt: str) -> List[Dict]:
+    """The JSON schemas of the prompt, with unquoted placeholders quoted"""
+    return [json.loads(PLACEHOLDER_PATTERN.sub(r'\1"\2"', block)) for block in JSON_BLOCK_PATTERN.findall(prompt)]
+
+
+@dataclass(frozen=True)
+class EntitySchema:
+    """Field specs plus the key layout of both mapping schemas"""
+    fields: Dict[str, FieldSpec]
+    extended: Dict
+    simplified: Dict
+
+    @classmethod
+    def from_prompt(cls, prompt: str = ENTITY_MAPPING_PROMPT) -> "EntitySchema":
+        extended, simplified = _schema_blocks(prompt)
+        simple = _flatten(simplified)
+        fields = {}
+        for name, placeholder in _flatten(extended).items():
+            if name == ASSUMPTIONS_FIELD:
+                continue
+            in_simple = name in simple
+            mandatory = in_simple and "if mentioned" not in str(placeholder)
+            fields[name] = _spec(name, placeholder, mandatory, extended_only=not in_simple)
+        return cls(fields, extended, simplified)
+
+    def describe(self) -> str:
+        """Field list for the extraction prompt"""
+        lines = []
+        for spec in self.fields.values():
+            if spec.default is not None:
+                continue
+            kind = f"one of {'|'.join(spec.options)}" if spec.kind == KIND_ENUM else spec.kind
+            lines.append(f"- {spec.name} ({kind})")
+        return "\n".join(lines)
+
+
+ENTITY_SCHEMA = EntitySchema.from_prompt()
+
+# ============================================================================
+# STATE
+# ============================================================================
+
+@dataclass
+class EntityState:
+    """Validated assessment facts collected so far (per session)"""
+    values: Dict[str, Any] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    turns_extracted: int = 0
+    schema: EntitySchema = field(default=ENTITY_SCHEMA, repr=False)
+
+    def apply(self, updates: Dict[str, Any]) -> List[str]:
+        """
+        Merge one turn's extraction into the state
+
+        Unknown fields and values that do not fit the schema are dropped.
+        Returns the names of the fields that changed
+        """
+        flat = _flatten(updates)
+        skipped = flat.pop("skipped", None) or []
+        changed = []
+        for name, raw in flat.items():
+            spec = self.schema.fields.get(name)
+            if spec is None or spec.default is not None:
+                continue
+            value = spec.coerce(raw)
+            if value is None:
+                logger.info("entity state: dropped invalid %s=%r", name, raw)
+                continue
+            if self.values.get(name) != value:
+                self.values[name] = value
+                changed.append(name)
+            if name in self.skipped:
+                self.skipped.remove(name)
+
+        for name in self._skipped_fields(skipped if isinstance(skipped, list) else [skipped]):
+            if name not in self.values and name not in self.skipped:
+                self.skipped.append(name)
+                changed.append(name)
+        return changed
+
+    def _skipped_fields(self, names: List[Any]) -> List[str]:
+        """Schema fields named by a skip; a section name ("batch_jobs") skips each of its fields"""
+        fields = []
+        for name in map(str, names):
+            if name in self.schema.fields:
+                fields.append(name)
+            else:
+                fields += [
+                    field_name for field_name, spec in self.schema.fields.items()
+                    if field_name.startswith(f"{name}.") and spec.default is None
+                ]
+        return fields
+
+    def load_mapping(self, mapping: Union[str, Dict]) -> List[str]:
+        """Take over the facts of a mapping the LLM wrote, keeping state and chat in step"""
+        data = parse_mapping(mapping)
+        return self.apply(data) if data else []
+
+    def missing(self) -> List[str]:
+        """Mandatory fields neither answered nor skipped"""
+        answered = set(self.values) | set(self.skipped)
+        missing = []
+        for spec in self.schema.fields.values():
+            if not spec.mandatory or spec.name in answered:
+                continue
+            section = spec.name.split(".")[0]
+            if section in ANY_OF_SECTIONS and any(name.startswith(f"{section}.") for name in answered):
+                continue
+            missing.append(spec.name)
+        return missing
+
+    def is_complete(self) -> bool:
+        return not self.missing()
+
+    def assumptions(self) -> List[str]:
+        return [f"{name} not provided by the user; a typical value is assumed" for name in self.skipped + self.missing()]
+
+    def to_mapping(self) -> Dict:
+        """The entity mapping in the extended schema if optional facts are known, else the simplified one"""
+        extended = any(self.schema.fields[name].extended_only for name in self.values)
+        layout = self.schema.extended if extended else self.schema.simplified
+
+        def fill(template: Dict, prefix: str = "") -> Dict:
+            result = {}
+            for key, placeholder in template.items():
+                name = f"{prefix}{key}"
+                if name == ASSUMPTIONS_FIELD:
+                    result[key] = self.assumptions()
+                elif isinstance(placeholder, dict):
+                    result[key] = fill(placeholder, f"{name}.")
+                else:
+                    spec = self.schema.fields[name]
+                    value = self.values.get(name, spec.default)
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                    result[key] = [] if value is None and spec.kind == KIND_LIST else value
+            return result
+
+        return fill(layout)
+
+    def render_message(self) -> str:
+        """The mapping confirmation message, rendered from state"""
+        return MAPPING_MESSAGE.format(mapping=json.dumps(self.to_mapping(), indent=2))
+
+# ============================================================================
+# EXTRACTION
+# ============================================================================
+
+EXTRACTION_PROMPT = """You extract facts for a Databricks migration assessment from ONE user message.
+Return a JSON object with only the fields the user states, changes or skips in this message, using these field names:
+{fields}
+
+Rules:
+- Numbers as plain numbers; data volumes in TB (convert GB/PB)
+- current_cost_usd per month (divide yearly costs by 12)
+- List fields as arrays of short strings
+- "skipped": array of field (or section, e.g. "batch_jobs") names the user declines to answer or does not know
+- Return {{}} when the message contains none of these facts"""
+
+# The advisor's previous message is included only for context, clipped to its end
+QUESTION_CONTEXT_CHARS = 600
+
+
+class EntityExtractor:
+    """
+    Updates an EntityState from each user turn
+
+    `extract` sends the messages to a small model in JSON mode and returns
+    the response text; failures leave the state unchanged
+    """
+
+    def __init__(self, extract: Callable[[List[Dict[str, str]]], str], schema: EntitySchema = ENTITY_SCHEMA):
+        self.extract = extract
+        self.system_prompt = EXTRACTION_PROMPT.format(fields=schema.describe())
+
+    def update(self, state: EntityState, user_message: str, advisor_message: str = "") -> List[str]:
+        """Extract facts from one turn into the state; returns the changed fields"""
+        question = advisor_message[-QUESTION_CONTEXT_CHARS:]
+        try:
+            text = self.extract([
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": f"ADVISOR ASKED:\n{question or '(nothing)'}\n\nUSER ANSWERED:\n{user_message}"}
+            ])
+            updates = json.loads(text or "{}")
+        except Exception as e:
+            logger.warning("Entity extraction failed, state unchanged: %s", e)
+            return []
+        if not isinstance(updates, dict):
+            return []
+
+        state.turns_extracted += 1
+        changed = state.apply(updates)
+        logger.info("entity state: %d fields changed, %d mandatory missing", len(changed), len(state.missing()))
+        return changed
+
+
+def extracts_turn(stage: str, prompt: str) -> bool:
+    """Whether a user turn can carry facts for the entity state"""
+    return stage in (STAGE_INFO_GATHERING, STAGE_MAPPING_CONFIRMATION) and not is_confirmation(prompt)
+
+
+def renders_mapping(state: EntityState, stage: str, prompt: str, changed: List[str]) -> bool:
+    """
+    Whether this turn is answered with the mapping rendered from state
+
+    While gathering: once every mandatory fact is answered or skipped, or
+    when the user asks for recommendations. While confirming: whenever the
+    user's message changed a fact
+    """
+    if stage == STAGE_INFO_GATHERING:
+        return bool(state.values) and (
+            state.is_complete() or detect_request_type(prompt) == REQUEST_RECOMMENDATIONS
+        )
+    return stage == STAGE_MAPPING_CONFIRMATION and bool(changed)
@@ -0,0 +1,184 @@
+"""Rolling conversation compaction for the FinOps Advisor
+Keeps the last turns verbatim and folds older turns into a running summary
+plus the latest entity mapping, so the prompt stays bounded per turn"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Callable, Tuple
+
+from context_packer import TokenCounter
+from conversation_stage import is_entity_mapping
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# User/assistant exchanges kept verbatim
+DEFAULT_KEEP_TURNS = 6
+
+# Older turns are folded in batches so the summarizer is not called every turn
+DEFAULT_FOLD_BATCH_TURNS = 3
+
+# Ceiling for summary + entity mapping + verbatim history
+DEFAULT_HISTORY_TOKEN_CEILING = 5000
+
+# Upper bound for the running summary itself
+DEFAULT_SUMMARY_TOKENS = 600
+
+SUMMARY_PROMPT = """You maintain a running summary of a Databricks migration assessment conversation.
+Merge the new conversation turns into the existing summary. Keep every fact the user gave
+(platform, data volumes, ingest rates, batch jobs, users, cloud, location, optional details),
+any skipped questions and assumptions, and which questions are still open.
+Write terse bullet points. Do not add facts that are not in the conversation."""
+
+MEMORY_TEMPLATE = """CONVERSATION SO FAR (earlier turns have been summarized):
+
+{summary}
+"""
+
+MAPPING_TEMPLATE = """
+CURRENT ENTITY MAPPING:
+```json
+{mapping}
+```
+"""
+
+JSON_BLOCK_PATTERN = re.compile(r"```json\s*(.*?)```", re.DOTALL)
+
+# ============================================================================
+# HISTORY MANAGER
+# ============================================================================
+
+@dataclass
+class ConversationMemory:
+    """Per-session compaction state"""
+    summary: str = ""
+    folded_messages: int = 0
+    entity_mapping: Optional[str] = None
+
+
+def extract_entity_mapping(content: str) -> Optional[str]:
+    """Pull the entity mapping JSON block out of an assistant message"""
+    if not is_entity_mapping(content):
+        return None
+    match = JSON_BLOCK_PATTERN.search(content)
+    return match.group(1).strip() if match else None
+
+
+class HistoryManager:
+    """
+    Bounds the history sent with each request: recent turns verbatim,
+    older turns as a running summary, plus the latest entity mapping
+    """
+
+    def __init__(self, counter: TokenCounter,
+                 summarize: Optional[Callable[[List[Dict[str, str]]], str]] = None,
+                 keep_turns: int = DEFAULT_KEEP_TURNS,
+                 fold_batch_turns: int = DEFAULT_FOLD_BATCH_TURNS,
+                 token_ceiling: int = DEFAULT_HISTORY_TOKEN_CEILING,
+                 summary_tokens: int = DEFAULT_SUMMARY_TOKENS):
+        self.counter = counter
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.fold_batch_turns = fold_batch_turns
+        self.token_ceiling = token_ceiling
+        self.summary_tokens = summary_tokens
+
+    def _extractive_summary(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        """Fallback summary: one clipped line per folded message"""
+        lines = [summary] if summary else []
+        for message in messages:
+            speaker = "User" if message["role"] == "user" else "Advisor"
+            text = " ".join(message["content"].split())
+            lines.append(f"- {speaker}: {text[:200]}")
+        return "\n".join(lines)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the most recent part of a summary that fits max_tokens"""
+        lines = text.splitlines()
+        while len(lines) > 1 and self.counter.count("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _fold(self, memory: ConversationMemory, messages: List[Dict[str, str]]):
+        """Fold messages into the running summary"""
+        summary = None
+        if self.summarize is not None:
+            transcript = "\n".join(
+                f"{'User' if m['role'] == 'user' else 'Advisor'}: {m['content']}" for m in messages
+            )
+            try:
+                summary = self.summarize([
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": (
+                        f"EXISTING SUMMARY:\n{memory.summary or '(none)'}\n\nNEW TURNS:\n{transcript}"
+                    )}
+                ])
+            except Exception as e:
+                logger.warning("Summarizer failed, using extractive summary: %s", e)
+
+        if not summary:
+            summary = self._extractive_summary(memory.summary, messages)
+
+        # The summary may use at most half of the history ceiling
+        max_tokens = min(self.summary_tokens, self.token_ceiling // 2)
+        memory.summary = self._truncate(summary.strip(), max_tokens)
+        memory.folded_messages += len(messages)
+
+    def _memory_message(self, memory: ConversationMemory) -> Optional[Dict[str, str]]:
+        if not memory.summary and not memory.entity_mapping:
+            return None
+        content = MEMORY_TEMPLATE.format(summary=memory.summary or "(no earlier turns)")
+        if memory.entity_mapping:
+            content += MAPPING_TEMPLATE.format(mapping=memory.entity_mapping)
+        return {"role": "system", "content": content}
+
+    def compact(self, history: List[Dict[str, str]],
+                memory: ConversationMemory) -> Tuple[Optional[Dict[str, str]], List[Dict[str, str]]]:
+        """
+        Compact the chat history for the next request
+
+        Args:
+            history: Previous user/assistant messages (without the latest prompt)
+            memory: Session compaction state, updated in place
+
+        Returns:
+            (memory message or None, recent messages kept verbatim)
+        """
+        # Track the latest entity mapping, wherever it sits in the history
+        for message in reversed(history):
+            if message["role"] == "assistant":
+                mapping = extract_entity_mapping(message["content"])
+                if mapping:
+                    memory.entity_mapping = mapping
+                    break
+
+        # Fold older turns once a full batch has aged out of the verbatim window
+        keep_messages = self.keep_turns * 2
+        aged_out = len(history) - keep_messages - memory.folded_messages
+        if aged_out >= self.fold_batch_turns * 2:
+            start = memory.folded_messages
+            self._fold(memory, history[start:start + aged_out])
+
+        memory_message = self._memory_message(memory)
+        recent = history[memory.folded_messages:]
+
+        # Enforce the ceiling by folding the oldest verbatim turns, keeping the last exchange
+        memory_tokens = self.counter.count_message(memory_message) if memory_message else 0
+        recent_tokens = self.counter.count_messages(recent)
+        while len(recent) > 2 and memory_tokens + recent_tokens > self.token_ceiling:
+            overflow = recent[:2]
+            self._fold(memory, overflow)
+            recent = recent[2:]
+            memory_message = self._memory_message(memory)
+            memory_tokens = self.counter.count_message(memory_message)
+            recent_tokens = self.counter.count_messages(recent)
+
+        logger.info(
+            "history: %d messages -> summary of %d folded (%d tokens) + %d verbatim (%d tokens)",
+            len(history), memory.folded_messages, memory_tokens, len(recent), recent_tokens
+        )
+        return memory_message, recent
@@ -0,0 +1,560 @@
+"""Multi-domain knowledge base for the Databricks FinOps Advisor
+Separate vector stores for Migration, Architecture, and Costing documentation"""
+
+
+import streamlit as st
+import os
+import json
+import time
+from typing import List, Dict, Optional
+import numpy as np
+import requests
+from bs4 import BeautifulSoup
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from context_packer import prepare_chunks, format_chunk
+
+# ============================================================================
+# CONFIGURATION - SEPARATED DOCUMENTATION URLS BY DOMAIN
+# ============================================================================
+
+MIGRATION_URLS = [
+	"https://www.databricks.com/blog/migrating-redshift-databricks-field-guide-data-teams#:~:text=and%20cost%20visibility.-,Pre%2Dmigration%20steps,with%20your%20goals%20and%20timelines.",
+	"https://www.databricks.com/blog/navigating-your-migration-databricks-architectures-and-strategic-approaches",
+	"https://www.databricks.com/blog/databricks-migration-strategy-lessons-learned",
+	"https://www.databricks.com/blog/how-databricks-simplifies-data-warehouse-migrations-proven-strategies-and-tools",
+	"https://www.databricks.com/blog/2022/06/24/data-warehousing-modeling-techniques-and-their-implementation-on-the-databricks-lakehouse-platform.html",
+	"https://www.databricks.com/blog/how-migrate-your-oracle-plsql-code-databricks-lakehouse-platform",
+	"https://www.databricks.com/blog/navigating-oracle-databricks-migration-tips-seamless-transition",
+	"https://www.databricks.com/sites/default/files/2025-05/databricks-migration-guide-oracle-fa.pdf",
+	"https://www.databricks.com/sites/default/files/2025-05/databricks-migration-guide-microsoft-sql-fa.pdf",
+	"https://www.databricks.com/blog/navigating-your-netezza-databricks-migration-tips-seamless-transition",
+	"https://www.databricks.com/blog/best-practices-and-guidance-cloud-engineers-deploy-databricks-aws-part-3",
+	"https://www.databricks.com/blog/introducing-lakebridge-free-open-data-migration-databricks-sql",
+	"https://www.databricks.com/blog/warehouse-lakehouse-migration-approaches-databricks",
+	"https://www.devoteam.com/expert-view/data-warehouse-migration-to-databricks-a-comprehensive-guide/",
+	"https://closeloop.com/blog/how-to-migrate-to-databricks-best-practices/",
+	"https://www.datafold.com/resources/hadoop-to-databricks-migration",
+	"https://kanerika.com/blogs/legacy-systems-to-databricks-migration/",
+	"https://www.msrcosmos.com/blog/databricks-data-migration-steps-and-benefits/",
+	"https://www.striim.com/blog/oracle-data-databricks-unity-catalog-python-and-databricks-notebook-recipe/",
+	"https://www.sparity.com/blogs/snowflake-to-databricks-migration/",
+	"https://blog.aidetic.in/migrating-from-bigquery-to-databricks-a-step-by-step-practical-guide-c7d8e18efaf3"
+]
+
+ARCHITECTURE_URLS = [
+	"https://www.databricks.com/blog/navigating-your-migration-databricks-architectures-and-strategic-approaches",
+	"https://www.databricks.com/blog/2023/03/30/security-best-practices-databricks-lakehouse-platform.html",
+	"https://www.databricks.com/blog/2023/03/30/security-best-practices-databricks-lakehouse-platform.html",
+	"https://www.databricks.com/blog/best-practices-and-guidance-cloud-engineers-deploy-databricks-aws-part-2",
+	"https://www.databricks.com/blog/best-practices-and-guidance-cloud-engineers-deploy-databricks-aws-part-3",
+	"https://www.databricks.com/blog/data-architecture-pattern-maximize-value-lakehouse.html",
+	"https://docs.databricks.com/aws/en/getting-started/high-level-architecture#classic-workspace-architecture",
+	"https://learn.microsoft.com/en-us/azure/well-architected/service-guides/azure-databricks",
+	"https://docs.databricks.com/en/getting-started/overview.html",
+	"https://docs.databricks.com/en/lakehouse-architecture/index.html",
+	"https://docs.gcp.databricks.com/lakehouse-architecture/index.html",
+	"https://learn.microsoft.com/en-us/azure/databricks/getting-started/overview",
+	"https://www.bluetab.net/en/databricks-on-aws-an-architectural-perspective-part-1/",
+	"https://www.databricks.com/trust/architecture",
+	"https://docs.databricks.com/en/security/index.html",
+	"https://www.databricks.com/blog/2020/05/04/azure-databricks-security-best-practices.html",
+	"https://docs.databricks.com/en/lakehouse-architecture/security-compliance-and-privacy/index.html",
+	"https://medium.com/@accentfuture/databricks-architecture-overview-components-workflow-ee00c965a445",
+	"https://www.databricks.com/resources/architectures/data-ingestion-reference-architecture",
+	"https://gem-corp.tech/tech-blogs/databricks-architecture/",
+	"https://www.databricks.com/resources/architectures/reference-architecture-for-security-lakehouse",
+	"https://docs.databricks.com/aws/en/compute/choose-compute",
+	"https://sanjeebiitg.medium.com/databricks-part-04-understanding-databrick-compute-19d8d81a03e9",
+	"https://docs.databricks.com/aws/en/compute/cluster-config-best-practices",
+	"https://learn.microsoft.com/en-us/azure/databricks/compute/choose-compute",
+	"https://www.unraveldata.com/resources/databricks-serverless-vs-classic-compute/",
+	"https://blog.devgenius.io/databricks-compute-selection-6d921a08ead8",
+	"https://www.sunnydata.ai/blog/7rbdn3spyh9pjjwty3ca7303xkqeq1",
+	"https://docs.databricks.com/aws/en/compute/standard-limitations",
+	"https://www.cloudformations.org/post/navigating-databricks-compute-options-for-cost-effective-and-high-performance-solutions",
+	"https://medium.com/@krthiak/choosing-cluster-configuration-in-databricks-day-81-of-100-days-of-data-engineering-ai-and-azure-322cda50fc97",
+	"https://learn.microsoft.com/en-us/training/wwl-databricks/select-and-configure-compute/2-choose-appropriate-compute-type"
+]
+
+COSTING_URLS = [
+    "https://azure.microsoft.com/en-us/pricing/details/databricks/#instance-type-support",
+	"https://prices.azure.com/api/retail/prices?api-version=2021-10-01-preview",
+    "https://docs.databricks.com/en/administration-guide/account-settings-e2/pricing.html",
+    "https://docs.databricks.com/en/compute/configure.html",  # DBU consumption
+    "https://docs.databricks.com/en/optimizations/cost-optimization.html",
+    # Add more costing-related URLs
+]
+
+# Keywords to identify which knowledge base to use
+MIGRATION_KEYWORDS = [
+    "migrate", "migration", "move", "transfer", "from", "current platform",
+    "legacy", "modernize", "onboard", "transition", "switch"
+]
+
+ARCHITECTURE_KEYWORDS = [
+    "optimize", "optimization", "performance", "speed", "faster", "improve",
+    "efficiency", "tuning", "autoscaling", "photon", "best practice", "architecture", "compute"
+]
+
+COSTING_KEYWORDS = [
+    "cost", "price", "pricing", "expensive", "budget", "spend", "billing",
+    "dbu", "tier", "savings", "reduce cost", "estimate", "fee"
+]
+
+# ============================================================================
+# VECTOR INDEX CONFIGURATION
+# ============================================================================
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# HNSW settings per domain (space: cosine | l2 | ip)
+# Raise search_ef for recall, M/construction_ef for recall on larger corpora
+DEFAULT_INDEX_PARAMS = {"space": "cosine", "M": 16, "construction_ef": 100, "search_ef": 50}
+
+INDEX_PARAMS = {
+    "migration": dict(DEFAULT_INDEX_PARAMS),
+    "architecture": dict(DEFAULT_INDEX_PARAMS),
+    "costing": dict(DEFAULT_INDEX_PARAMS),
+}
+
+# Build record written next to each persisted collection
+INDEX_PARAMS_FILE = "index_params.json"
+
+# Coarse-to-fine retrieval: one summary vector per source URL,
+# chunks are searched only within the best matching sources
+SOURCE_COLLECTION_SUFFIX = "_sources"
+COARSE_TOP_SOURCES = 3
+
+
+def hnsw_metadata(params: Dict) -> Dict:
+    """Translate index parameters into Chroma collection metadata"""
+    return {
+        "hnsw:space": params["space"],
+        "hnsw:M": params["M"],
+        "hnsw:construction_ef": params["construction_ef"],
+        "hnsw:search_ef": params["search_ef"],
+    }
+
+
+def read_index_params(persist_path: str) -> Optional[Dict]:
+    """Read the index parameters recorded when a collection was built"""
+    record_path = os.path.join(persist_path, INDEX_PARAMS_FILE)
+    if not os.path.exists(record_path):
+        return None
+    with open(record_path) as f:
+        return json.load(f)
+
+# ============================================================================
+# RAG SYSTEM CLASS
+# ============================================================================
+
+class DatabricksKnowledgeBase:
+    """
+    RAG system with separate knowledge bases for different domains
+    """
+    
+    def __init__(self, base_directory: str = "./knowledge_bases", embeddings=None,
+                 index_params: Optional[Dict[str, Dict]] = None):
+        self.base_directory = base_directory
+        self.embeddings = embeddings
+        self.index_params = index_params or INDEX_PARAMS
+        
+        # Separate vector stores for each domain
+        self.migration_vectorstore = None
+        self.architecture_vectorstore = None
+        self.costing_vectorstore = None
+        
+        # Per-source summary stores for coarse retrieval, keyed by domain
+        self.source_vectorstores = {}
+        
+        # Track initialization status
+        self.initialized = False
+    
+    def _get_embeddings(self):
+        """Get or create embeddings model (cached)"""
+        if self.embeddings is not None:
+            return self.embeddings
+        if 'embeddings' not in st.session_state:
+            st.session_state.embeddings = HuggingFaceEmbeddings(
+                model_name=EMBEDDING_MODEL,
+                model_kwargs={'device': 'cpu'}
+            )
+        return st.session_state.embeddings
+    
+    def initialize(self):
+        """Initialize all knowledge bases"""
+        self.embeddings = self._get_embeddings()
+        
+        # Define paths for each knowledge base
+        migration_path = os.path.join(self.base_directory, "migration")
+        architecture_path = os.path.join(self.base_directory, "architecture")
+        costing_path = os.path.join(self.base_directory, "costing")
+        
+        # Check if all knowledge bases exist
+        all_exist = (
+            os.path.exists(migration_path) and
+            os.path.exists(architecture_path) and
+            os.path.exists(costing_path)
+        )
+        
+        if not all_exist:
+            return False  # Need to build
+        
+        # Load existing vector stores
+        try:
+            self.migration_vectorstore = self._load_vectorstore("migration", migration_path)
+            
+            self.architecture_vectorstore = self._load_vectorstore("architecture", architecture_path)
+            
+            self.costing_vectorstore = self._load_vectorstore("costing", costing_path)
+            
+            for domain, path in [("migration", migration_path),
+                                 ("architecture", architecture_path),
+                                 ("costing", costing_path)]:
+                self.source_vectorstores[domain] = self._load_source_vectorstore(domain, path)
+            
+            self.initialized = True
+            return True
+            
+        except Exception as e:
+            print(f"Error loading knowledge bases: {e}")
+            return False
+    
+    def _load_vectorstore(self, domain: str, persist_path: str) -> Chroma:
+        """Load a persisted domain collection and check its recorded index parameters"""
+        params = self.index_params[domain]
+        recorded = read_index_params(persist_path)
+        
+        if recorded and recorded.get("index_params") != params:
+            print(
+                f"Index parameters for {domain} changed since build "
+                f"({recorded.get('index_params')} -> {params}); rebuild to apply them"
+            )
+        
+        return Chroma(
+            persist_directory=persist_path,
+            embedding_function=self.embeddings,
+            collection_name=domain,
+            collection_metadata=hnsw_metadata(params)
+        )
+    
+    def _load_source_vectorstore(self, domain: str, persist_path: str) -> Optional[Chroma]:
+        """Load the per-source summary store of a domain (None for indexes built without one)"""
+        recorded = read_index_params(persist_path)
+        if not recorded or not recorded.get("sources"):
+            return None
+        
+        return Chroma(
+            persist_directory=persist_path,
+            embedding_function=self.embeddings,
+            collection_name=domain + SOURCE_COLLECTION_SUFFIX,
+            collection_metadata=hnsw_metadata(self.index_params[domain])
+        )
+    
+    def fetch_webpage(self, url: str) -> str:
+        """Fetch and clean webpage content"""
+        try:
+            response = requests.get(url, timeout=15, headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            })
+            response.raise_for_status()
+            
+            soup = BeautifulSoup(response.content, 'html.parser')
+            
+            # Remove unwanted elements
+            for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
+                element.decompose()
+            
+            # Get text
+            text = soup.get_text(separator='\n', strip=True)
+            
+            # Clean whitespace
+            lines = (line.strip() for line in text.splitlines())
+            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+            text = '\n'.join(chunk for chunk in chunks if chunk)
+            
+            return text
+        except Exception as e:
+            print(f"Error fetching {url}: {str(e)}")
+            return ""
+    
+    def _build_single_kb(self, urls: List[str], domain: str, persist_path: str, 
+                         status_text=None) -> tuple:
+        """Build a single knowledge base for a specific domain"""
+        documents = []
+        
+        for idx, url in enumerate(urls):
+            if status_text:
+                status_text.text(f"Loading {domain} documentation: {idx+1}/{len(urls)}")
+            
+            content = self.fetch_webpage(url)
+            
+            if content:
+                doc = Document(
+                    page_content=content,
+                    metadata={"source": url, "domain": domain}
+                )
+                documents.append(doc)
+        
+        chunk_count = self.index_documents(documents, domain, persist_path, status_text)
+        
+        return chunk_count, len(documents)
+    
+    def index_documents(self, documents: List[Document], domain: str, persist_path: str,
+                        status_text=None) -> int:
+        """Split documents into chunks and persist them as a domain vector store"""
+        if status_text:
+            status_text.text(f"Processing {domain} documentation...")
+        
+        # Split into chunks
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=300,
+            chunk_overlap=50,
+            length_function=len,
+            add_start_index=True
+        )
+        
+        splits = text_splitter.split_documents(documents)
+        
+        if status_text:
+            status_text.text(f"Indexing {domain} content ({len(splits)} chunks)...")
+        
+        # Create vector store with the domain's HNSW settings
+        params = self.index_params[domain]
+        vectorstore = Chroma.from_documents(
+            documents=splits,
+            embedding=self.embeddings,
+            persist_directory=persist_path,
+            collection_name=domain,
+            collection_metadata=hnsw_metadata(params)
+        )
+        
+        vectorstore.persist()
+        
+        source_count = self._index_sources(vectorstore, domain, persist_path)
+        
+        # Record how the index was built
+        with open(os.path.join(persist_path, INDEX_PARAMS_FILE), "w") as f:
+            json.dump({
+                "domain": domain,
+                "index_params": params,
+                "embedding_model": getattr(self.embeddings, "model_name", EMBEDDING_MODEL),
+                "chunks": len(splits),
+                "documents": len(documents),
+                "sources": source_count,
+                "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+            }, f, indent=2)
+        
+        return len(splits)
+    
+    def _index_sources(self, vectorstore: Chroma, domain: str, persist_path: str) -> int:
+        """Store one summary vector per source URL: the normalized centroid of its chunk embeddings"""
+        stored = vectorstore.get(include=["embeddings", "metadatas"])
+        
+        chunk_vectors = {}
+        for embedding, metadata in zip(stored["embeddings"], stored["metadatas"]):
+            chunk_vectors.setdefault(metadata.get("source", "Unknown"), []).append(embedding)
+        
+        if not chunk_vectors:
+            return 0
+        
+        sources = list(chunk_vectors)
+        summaries = []
+        for source in sources:
+            centroid = np.mean(np.asarray(chunk_vectors[source], dtype=np.float32), axis=0)
+            norm = np.linalg.norm(centroid)
+            summaries.append((centroid / norm if norm else centroid).tolist())
+        
+        source_store = Chroma(
+            persist_directory=persist_path,
+            embedding_function=self.embeddings,
+            collection_name=domain + SOURCE_COLLECTION_SUFFIX,
+            collection_metadata=hnsw_metadata(self.index_params[domain])
+        )
+        source_store._collection.add(
+            ids=[f"{domain}-source-{i}" for i in range(len(sources))],
+            embeddings=summaries,
+            documents=sources,
+            metadatas=[{"source": source, "domain": domain} for source in sources]
+        )
+        source_store.persist()
+        
+        return len(sources)
+    
+    def build_all_knowledge_bases(self):
+        """Build all three knowledge bases"""
+        os.makedirs(self.base_directory, exist_ok=True)
+        
+        migration_path = os.path.join(self.base_directory, "migration")
+        architecture_path = os.path.join(self.base_directory, "architecture")
+        costing_path = os.path.join(self.base_directory, "costing")
+        
+        status_text = st.empty()
+        progress_bar = st.progress(0)
+        
+        # Build Migration KB
+        status_text.text("Building Migration knowledge base...")
+        m_chunks, m_docs = self._build_single_kb(
+            MIGRATION_URLS, "migration", migration_path, status_text
+        )
+        progress_bar.progress(0.33)
+        
+        # Build architeture KB
+        status_text.text("Building Architecture knowledge base...")
+        o_chunks, o_docs = self._build_single_kb(
+            ARCHITECTURE_URLS, "architecture", architecture_path, status_text
+        )
+        progress_bar.progress(0.66)
+        
+        # Build Costing KB
+        status_text.text("Building Costing knowledge base...")
+        c_chunks, c_docs = self._build_single_kb(
+            COSTING_URLS, "costing", costing_path, status_text
+        )
+        progress_bar.progress(1.0)
+        
+        # Clean up
+        status_text.empty()
+        progress_bar.empty()
+        
+        # Load the created vector stores
+        self.initialize()
+        
+        return {
+            "migration": {"chunks": m_chunks, "docs": m_docs},
+            "architecture": {"chunks": o_chunks, "docs": o_docs},
+            "costing": {"chunks": c_chunks, "docs": c_docs}
+        }
+    
+    def _detect_domain(self, query: str) -> str:
+        """
+        Detect which domain the query belongs to
+        Returns: 'migration', 'architecture', 'costing', or 'all'
+        """
+        query_lower = query.lower()
+        
+        # Count keyword matches for each domain
+        migration_score = sum(1 for kw in MIGRATION_KEYWORDS if kw in query_lower)
+        architecture_score = sum(1 for kw in ARCHITECTURE_KEYWORDS if kw in query_lower)
+        costing_score = sum(1 for kw in COSTING_KEYWORDS if kw in query_lower)
+        
+        # If multiple domains match, return 'all'
+        matches = []
+        if migration_score > 0:
+            matches.append(('migration', migration_score))
+        if architecture_score > 0:
+            matches.append(('architecture', architecture_score))
+        if costing_score > 0:
+            matches.append(('costing', costing_score))
+        
+        if len(matches) == 0:
+            # No specific keywords, search all
+            return 'all'
+        elif len(matches) == 1:
+            return matches[0][0]
+        else:
+            # Return domain with highest score
+            return max(matches, key=lambda x: x[1])[0]
+    
+    def get_relevant_documents(self, query: str, k: int = 3, domain: Optional[str] = None) -> List[Document]:
+        """
+        Retrieve relevant chunks for a query
+        
+        Args:
+            query: User query
+            k: Number of chunks to retrieve per domain
+            domain: Specific domain to search ('migration', 'architecture', 'costing', or None for auto-detect)
+        
+        Returns:
+            Retrieved documents in rank order
+        """
+        if not self.initialized:
+            return []
+        
+        # Auto-detect domain if not specified
+        if domain is None:
+            domain = self._detect_domain(query)
+        
+        results = []
+        
+        try:
+            # Embed the query once and reuse the vector for every search
+            query_vector = self.embeddings.embed_query(query)
+            
+            # Search based on detected/specified domain
+            if domain in ('migration', 'architecture', 'costing'):
+                results = self._search_domain(domain, query_vector, k)
+            
+            elif domain == 'all':
+                # Search all domains (fewer results per domain)
+                per_domain_k = max(1, k // 3)
+                
+                for search_domain in ('migration', 'architecture', 'costing'):
+                    results.extend(self._search_domain(search_domain, query_vector, per_domain_k))
+            
+            return results
+        
+        except Exception as e:
+            print(f"Error retrieving context: {str(e)}")
+            return []
+    
+    def _search_domain(self, domain: str, query_vector: List[float], k: int) -> List[Document]:
+        """
+        Coarse-to-fine search of one domain: pick the best matching sources
+        from the summary store, then search chunks only within them
+        """
+        chunk_store = {
+            'migration': self.migration_vectorstore,
+            'architecture': self.architecture_vectorstore,
+            'costing': self.costing_vectorstore
+        }[domain]
+        
+        if not chunk_store:
+            return []
+        
+        source_store = self.source_vectorstores.get(domain)
+        if source_store is None:
+            return chunk_store.similarity_search_by_vector(query_vector, k=k)
+        
+        top_sources = [
+            doc.metadata["source"]
+            for doc in source_store.similarity_search_by_vector(query_vector, k=COARSE_TOP_SOURCES)
+        ]
+        if not top_sources:
+            return chunk_store.similarity_search_by_vector(query_vector, k=k)
+        
+        source_filter = (
+            {"source": top_sources[0]} if len(top_sources) == 1
+            else {"source": {"$in": top_sources}}
+        )
+        results = chunk_store.similarity_search_by_vector(query_vector, k=k, filter=source_filter)
+        
+        # Fall back to a full search when the selected sources hold too few chunks
+        if len(results) < k:
+            results = chunk_store.similarity_search_by_vector(query_vector, k=k)
+        
+        return results
+    
+    def get_relevant_context(self, query: str, k: int = 3, domain: Optional[str] = None) -> str:
+        """
+        Retrieve relevant context for a query
+        
+        Args:
+            query: User query
+            k: Number of chunks to retrieve per domain
+            domain: Specific domain to search ('migration', 'architecture', 'costing', or None for auto-detect)
+        
+        Returns:
+            Formatted context string
+        """
+        chunks = prepare_chunks(self.get_relevant_documents(query, k=k, domain=domain))
+        
+        # Format results
+        return "\n\n---\n\n".join(
+            format_chunk(chunk, i) for i, chunk in enumerate(chunks, 1)
+        )
@@ -0,0 +1,270 @@
+"""LLM backends for the FinOps Advisor
+Chat completion transports behind LLMClient: the Groq SDK and any
+OpenAI-compatible endpoint (vLLM, Ollama, llama.cpp, the local mock server
+in benchmarks/mock_llm_server.py). Backends raise BackendError so retries
+and user messages do not depend on a particular SDK"""
+
+import email.utils
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BACKEND_GROQ = "groq"
+BACKEND_OPENAI = "openai"
+
+# FINOPS_LLM_BACKEND=openai with FINOPS_LLM_BASE_URL=http://host:port/v1 points
+# both apps at an OpenAI-compatible server; FINOPS_LLM_MODEL overrides the
+# routed model name for servers that host a single model
+LLM_BACKEND = os.getenv("FINOPS_LLM_BACKEND", BACKEND_GROQ)
+LLM_BASE_URL = os.getenv("FINOPS_LLM_BASE_URL", "http://127.0.0.1:8765/v1")
+LLM_API_KEY = os.getenv("FINOPS_LLM_API_KEY")
+LLM_MODEL = os.getenv("FINOPS_LLM_MODEL")
+
+CONNECT_TIMEOUT_S = 5.0
+READ_TIMEOUT_S = 60.0
+WRITE_TIMEOUT_S = 10.0
+POOL_TIMEOUT_S = 5.0
+
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+
+# ============================================================================
+# ERRORS
+# ============================================================================
+
+class BackendError(Exception):
+    """
+    A failed backend request
+
+    status_code is None for connection failures and timeouts
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, timeout: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.timeout = timeout
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a retry-after header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Unparseable header: fall back to the client's own backoff
+        return None
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+def _http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(connect=CONNECT_TIMEOUT_S, read=READ_TIMEOUT_S, write=WRITE_TIMEOUT_S, pool=POOL_TIMEOUT_S)
+
+
+def _http_client(**kwargs) -> httpx.Client:
+    """Pooled HTTP client shared by all requests of a backend"""
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS),
+        **kwargs
+    )
+
+
+class LLMBackend(ABC):
+    """Sends one chat completion request; streaming requests return an iterator of chunks"""
+
+    name = "backend"
+
+    @abstractmethod
+    def create(self, **kwargs) -> Any:
+        """Send a chat completion request (stream=True returns an iterator of chunks)"""
+
+    def close(self):
+        pass
+
+
+class GroqBackend(LLMBackend):
+    """Groq cloud through the official SDK"""
+
+    name = BACKEND_GROQ
+
+    def __init__(self, api_key: str):
+        from groq import Groq
+
+        self.http_client = _http_client()
+        self.client = Groq(
+            api_key=api_key,
+            timeout=_http_timeout(),
+            max_retries=0,  # retries are handled by LLMClient
+            http_client=self.http_client
+        )
+
+    @staticmethod
+    def _translate(error: Exception) -> Exception:
+        import groq
+
+        if isinstance(error, groq.APIStatusError):
+            return BackendError(
+                str(error), status_code=error.status_code,
+                retry_after=parse_retry_after(error.response.headers.get("retry-after"))
+            )
+        if isinstance(error, groq.APITimeoutError):
+            return BackendError(str(error), timeout=True)
+        if isinstance(error, groq.APIConnectionError):
+            return BackendError(str(error))
+        return error
+
+    def _stream(self, stream: Iterator[Any]) -> Iterator[Any]:
+        try:
+            yield from stream
+        except Exception as e:
+            raise self._translate(e) from e
+
+    def create(self, **kwargs) -> Any:
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+        except Exception as e:
+            raise self._translate(e) from e
+        return self._stream(response) if kwargs.get("stream") else response
+
+    def close(self):
+        self.http_client.close()
+
+
+def _namespace(value: Any) -> Any:
+    """JSON objects as attribute objects, shaped like SDK responses"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_namespace(v) for v in value]
+    return value
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server implementing POST {base_url}/chat/completions with SSE streaming"""
+
+    name = BACKEND_OPENAI
+
+    def __init__(self, base_url: str = LLM_BASE_URL, api_key: Optional[str] = LLM_API_KEY,
+                 model: Optional[str] = LLM_MODEL):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.model = model
+        self.http_client = _http_client(base_url=base_url.rstrip("/") + "/", headers=headers, timeout=_http_timeout())
+
+    @staticmethod
+    def _check(response: httpx.Response):
+        if response.status_code >= 400:
+            response.read()
+            raise BackendError(
+                f"HTTP {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+                retry_after=parse_retry_after(response.headers.get("retry-after"))
+            )
+
+    def _stream(self, response: httpx.Response) -> Iterator[Any]:
+        try:
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = _namespace(json.loads(data))
+                # Role-only and final deltas may omit content
+                for choice in getattr(chunk, "choices", None) or []:
+                    if not hasattr(choice, "delta"):
+                        choice.delta = SimpleNamespace()
+                    if not hasattr(choice.delta, "content"):
+                        choice.delta.content = None
+                yield chunk
+        except httpx.TimeoutException as e:
+            raise BackendError(str(e), timeout=True) from e
+        except httpx.TransportError as e:
+            raise BackendError(str(e)) from e
+        finally:
+            response.close()
+
+    def create(self, **kwargs) -> Any:
+        payload: Dict[str, Any] = dict(kwargs)
+        if self.model:
+            payload["model"] = self.model
+        if payload.get("stream"):
+            payload["stream_options"] = {"include_usage": True}
+
+        try:
+            request = self.http_client.build_request("POST", "chat/completions", json=payload)
+            response = self.http_client.send(request, stream=bool(payload.get("stream")))
+        except httpx.TimeoutException as e:
+            raise BackendError(str(e), timeout=True) from e
+        except httpx.TransportError as e:
+            raise BackendError(str(e)) from e
+
+        self._check(response)
+        if payload.get("stream"):
+            return self._stream(response)
+        return _namespace(response.json())
+
+    def close(self):
+        self.http_client.close()
+
+
+class ConcurrencyLimitedBackend(LLMBackend):
+    """
+    Wraps a backend so at most N requests are in flight
+
+    The semaphore may be a multiprocessing one, bounding requests across a
+    process pool. A streaming request holds its slot until the stream is
+    consumed or closed
+    """
+
+    def __init__(self, backend: LLMBackend, semaphore):
+        self.backend = backend
+        self.semaphore = semaphore
+        self.name = backend.name
+
+    def _stream(self, stream: Iterator[Any]) -> Iterator[Any]:
+        try:
+            yield from stream
+        finally:
+            self.semaphore.release()
+
+    def create(self, **kwargs) -> Any:
+        self.semaphore.acquire()
+        try:
+            response = self.backend.create(**kwargs)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        if kwargs.get("stream"):
+            return self._stream(response)
+        self.semaphore.release()
+        return response
+
+    def close(self):
+        self.backend.close()
+
+
+def create_backend(kind: str = LLM_BACKEND, api_key: Optional[str] = None) -> LLMBackend:
+    """Backend selected by FINOPS_LLM_BACKEND ('groq' needs an API key)"""
+    if kind == BACKEND_GROQ:
+        return GroqBackend(api_key)
+    if kind == BACKEND_OPENAI:
+        return OpenAICompatibleBackend(api_key=api_key or LLM_API_KEY)
+    raise ValueError(f"Unknown LLM backend: {kind}")
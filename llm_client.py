@@ -0,0 +1,272 @@
+"""Resilient LLM client for the FinOps Advisor
+Wraps an LLM backend (see llm_backends.py) with jittered retries on 429/5xx
+that honour retry-after, client-side token-bucket rate limiting and a
+response cache shared by all sessions of the process"""
+
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple, Any
+
+from llm_backends import LLMBackend, BackendError
+from model_routing import model_rate_limits
+from response_cache import ResponseCache, cache_key, replay_stream, replay_completion
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 20.0
+
+# Longest a request waits for the client-side rate limiter before failing
+MAX_RATE_LIMIT_WAIT_S = 30.0
+
+# Limits for models missing from models.json: (requests per minute, tokens per minute)
+DEFAULT_RATE_LIMIT = (30, 6000)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# ============================================================================
+# ERRORS
+# ============================================================================
+
+class LLMError(Exception):
+    """A chat request that failed after all retries"""
+
+    def __init__(self, message: str, user_message: str, retryable: bool = False):
+        super().__init__(message)
+        self.user_message = user_message
+        self.retryable = retryable
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class TokenBucket:
+    """Thread-safe request and token buckets for one model, refilled continuously"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_capacity / 60)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_capacity / 60)
+
+    def _wait_time(self, now: float, tokens: float) -> float:
+        """Seconds until one request and the given tokens are available"""
+        wait = max(0.0, self.paused_until - now)
+        if self.requests < 1:
+            wait = max(wait, (1 - self.requests) * 60 / self.request_capacity)
+        if self.tokens < tokens:
+            wait = max(wait, (tokens - self.tokens) * 60 / self.token_capacity)
+        return wait
+
+    def acquire(self, tokens: int, max_wait: float = MAX_RATE_LIMIT_WAIT_S):
+        """
+        Block until the request fits the limits; raise LLMError if that takes
+        too long or the request is larger than a full bucket (the provider
+        would reject it too)
+        """
+        if tokens > self.token_capacity:
+            logger.error("Request of ~%d tokens exceeds the %d tokens-per-minute limit", tokens, self.token_capacity)
+            raise LLMError(
+                f"Request of ~{tokens} tokens exceeds the {self.token_capacity:.0f} tokens-per-minute limit",
+                "This request is too long for the advisor's model. Please shorten the message or start a new assessment."
+            )
+        tokens = float(tokens)
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait == 0:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+            if now + wait > deadline:
+                raise LLMError(
+                    f"Client rate limit: would wait {wait:.1f}s",
+                    "The advisor is busy right now. Please try again in a moment.",
+                    retryable=True
+                )
+            time.sleep(min(wait, 1.0))
+
+    def pause(self, seconds: float):
+        """Hold all requests for this model (after the server returned 429)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+def _is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, BackendError) and error.status_code == 429
+
+
+def _is_retryable(error: Exception) -> bool:
+    if not isinstance(error, BackendError):
+        return False
+    # Connection failures and timeouts have no status code
+    return error.status_code is None or error.status_code in RETRYABLE_STATUS_CODES
+
+
+def _user_message(error: Exception) -> str:
+    if not isinstance(error, BackendError):
+        return "The advisor could not generate a response. Please try again."
+    if error.status_code == 429:
+        return "The advisor is receiving too many requests. Please try again in a minute."
+    if error.timeout:
+        return "The advisor took too long to respond. Please try again."
+    if error.status_code is None:
+        return "Could not reach the language model service. Please check the connection and try again."
+    if error.status_code in (401, 403):
+        return "The language model API key was rejected. Please check the API key."
+    return "The advisor could not generate a response. Please try again."
+
+
+class LLMClient:
+    """
+    LLM client with retries, shared rate limiting and a response cache
+
+    One instance should be shared by all sessions (st.cache_resource) so the
+    token buckets, the backend's connection pool and the response cache are
+    process-wide
+    """
+
+    def __init__(self, backend: LLMBackend, rate_limits: Optional[Dict[str, Tuple[int, int]]] = None,
+                 cache: Optional[ResponseCache] = None, max_rate_limit_wait_s: float = MAX_RATE_LIMIT_WAIT_S):
+        self.backend = backend
+        self.rate_limits = rate_limits or model_rate_limits()
+        self.max_rate_limit_wait_s = max_rate_limit_wait_s
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.buckets_lock = threading.Lock()
+        self.cache = cache
+
+    def _bucket(self, model: str) -> TokenBucket:
+        with self.buckets_lock:
+            if model not in self.buckets:
+                self.buckets[model] = TokenBucket(*self.rate_limits.get(model, DEFAULT_RATE_LIMIT))
+            return self.buckets[model]
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than retry-after"""
+        delay = random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _retry(self, attempt: int, error: Exception, bucket: TokenBucket):
+        """Back off before the next attempt (holding the model's bucket on 429), or raise LLMError on the last one"""
+        if not _is_retryable(error) or attempt == MAX_ATTEMPTS - 1:
+            raise LLMError(str(error), _user_message(error), retryable=_is_retryable(error)) from error
+
+        delay = self._backoff(attempt, error)
+        if _is_rate_limited(error):
+            bucket.pause(delay)
+        logger.warning(
+            "LLM request failed (%s), retry %d/%d in %.1fs",
+            error.__class__.__name__, attempt + 1, MAX_ATTEMPTS - 1, delay
+        )
+        time.sleep(delay)
+
+    def _call(self, estimated_tokens: int, **kwargs) -> Any:
+        """Run a chat completion request with rate limiting and retries"""
+        bucket = self._bucket(kwargs["model"])
+        for attempt in range(MAX_ATTEMPTS):
+            bucket.acquire(estimated_tokens, self.max_rate_limit_wait_s)
+            try:
+                return self.backend.create(**kwargs)
+            except Exception as e:
+                self._retry(attempt, e, bucket)
+
+    def _cache_key(self, cacheable: bool, cache_window: Optional[int], kwargs: Dict) -> Optional[str]:
+        """Cache key for turns marked cacheable and temperature-0 requests, else None"""
+        if self.cache is None or not (cacheable or kwargs.get("temperature") == 0):
+            return None
+        return cache_key(kwargs, cache_window)
+
+    def complete(self, estimated_tokens: int = 0, cacheable: bool = False,
+                 cache_window: Optional[int] = None, **kwargs) -> Any:
+        """Non-streaming chat completion"""
+        key = self._cache_key(cacheable, cache_window, kwargs)
+        if key is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                return replay_completion(text)
+
+        estimated_tokens = estimated_tokens or kwargs.get("max_tokens", 0)
+        response = self._call(estimated_tokens, stream=False, **kwargs)
+
+        if key is not None:
+            self.cache.put(key, response.choices[0].message.content or "")
+        return response
+
+    def stream_chat(self, estimated_tokens: int = 0, cacheable: bool = False,
+                    cache_window: Optional[int] = None, **kwargs) -> Iterator[Any]:
+        """
+        Streaming chat completion
+
+        The request is retried until the first chunk arrives, with one
+        attempt count for sending it and reading that chunk; a failure
+        after streaming has started is raised as LLMError, so a partial
+        answer is never silently returned as complete (or cached)
+
+        Cacheable and temperature-0 requests are answered from the response
+        cache when possible; `cache_window` limits the key to the last
+        messages of the conversation (see response_cache.prompt_window)
+        """
+        key = self._cache_key(cacheable, cache_window, kwargs)
+        if key is not None:
+            text = self.cache.get(key)
+            if text is not None:
+                yield from replay_stream(text)
+                return
+
+        estimated_tokens = estimated_tokens or kwargs.get("max_tokens", 0)
+        bucket = self._bucket(kwargs["model"])
+
+        for attempt in range(MAX_ATTEMPTS):
+            bucket.acquire(estimated_tokens, self.max_rate_limit_wait_s)
+            try:
+                stream = self.backend.create(stream=True, **kwargs)
+                first = next(iter(stream), None)
+                break
+            except Exception as e:
+                self._retry(attempt, e, bucket)
+
+        if first is None:
+            return
+
+        parts = []
+        try:
+            for chunk in itertools.chain([first], stream):
+                if key is not None and chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                yield chunk
+        except Exception as e:
+            raise LLMError(str(e), "The response was interrupted. Please try again.") from e
+        finally:
+            # A consumer that stops early (generator closed) releases the connection now
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        if key is not None:
+            self.cache.put(key, "".join(parts))
@@ -0,0 +1,157 @@
+"""Model routing for the FinOps Advisor
+Picks model, max_tokens and temperature per turn from the conversation
+stage and request type, using the model and route table in models.json"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from conversation_stage import (
+    STAGE_INFO_GATHERING,
+    STAGE_MAPPING_CONFIRMATION,
+    STAGE_RECOMMENDATIONS,
+    STAGE_COSTING,
+)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MODELS_FILE = os.getenv(
+    "FINOPS_MODELS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models.json")
+)
+
+# Request types detected from the latest user message
+REQUEST_ANSWER = "answer"
+REQUEST_QUESTION = "question"
+REQUEST_RECOMMENDATIONS = "recommendations"
+
+QUESTION_PATTERN = re.compile(
+    r"\?|^\s*(what|how|why|which|when|where|can|could|should|does|do|is|are|explain)\b",
+    re.IGNORECASE
+)
+
+RECOMMENDATION_PATTERN = re.compile(
+    r"\b(recommend\w*|give me (the |your )?(results|estimate|plan|report)|"
+    r"that's all|that is all|i'm ready|go ahead|proceed)\b",
+    re.IGNORECASE
+)
+
+# Route per (stage, request type); missing request types fall back to REQUEST_ANSWER
+STAGE_ROUTES = {
+    (STAGE_INFO_GATHERING, REQUEST_ANSWER): "interview",
+    (STAGE_INFO_GATHERING, REQUEST_QUESTION): "interview_question",
+    (STAGE_INFO_GATHERING, REQUEST_RECOMMENDATIONS): "entity_mapping",
+    (STAGE_MAPPING_CONFIRMATION, REQUEST_ANSWER): "entity_mapping",
+    (STAGE_RECOMMENDATIONS, REQUEST_ANSWER): "recommendations",
+    (STAGE_COSTING, REQUEST_ANSWER): "costing",
+}
+
+# Shortest cache window: the advisor's last message plus the user's reply,
+# so "what do you mean?" is never answered from another conversation
+MIN_CACHE_WINDOW = 2
+
+# ============================================================================
+# MODEL CONFIG
+# ============================================================================
+
+@lru_cache(maxsize=None)
+def load_model_config(path: str = MODELS_FILE) -> Dict:
+    """Load the model and route table once per process"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def model_prices(path: str = MODELS_FILE) -> Dict[str, Tuple[float, float]]:
+    """USD per million tokens (input, output) for every configured model"""
+    return {
+        name: (model["input_usd_per_million"], model["output_usd_per_million"])
+        for name, model in load_model_config(path)["models"].items()
+    }
+
+
+def model_rate_limits(path: str = MODELS_FILE) -> Dict[str, Tuple[int, int]]:
+    """(requests per minute, tokens per minute) for every configured model"""
+    return {
+        name: (model["requests_per_minute"], model["tokens_per_minute"])
+        for name, model in load_model_config(path)["models"].items()
+    }
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+
+@dataclass(frozen=True)
+class Route:
+    """Generation settings for one turn"""
+    name: str
+    model: str
+    max_tokens: int
+    temperature: float
+    # Answers may be replayed from the response cache; the key covers the
+    # system messages plus the last `cache_window` messages (None = all)
+    cacheable: bool = False
+    cache_window: Optional[int] = None
+
+
+def detect_request_type(prompt: str) -> str:
+    """Classify the latest user message"""
+    if RECOMMENDATION_PATTERN.search(prompt):
+        return REQUEST_RECOMMENDATIONS
+    if QUESTION_PATTERN.search(prompt):
+        return REQUEST_QUESTION
+    return REQUEST_ANSWER
+
+
+class ModelRouter:
+    """Maps conversation stage and request type to a configured route"""
+
+    def __init__(self, path: str = MODELS_FILE):
+        config = load_model_config(path)
+        self.routes = {
+            name: Route(name=name, **settings)
+            for name, settings in config["routes"].items()
+        }
+        unknown = {r.model for r in self.routes.values()} - set(config["models"])
+        if unknown:
+            raise ValueError(f"Routes reference unknown models: {sorted(unknown)}")
+        short = [r.name for r in self.routes.values()
+                 if r.cacheable and r.cache_window is not None and r.cache_window < MIN_CACHE_WINDOW]
+        if short:
+            raise ValueError(f"Cacheable routes need a cache_window of at least {MIN_CACHE_WINDOW}: {short}")
+
+    def get(self, name: str) -> Route:
+        return self.routes[name]
+
+    def route(self, stage: str, prompt: str) -> Route:
+        """Pick the route for a turn"""
+        request_type = detect_request_type(prompt)
+        name = STAGE_ROUTES.get((stage, request_type)) or STAGE_ROUTES.get((stage, REQUEST_ANSWER), "recommendations")
+        return self.routes[name]
+
+# ============================================================================
+# TOKEN BUDGETS
+# ============================================================================
+
+def prompt_token_budget(route: Route, ceiling: Optional[int] = None,
+                        tokens_per_minute: Optional[int] = None, path: str = MODELS_FILE) -> int:
+    """
+    Prompt tokens one request on a route may use
+
+    The model's tokens per minute minus the route's max_tokens, so prompt
+    plus completion fit a full rate-limit bucket; optionally capped at
+    `ceiling`. Pass tokens_per_minute when the process only gets a share
+    of the model's limit (batch workers)
+    """
+    tokens_per_minute = tokens_per_minute or model_rate_limits(path)[route.model][1]
+    budget = tokens_per_minute - route.max_tokens
+    if budget <= 0:
+        raise ValueError(
+            f"Route {route.name!r}: max_tokens {route.max_tokens} leaves no prompt budget "
+            f"within {tokens_per_minute} tokens per minute of {route.model}"
+        )
+    return min(budget, ceiling) if ceiling else budget
@@ -0,0 +1,186 @@
+"""Local pricing catalog for the FinOps Advisor
+Versioned DBU rates (cloud x region x compute type x tier x Photon) and
+instance DBU/hour from pricing.json, indexed once per process so cost
+lookups are exact dict lookups that work offline"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PRICING_FILE = os.getenv(
+    "FINOPS_PRICING_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "pricing.json")
+)
+
+# Compute types in the catalog
+COMPUTE_JOBS = "jobs"
+COMPUTE_JOBS_SERVERLESS = "jobs_serverless"
+COMPUTE_ALL_PURPOSE = "all_purpose"
+COMPUTE_DLT = "dlt"
+COMPUTE_SQL_CLASSIC = "sql_classic"
+COMPUTE_SQL_PRO = "sql_pro"
+COMPUTE_SQL_SERVERLESS = "sql_serverless"
+
+@lru_cache(maxsize=None)
+def _region_pattern(region: str) -> "re.Pattern":
+    """Whole-name pattern of a region; a name ending in a letter must not be followed by a number"""
+    letters = region.lower().replace("-", "")
+    pattern = r"(?<![a-z0-9])" + r"[\s_-]*".join(map(re.escape, letters)) + r"(?![a-z0-9])"
+    if letters[-1].isalpha():
+        pattern += r"(?![\s_-]*\d)"
+    return re.compile(pattern)
+
+
+CLOUD_ALIASES = {"aws": "AWS", "amazon": "AWS", "azure": "Azure", "microsoft": "Azure", "gcp": "GCP", "google": "GCP"}
+
+RateKey = Tuple[str, str, str, str, bool]  # (cloud, region, compute, tier, photon)
+
+
+class PricingLookupError(KeyError):
+    """No catalog entry for the requested combination"""
+
+
+@dataclass(frozen=True)
+class InstanceType:
+    cloud: str
+    name: str
+    vcpus: int
+    memory_gb: float
+    dbu_per_hour: float
+
+
+def normalize_cloud(value: Optional[str]) -> Optional[str]:
+    """Catalog cloud name for free text ('Amazon Web Services' -> 'AWS'), None if unknown"""
+    text = str(value or "").lower()
+    for alias, cloud in CLOUD_ALIASES.items():
+        if alias in text:
+            return cloud
+    return None
+
+# ============================================================================
+# CATALOG
+# ============================================================================
+
+class PricingCatalog:
+    """
+    Indexed pricing catalog
+
+    Rows are stored as tuple-keyed dicts built once at load time, so every
+    lookup is a single hash lookup; region and tier default per cloud
+    """
+
+    def __init__(self, data: Dict):
+        self.version: str = data["version"]
+        self.effective_date: str = data["effective_date"]
+        self.currency: str = data.get("currency", "USD")
+        self.source: str = data.get("source", "")
+        self.photon_dbu_multiplier: float = data.get("photon_dbu_multiplier", 1.0)
+        self.defaults: Dict[str, Dict[str, str]] = data["defaults"]
+        self.storage_usd_per_tb_month: Dict[str, float] = data["storage_usd_per_tb_month"]
+        self.warehouse_sizes: Dict[str, float] = data["sql_warehouse_dbu_per_hour"]
+
+        columns = data["dbu_rate_columns"]
+        self._rates: Dict[RateKey, float] = {}
+        self._regions: Dict[str, List[str]] = {}
+        for row in data["dbu_rates"]:
+            entry = dict(zip(columns, row))
+            key = (entry["cloud"], entry["region"], entry["compute"], entry["tier"], bool(entry["photon"]))
+            self._rates[key] = float(entry["usd_per_dbu"])
+            regions = self._regions.setdefault(entry["cloud"], [])
+            if entry["region"] not in regions:
+                regions.append(entry["region"])
+
+        columns = data["instance_columns"]
+        self._instances: Dict[Tuple[str, str], InstanceType] = {}
+        for row in data["instances"]:
+            entry = dict(zip(columns, row))
+            instance = InstanceType(
+                entry["cloud"], entry["instance"], entry["vcpus"], entry["memory_gb"], entry["dbu_per_hour"]
+            )
+            self._instances[(instance.cloud, instance.name.lower())] = instance
+
+    def __repr__(self) -> str:
+        return f"PricingCatalog(version={self.version!r}, effective_date={self.effective_date!r}, rates={len(self._rates)})"
+
+    @property
+    def label(self) -> str:
+        """Version string for estimates and disclaimers"""
+        return f"pricing catalog {self.version}, effective {self.effective_date}"
+
+    def regions(self, cloud: str) -> List[str]:
+        return list(self._regions.get(cloud, []))
+
+    def resolve_region(self, cloud: str, location: Optional[str]) -> str:
+        """
+        Catalog region named in free text, else the cloud's default region
+
+        A region matches as a whole name, written with or without spaces and
+        hyphens ("East US", "us east 1"); longer names are tried first, and
+        "East US 2" or "us-east-2" do not match eastus or us-east-1
+        """
+        text = str(location or "").lower()
+        for region in sorted(self._regions.get(cloud, []), key=len, reverse=True):
+            if _region_pattern(region).search(text):
+                return region
+        return self.defaults[cloud]["region"]
+
+    def dbu_rate(self, cloud: str, compute: str, region: Optional[str] = None,
+                 tier: Optional[str] = None, photon: bool = False) -> float:
+        """USD per DBU; region and tier default to the cloud's defaults"""
+        defaults = self.defaults.get(cloud)
+        if defaults is None:
+            raise PricingLookupError(f"Unknown cloud: {cloud}")
+        key = (cloud, region or defaults["region"], compute, tier or defaults["tier"], photon)
+        rate = self._rates.get(key)
+        if rate is None and compute.startswith("sql") and not photon:
+            # SQL warehouses always run Photon; the catalog lists them with photon=true
+            rate = self._rates.get(key[:4] + (True,))
+        if rate is None:
+            raise PricingLookupError(f"No DBU rate for {key}")
+        return rate
+
+    def instances(self, cloud: str) -> List[InstanceType]:
+        """Instance types listed for a cloud, in catalog order"""
+        return [instance for (instance_cloud, _), instance in self._instances.items() if instance_cloud == cloud]
+
+    def instance(self, cloud: str, name: str) -> InstanceType:
+        try:
+            return self._instances[(cloud, name.lower())]
+        except KeyError:
+            raise PricingLookupError(f"Unknown instance type for {cloud}: {name}") from None
+
+    def instance_dbu_per_hour(self, cloud: str, name: str, photon: bool = False) -> float:
+        """DBU/hour of one node, with Photon's higher consumption applied"""
+        dbu = self.instance(cloud, name).dbu_per_hour
+        return dbu * self.photon_dbu_multiplier if photon else dbu
+
+    def warehouse_dbu_per_hour(self, size: str) -> float:
+        try:
+            return self.warehouse_sizes[size]
+        except KeyError:
+            raise PricingLookupError(f"Unknown SQL warehouse size: {size}") from None
+
+    def storage_rate(self, cloud: str) -> float:
+        """USD per TB-month of object storage"""
+        return self.storage_usd_per_tb_month[cloud]
+
+
+@lru_cache(maxsize=None)
+def load_pricing_catalog(path: str = PRICING_FILE) -> PricingCatalog:
+    """Load and index the pricing catalog once per process"""
+    with open(path) as f:
+        return PricingCatalog(json.load(f))
+
+
+if __name__ == "__main__":
+    catalog = load_pricing_catalog()
+    print(catalog, "-", catalog.source)
+    for cloud in catalog.defaults:
+        print(f"{cloud}: {', '.join(catalog.regions(cloud))}")
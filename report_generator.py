@@ -0,0 +1,292 @@
+"""Sectioned report generation for the FinOps Advisor
+After the entity mapping is confirmed, the final report (migration plan,
+architecture A-H, cost A-E) is generated as independent sections that run
+concurrently, each with the shared mapping and its own retrieved context,
+and are streamed back in report order"""
+
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from cluster_sizing import ClusterSizing
+from context_packer import ContextPacker, prepare_chunks
+from cost_engine import CostEstimate
+from conversation_stage import STAGE_RECOMMENDATIONS, is_confirmation
+from history_manager import extract_entity_mapping
+from llm_client import LLMClient, LLMError
+from model_routing import Route, REQUEST_RECOMMENDATIONS, detect_request_type
+from prompts import (
+    MIGRATION_PLAN_PROMPT,
+    ARCHITECTURE_PROMPT,
+    COSTING_PROMPT,
+    subsections,
+    build_report_section_prompt,
+    build_cost_engine_prompt,
+    build_cluster_sizing_prompt,
+)
+from telemetry import chunk_usage
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Sections generated at the same time (the client's rate limiter still applies)
+REPORT_CONCURRENCY = 4
+REPORT_RETRIEVAL_K = 3
+
+REPORT_REQUEST = "Write this part of the report now."
+
+
+@dataclass(frozen=True)
+class ReportSection:
+    """One independently generated part of the final report"""
+    key: str
+    title: str
+    instructions: str
+    query: str
+    domain: str
+    cost_table: bool = False    # starts with the cost engine's table
+    sizing_table: bool = False  # starts with the sizing solver's table
+
+
+REPORT_SECTIONS = [
+    ReportSection(
+        "migration_plan", "Migration Plan", MIGRATION_PLAN_PROMPT,
+        "migration plan phases assessment data migration workload migration testing cutover",
+        "migration"
+    ),
+    ReportSection(
+        "architecture_compute", "Architecture: Workspace & Compute", subsections(ARCHITECTURE_PROMPT, "AB"),
+        "workspace organization job clusters autoscaling cluster policies photon SQL warehouse sizing",
+        "architecture", sizing_table=True
+    ),
+    ReportSection(
+        "architecture_data", "Architecture: Storage & Governance", subsections(ARCHITECTURE_PROMPT, "CD"),
+        "delta lake medallion partitioning z-order unity catalog access control governance",
+        "architecture"
+    ),
+    ReportSection(
+        "architecture_platform", "Architecture: Networking, Integration & Operations",
+        subsections(ARCHITECTURE_PROMPT, "EFGH"),
+        "private link networking BI tool integration system tables monitoring best practices",
+        "architecture"
+    ),
+    ReportSection(
+        "cost_estimate", "Cost Estimate", subsections(COSTING_PROMPT, "ABD"),
+        "DBU pricing jobs compute SQL warehouse serverless price per DBU storage costs",
+        "costing", cost_table=True
+    ),
+    ReportSection(
+        "cost_optimization", "Cost Optimization & Assumptions", subsections(COSTING_PROMPT, "CE"),
+        "cost optimization spot instances auto termination cluster policies budgets system tables billing",
+        "costing"
+    ),
+]
+
+
+def sizing_tables(sizing: Optional[ClusterSizing], cost_estimate: Optional[CostEstimate]) -> str:
+    """Job cluster sizing and warehouse simulation tables, whichever are available"""
+    tables = [sizing.to_markdown()] if sizing is not None else []
+    if cost_estimate is not None and cost_estimate.warehouse is not None:
+        tables.append(cost_estimate.warehouse.to_markdown())
+    return "\n\n".join(tables)
+
+# ============================================================================
+# REPORT TRIGGER
+# ============================================================================
+
+def latest_entity_mapping(messages: List[Dict[str, str]]) -> Optional[str]:
+    """The most recent entity mapping JSON produced by the advisor"""
+    for msg in reversed(messages):
+        if msg["role"] == "assistant":
+            mapping = extract_entity_mapping(msg["content"])
+            if mapping:
+                return mapping
+    return None
+
+
+def is_report_turn(messages: List[Dict[str, str]], stage: str) -> bool:
+    """
+    Whether this turn should produce the full report
+
+    True when the user just confirmed the entity mapping (first confirmation
+    after it) or explicitly asks for the recommendations again
+    """
+    if stage != STAGE_RECOMMENDATIONS:
+        return False
+    chat = [m for m in messages if m["role"] != "system"]
+    if not chat or chat[-1]["role"] != "user":
+        return False
+    if detect_request_type(chat[-1]["content"]) == REQUEST_RECOMMENDATIONS:
+        return True
+
+    mapping_index = max(
+        (i for i, m in enumerate(chat) if m["role"] == "assistant" and extract_entity_mapping(m["content"])),
+        default=None
+    )
+    if mapping_index is None:
+        return False
+    confirmations = [
+        i for i in range(mapping_index + 1, len(chat))
+        if chat[i]["role"] == "user" and is_confirmation(chat[i]["content"])
+    ]
+    return confirmations[:1] == [len(chat) - 1]
+
+
+def _mapping_terms(mapping: str) -> str:
+    """Cloud and platform names from the mapping, to focus each section's retrieval"""
+    try:
+        data = json.loads(mapping)
+    except ValueError:
+        return ""
+    platform = data.get("current_platform") or {}
+    values = [data.get("cloud_provider")] + (list(platform.values()) if isinstance(platform, dict) else [])
+    return " ".join(v for v in values if isinstance(v, str) and not v.startswith("<"))
+
+
+def section_query(section: ReportSection, mapping: str) -> str:
+    """Retrieval query for one section"""
+    return f"{section.query} {_mapping_terms(mapping)}".strip()
+
+# ============================================================================
+# GENERATOR
+# ============================================================================
+
+def _chunk(content: Optional[str], usage=None) -> SimpleNamespace:
+    """A streamed chunk shaped like the ones the LLM client returns"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+        x_groq=SimpleNamespace(usage=usage)
+    )
+
+
+class ReportGenerator:
+    """
+    Generates the report sections concurrently and streams them in order
+
+    Worker threads only retrieve and call the LLM; everything they produce
+    goes through per-section queues, so the caller (the Streamlit script
+    thread) renders section 1 live while later sections buffer, then
+    drains each following section as soon as the previous one is complete
+    """
+
+    def __init__(self, client: LLMClient, packer: ContextPacker, route: Route, kb=None,
+                 sections: List[ReportSection] = REPORT_SECTIONS,
+                 concurrency: int = REPORT_CONCURRENCY, k: int = REPORT_RETRIEVAL_K):
+        self.client = client
+        self.packer = packer
+        self.route = route
+        self.kb = kb
+        self.sections = sections
+        self.concurrency = concurrency
+        self.k = k
+
+    def _run_section(self, section: ReportSection, mapping: str, out: queue.Queue, cancelled: threading.Event,
+                     cost_estimate: Optional[CostEstimate] = None, sizing: Optional[ClusterSizing] = None):
+        """Retrieve, pack and stream one section into its queue; stops when `cancelled` is set"""
+        try:
+            instructions = section.instructions
+            if cost_estimate is not None and section.domain == "costing":
+                instructions += "\n\n" + build_cost_engine_prompt(
+                    cost_estimate.to_markdown(), table_shown=section.cost_table
+                )
+            tables = sizing_tables(sizing, cost_estimate) if section.sizing_table else ""
+            if tables:
+                instructions += "\n\n" + build_cluster_sizing_prompt(tables)
+
+            documents = []
+            if self.kb is not None:
+                documents = self.kb.get_relevant_documents(
+                    section_query(section, mapping), k=self.k, domain=section.domain
+                )
+
+            packed = self.packer.pack(
+                build_report_section_prompt(section.title, instructions, mapping),
+                [],
+                REPORT_REQUEST,
+                prepare_chunks(documents)
+            )
+            if cancelled.is_set():
+                return
+            stream = self.client.stream_chat(
+                estimated_tokens=packed.total_tokens + self.route.max_tokens,
+                model=self.route.model,
+                messages=packed.messages,
+                max_tokens=self.route.max_tokens,
+                temperature=self.route.temperature
+            )
+            try:
+                for chunk in stream:
+                    # Nobody reads the rest: closing the stream frees the connection and the TPM it would use
+                    if cancelled.is_set():
+                        return
+                    usage = chunk_usage(chunk)
+                    if usage is not None:
+                        out.put(("usage", usage))
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        out.put(("text", chunk.choices[0].delta.content))
+            finally:
+                stream.close()
+            out.put(("done", None))
+        except Exception as e:
+            out.put(("error", e))
+
+    def stream(self, mapping: str, cost_estimate: Optional[CostEstimate] = None,
+               sizing: Optional[ClusterSizing] = None) -> Iterator[SimpleNamespace]:
+        """
+        Stream the report as chunks, section by section in report order
+
+        With a cost estimate, the costing sections are told to explain the
+        engine's figures instead of computing their own, and the cost
+        estimate section opens with the engine's table. The cluster sizing
+        and the estimate's warehouse simulation go the same way into the
+        compute architecture section.
+        The last chunk carries the token usage summed over all sections.
+        A failed section raises LLMError, like a failed single response;
+        it, or the caller closing the stream, stops the other sections
+        """
+        queues = [queue.Queue() for _ in self.sections]
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="report")
+        for section, out in zip(self.sections, queues):
+            executor.submit(self._run_section, section, mapping, out, cancelled, cost_estimate, sizing)
+
+        tables = sizing_tables(sizing, cost_estimate)
+        prompt_tokens = completion_tokens = 0
+        try:
+            for index, (section, out) in enumerate(zip(self.sections, queues)):
+                heading = ("\n\n" if index else "") + f"## {section.title}\n\n"
+                if cost_estimate is not None and section.cost_table:
+                    heading += cost_estimate.to_markdown() + "\n\n"
+                if tables and section.sizing_table:
+                    heading += tables + "\n\n"
+                while True:
+                    kind, value = out.get()
+                    if kind == "text":
+                        # The heading goes out with the first token so TTFT stays the model's
+                        yield _chunk(heading + value)
+                        heading = ""
+                    elif kind == "usage":
+                        prompt_tokens += getattr(value, "prompt_tokens", 0) or 0
+                        completion_tokens += getattr(value, "completion_tokens", 0) or 0
+                    elif kind == "error":
+                        logger.warning("Report section %s failed: %s", section.key, value)
+                        if isinstance(value, LLMError):
+                            raise value
+                        raise LLMError(str(value), "The report could not be generated. Please try again.") from value
+                    else:
+                        break
+                if heading:
+                    yield _chunk(heading)
+
+            yield _chunk(None, SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens))
+        finally:
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
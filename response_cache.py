@@ -0,0 +1,151 @@
+"""LLM response cache for the FinOps Advisor
+Replays answers to deterministic turns (the greeting, the first interview
+question, common clarification answers, temperature-0 requests) instead of
+generating them again for every session"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# Replayed answers are streamed in small pieces so the UI behaves as for a live answer
+REPLAY_CHUNK_CHARS = 24
+REPLAY_DELAY_S = 0.005
+
+# Request parameters that never change the generated text
+IGNORED_PARAMS = {"messages", "stream", "timeout"}
+
+# ============================================================================
+# KEYS
+# ============================================================================
+
+def _normalize(message: Dict[str, str]) -> Dict[str, str]:
+    """Collapse whitespace everywhere; user text is also case-folded"""
+    content = re.sub(r"\s+", " ", message["content"]).strip()
+    if message["role"] == "user":
+        content = content.casefold()
+    return {"role": message["role"], "content": content}
+
+
+def prompt_window(messages: List[Dict[str, str]], window: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    The part of the request that determines the answer
+
+    System messages (prompt, memory, documentation) are always included;
+    `window` limits the conversation to its last messages (None keeps all)
+    """
+    system = [m for m in messages if m["role"] == "system"]
+    chat = [m for m in messages if m["role"] != "system"]
+    if window is not None:
+        chat = chat[-window:]
+    return [_normalize(m) for m in system + chat]
+
+
+def cache_key(params: Dict[str, Any], window: Optional[int] = None) -> str:
+    """Hash of the normalized prompt window, model and generation parameters of a request"""
+    payload = {
+        "messages": prompt_window(params["messages"], window),
+        "params": {k: v for k, v in sorted(params.items()) if k not in IGNORED_PARAMS},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Thread-safe LRU of generated answers, bounded by entry count and total size"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, str]" = OrderedDict()
+        self.size_bytes = 0
+        self.stats = CacheStats()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            text = self.entries.get(key)
+            if text is None:
+                self.stats.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return text
+
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        if not text or size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size_bytes -= len(self.entries.pop(key).encode("utf-8"))
+            self.entries[key] = text
+            self.size_bytes += size
+            while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size_bytes -= len(evicted.encode("utf-8"))
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def _chunk(content: Optional[str], usage: Any = None) -> SimpleNamespace:
+    """A streamed chunk shaped like the ones Groq returns"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+        x_groq=SimpleNamespace(usage=usage),
+        cached=True
+    )
+
+
+def replay_stream(text: str, chunk_chars: int = REPLAY_CHUNK_CHARS, delay: float = REPLAY_DELAY_S) -> Iterator[SimpleNamespace]:
+    """Stream a cached answer in small pieces; the final chunk reports zero token usage"""
+    for start in range(0, len(text), chunk_chars):
+        yield _chunk(text[start:start + chunk_chars])
+        if delay:
+            time.sleep(delay)
+    yield _chunk(None, SimpleNamespace(prompt_tokens=0, completion_tokens=0))
+
+
+def replay_completion(text: str) -> SimpleNamespace:
+    """A non-streamed completion shaped like the ones Groq returns"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0),
+        cached=True
+    )
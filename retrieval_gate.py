@@ -0,0 +1,186 @@
+"""Retrieval gate for the FinOps Advisor RAG pipeline
+Decides cheaply whether a user turn needs documentation retrieval and
+rewrites the retrieval query from the conversation state"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from conversation_stage import (
+    STAGE_MAPPING_CONFIRMATION,
+    STAGE_RECOMMENDATIONS,
+    STAGE_COSTING,
+    is_confirmation,
+)
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Words that start a question the documentation can answer
+QUESTION_WORDS = [
+    "what", "how", "why", "which", "when", "where", "can", "could", "should",
+    "does", "do", "is", "are", "explain", "tell me", "difference", "compare"
+]
+
+# Short answers that never need documentation
+LOW_INFORMATION_PATTERN = re.compile(
+    r"^\s*(yes|no|yep|nope|yeah|y|n|ok|okay|sure|skip|pass|not sure|don't know|"
+    r"dont know|no idea|thanks|thank you|correct|right|none|n/a|na|maybe)[\s.!]*$",
+    re.IGNORECASE
+)
+
+# Conversation facts used to rewrite the retrieval query
+PLATFORM_TERMS = [
+    "sql server", "oracle", "postgresql", "postgres", "mysql", "snowflake", "redshift",
+    "teradata", "hadoop", "netezza", "bigquery", "synapse", "db2", "informatica"
+]
+
+CLOUD_TERMS = {"azure": "Azure", "aws": "AWS", "amazon": "AWS", "gcp": "GCP", "google cloud": "GCP"}
+
+WORKLOAD_TERMS = {
+    "etl": "ETL pipelines", "elt": "ETL pipelines", "pipeline": "ETL pipelines",
+    "report": "BI reporting", "dashboard": "BI reporting", "power bi": "BI reporting",
+    "tableau": "BI reporting", "analytics": "analytics", "machine learning": "machine learning",
+    "ml": "machine learning", "data science": "machine learning",
+    "stream": "streaming", "real-time": "streaming", "real time": "streaming"
+}
+
+# What the documentation is needed for at each stage
+STAGE_TOPICS = {
+    STAGE_RECOMMENDATIONS: "Databricks migration plan and architecture",
+    STAGE_COSTING: "Databricks DBU pricing and cost estimation"
+}
+
+# Stages in which every turn needs documentation
+DOCUMENTATION_STAGES = (STAGE_RECOMMENDATIONS, STAGE_COSTING)
+
+# ============================================================================
+# RETRIEVAL GATE
+# ============================================================================
+
+@dataclass
+class GateDecision:
+    """Outcome of the retrieval gate for a single turn"""
+    retrieve: bool
+    query: str
+    reason: str
+
+
+class RetrievalGate:
+    """
+    Skips embedding and vector search on low-information turns
+    (short interview answers, confirmations, skips) and rewrites the
+    query from the conversation state when retrieval is needed
+    """
+
+    def __init__(self, domain_keywords: Optional[List[str]] = None, min_words: int = 5):
+        self.domain_keywords = domain_keywords or []
+        self.min_words = min_words
+
+    def _is_question(self, text: str) -> bool:
+        text_lower = text.lower().strip()
+        if "?" in text_lower:
+            return True
+        return any(re.match(rf"{re.escape(word)}\b", text_lower) for word in QUESTION_WORDS)
+
+    def _has_domain_keyword(self, text: str) -> bool:
+        text_lower = text.lower()
+        return any(re.search(rf"\b{re.escape(kw)}", text_lower) for kw in self.domain_keywords)
+
+    def _conversation_facts(self, messages: List[Dict[str, str]]) -> List[str]:
+        """Extract platform, cloud and workload facts from the user's turns"""
+        user_text = " ".join(
+            m["content"].lower() for m in messages if m["role"] == "user"
+        )
+
+        facts = []
+        platforms = [term for term in PLATFORM_TERMS if re.search(rf"\b{re.escape(term)}\b", user_text)]
+        if platforms:
+            facts.append(f"{', '.join(platforms)} to Databricks migration")
+
+        clouds = []
+        for term, name in CLOUD_TERMS.items():
+            if re.search(rf"\b{re.escape(term)}\b", user_text) and name not in clouds:
+                clouds.append(name)
+        if clouds:
+            facts.append(f"on {' and '.join(clouds)}")
+
+        workloads = []
+        for term, name in WORKLOAD_TERMS.items():
+            if re.search(rf"\b{re.escape(term)}", user_text) and name not in workloads:
+                workloads.append(name)
+        if workloads:
+            facts.append(f"for {', '.join(workloads)}")
+
+        return facts
+
+    def rewrite_query(self, prompt: str, messages: List[Dict[str, str]], stage: str) -> str:
+        """Build a retrieval query from the conversation state and the latest turn"""
+        parts = []
+
+        # Keep the user's own words when they carry information
+        if prompt.strip() and not (LOW_INFORMATION_PATTERN.match(prompt) or is_confirmation(prompt)):
+            parts.append(prompt.strip())
+
+        if stage in STAGE_TOPICS:
+            parts.append(STAGE_TOPICS[stage])
+        parts.extend(self._conversation_facts(messages))
+
+        return " ".join(parts)
+
+    def decide(self, prompt: str, messages: List[Dict[str, str]], stage: str) -> GateDecision:
+        """
+        Decide whether the current turn needs retrieval
+
+        Args:
+            prompt: Latest user message
+            messages: Chat history including the latest user message
+            stage: Conversation stage from detect_stage()
+
+        Returns:
+            GateDecision with the (rewritten) retrieval query
+        """
+        words = prompt.split()
+
+        if LOW_INFORMATION_PATTERN.match(prompt) and stage not in DOCUMENTATION_STAGES:
+            return GateDecision(False, "", "low-information answer")
+
+        if stage in DOCUMENTATION_STAGES:
+            # Recommendations and costing always need documentation
+            return GateDecision(True, self.rewrite_query(prompt, messages, stage), f"{stage} stage")
+
+        if self._is_question(prompt):
+            return GateDecision(True, self.rewrite_query(prompt, messages, stage), "user question")
+
+        if stage == STAGE_MAPPING_CONFIRMATION:
+            # Corrections to the mapping are answered from the conversation itself
+            return GateDecision(False, "", "mapping correction")
+
+        if len(words) >= self.min_words and self._has_domain_keyword(prompt):
+            return GateDecision(True, self.rewrite_query(prompt, messages, stage), "domain statement")
+
+        return GateDecision(False, "", "interview answer")
+
+
+@dataclass
+class GateStats:
+    """Running count of gated turns for one session"""
+    turns: int = 0
+    skipped: int = 0
+
+    def record(self, decision: GateDecision):
+        self.turns += 1
+        if not decision.retrieve:
+            self.skipped += 1
+        logger.info(
+            "retrieval gate: retrieve=%s reason=%s skip_rate=%.2f (%d/%d)",
+            decision.retrieve, decision.reason, self.skip_rate, self.skipped, self.turns
+        )
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skipped / self.turns if self.turns else 0.0
@@ -0,0 +1,136 @@
+"""Stage-aware retrieval prefetch for the FinOps Advisor
+After each answer, predicts the retrieval queries of the next turn from the
+conversation stage (the generic stage query, the report sections after the
+entity mapping is shown) and runs them in the background, so the next turn
+can start the LLM call without waiting for vector search"""
+
+import logging
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from conversation_stage import (
+    STAGE_MAPPING_CONFIRMATION,
+    STAGE_RECOMMENDATIONS,
+    STAGE_COSTING,
+    detect_stage,
+)
+from report_generator import REPORT_SECTIONS, REPORT_RETRIEVAL_K, latest_entity_mapping, section_query
+from retrieval_gate import RetrievalGate, DOCUMENTATION_STAGES
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PREFETCH_WORKERS = 2
+DEFAULT_K = 3
+
+# Stage the next user turn most likely lands in
+NEXT_STAGE = {
+    STAGE_MAPPING_CONFIRMATION: STAGE_RECOMMENDATIONS,  # the user confirms the mapping
+    STAGE_RECOMMENDATIONS: STAGE_COSTING,               # cost questions follow the plan
+    STAGE_COSTING: STAGE_COSTING,
+}
+
+# Background retrieval is shared by all sessions of the process
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+PrefetchRequest = Tuple[str, int, Optional[str]]  # (query, k, domain)
+
+
+def _key(query: str, k: int, domain: Optional[str]) -> PrefetchRequest:
+    return re.sub(r"\s+", " ", query).strip().lower(), k, domain
+
+
+def predict_requests(messages: List[Dict[str, str]], gate: RetrievalGate,
+                     report_mode: bool = False) -> List[PrefetchRequest]:
+    """
+    Retrieval requests the next turn is likely to make
+
+    Short follow-ups in documentation stages are retrieved with the gate's
+    stage query (stage topic plus conversation facts), which is known ahead
+    of time; the confirmation that triggers report mode retrieves the
+    report sections' queries
+    """
+    stage = detect_stage(messages)
+    next_stage = NEXT_STAGE.get(stage)
+    if next_stage is None:
+        return []
+
+    mapping = latest_entity_mapping(messages)
+    if report_mode and next_stage == STAGE_RECOMMENDATIONS and mapping:
+        return [
+            (section_query(section, mapping), REPORT_RETRIEVAL_K, section.domain)
+            for section in REPORT_SECTIONS
+        ]
+
+    return [
+        (gate.rewrite_query("", messages, candidate), DEFAULT_K, None)
+        for candidate in dict.fromkeys([stage, next_stage])
+        if candidate in DOCUMENTATION_STAGES
+    ]
+
+# ============================================================================
+# PREFETCHER
+# ============================================================================
+
+@dataclass
+class PrefetchStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class RetrievalPrefetcher:
+    """
+    Per-session store of prefetched retrievals
+
+    Exposes the knowledge base's get_relevant_documents(), so callers
+    (the chat turn, ReportGenerator) use it in place of the knowledge base:
+    prefetched results are returned (waiting if still running), anything
+    else is retrieved directly
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+        self.futures: Dict[PrefetchRequest, Future] = {}
+        self.stats = PrefetchStats()
+        self.lock = threading.Lock()
+
+    def prefetch(self, requests: List[PrefetchRequest]):
+        """Start the given retrievals in the background, dropping older predictions"""
+        keys = {_key(*request): request for request in requests}
+        with self.lock:
+            self.futures = {key: future for key, future in self.futures.items() if key in keys}
+            for key, (query, k, domain) in keys.items():
+                if key not in self.futures:
+                    self.futures[key] = _executor.submit(self.kb.get_relevant_documents, query, k, domain)
+        if keys:
+            logger.info("retrieval prefetch: %d queries in flight", len(keys))
+
+    def prefetch_next(self, messages: List[Dict[str, str]], gate: RetrievalGate, report_mode: bool = False):
+        """Prefetch for the turn the conversation is heading to"""
+        self.prefetch(predict_requests(messages, gate, report_mode))
+
+    def get_relevant_documents(self, query: str, k: int = DEFAULT_K, domain: Optional[str] = None):
+        with self.lock:
+            future = self.futures.pop(_key(query, k, domain), None)
+            if future is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+
+        if future is not None:
+            try:
+                return future.result()
+            except Exception as e:
+                logger.warning("Prefetched retrieval failed, retrying: %s", e)
+        return self.kb.get_relevant_documents(query, k=k, domain=domain)
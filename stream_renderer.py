@@ -0,0 +1,75 @@
+"""Throttled rendering of streamed responses for the FinOps Advisor
+Buffers streamed deltas and re-renders the growing markdown at most once
+per time or byte interval instead of once per token"""
+
+import time
+from typing import Any, List
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Flush to the UI when this much time has passed or this much text is pending
+FLUSH_INTERVAL_S = 0.1
+FLUSH_BYTES = 1024
+
+CURSOR = "▌"
+
+# ============================================================================
+# RENDERER
+# ============================================================================
+
+class StreamRenderer:
+    """
+    Accumulates deltas in a list and flushes them to a Streamlit placeholder
+
+    Every flush re-sends the whole message (Streamlit replaces the element),
+    so the number of flushes, not the number of tokens, sets the rendering
+    cost of a response
+
+    Usage:
+        renderer = StreamRenderer(st.empty())
+        for chunk in stream:
+            renderer.write(chunk.choices[0].delta.content)
+        full_response = renderer.finish()
+    """
+
+    def __init__(self, placeholder: Any, flush_interval_s: float = FLUSH_INTERVAL_S,
+                 flush_bytes: int = FLUSH_BYTES, cursor: str = CURSOR):
+        self.placeholder = placeholder
+        self.flush_interval_s = flush_interval_s
+        self.flush_bytes = flush_bytes
+        self.cursor = cursor
+        self.parts: List[str] = []
+        self.pending_bytes = 0
+        self.last_flush = time.perf_counter()
+        self.flushes = 0
+        self.bytes_rendered = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def write(self, delta: str):
+        """Buffer a delta; flush when the time or byte interval is reached"""
+        if not delta:
+            return
+        self.parts.append(delta)
+        self.pending_bytes += len(delta.encode("utf-8"))
+        if (self.pending_bytes >= self.flush_bytes
+                or time.perf_counter() - self.last_flush >= self.flush_interval_s):
+            self.flush()
+
+    def flush(self, final: bool = False):
+        """Render everything received so far"""
+        body = self.text if final else self.text + self.cursor
+        self.placeholder.markdown(body)
+        self.flushes += 1
+        self.bytes_rendered += len(body.encode("utf-8"))
+        self.pending_bytes = 0
+        self.last_flush = time.perf_counter()
+
+    def finish(self) -> str:
+        """Render the complete response without the cursor and return it"""
+        self.flush(final=True)
+        return self.text
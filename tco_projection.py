@@ -0,0 +1,229 @@
+"""Multi-year TCO projection for the FinOps Advisor
+Projects the cost engine's monthly estimate over 1-5 years with data and
+user growth and the migration timeline (parallel run, ramp-up, decommission
+of the current platform), as month-by-scenario arrays that are cheap enough
+to recompute on every slider move"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from cost_engine import CostEstimate, SCENARIOS, MONTHLY_GROWTH
+from entity_state import parse_mapping, parse_monthly_cost
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+DEFAULT_YEARS = 3
+MAX_YEARS = 5
+
+DEFAULT_DATA_GROWTH = MONTHLY_GROWTH[1]   # per month, as in the cost simulation
+DEFAULT_USER_GROWTH = 0.15                # per year
+DEFAULT_ESCALATION = 0.03                 # current platform price increase per year (licences, support)
+DEFAULT_PARALLEL_RUN_MONTHS = 1           # current platform kept after cutover
+
+# Workloads whose cost follows data volume; the others follow user count
+DATA_DRIVEN_WORKLOADS = ("etl", "streaming")
+
+
+@dataclass(frozen=True)
+class MigrationPhase:
+    """A migration phase and the share of data and workloads on Databricks by its end"""
+    name: str
+    months: float
+    data_share: float
+    workload_share: float
+
+
+# The migration plan prompt's 16 weeks, in months
+MIGRATION_PHASES = (
+    MigrationPhase("Assessment & foundation", 1.0, 0.0, 0.0),
+    MigrationPhase("Data migration", 1.0, 0.6, 0.1),
+    MigrationPhase("Workload migration", 1.0, 1.0, 0.6),
+    MigrationPhase("Testing & cutover", 1.0, 1.0, 1.0),
+)
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+@dataclass
+class TcoProjection:
+    """Monthly cost curves of staying on the current platform vs migrating"""
+    years: int
+    compute: np.ndarray              # (scenario, month) Databricks DBU cost
+    storage: np.ndarray              # (month,) Databricks storage cost
+    current: Optional[np.ndarray]    # (month,) current platform cost if kept; None when unknown
+    current_share: np.ndarray        # (month,) 1 while the current platform still runs
+    cutover_month: int
+    assumptions: List[str]
+
+    @property
+    def databricks(self) -> np.ndarray:
+        """(scenario, month) Databricks compute + storage"""
+        return self.compute + self.storage
+
+    @property
+    def migrate(self) -> Optional[np.ndarray]:
+        """(scenario, month) Databricks plus the current platform until it is decommissioned"""
+        if self.current is None:
+            return None
+        return self.databricks + self.current * self.current_share
+
+    @property
+    def cumulative_savings(self) -> Optional[np.ndarray]:
+        """(scenario, month) running total of staying minus migrating"""
+        if self.current is None:
+            return None
+        return np.cumsum(self.current - self.migrate, axis=1)
+
+    def break_even_month(self) -> Dict[str, Optional[int]]:
+        """First month (1-based) from which cumulative savings stay non-negative, per scenario"""
+        savings = self.cumulative_savings
+        if savings is None:
+            return dict.fromkeys(SCENARIOS)
+        months = {}
+        for scenario, row in zip(SCENARIOS, savings):
+            # Last month still in the red, plus one
+            negative = np.flatnonzero(row < 0)
+            if not len(negative):
+                months[scenario] = 1
+            elif negative[-1] + 1 < row.size:
+                months[scenario] = int(negative[-1]) + 2
+            else:
+                months[scenario] = None
+        return months
+
+    def yearly(self, values: np.ndarray) -> np.ndarray:
+        """Sum monthly values (last axis) per year"""
+        return values.reshape(values.shape[:-1] + (self.years, 12)).sum(axis=-1)
+
+    def to_frame(self, scenario: str = "Expected"):
+        """Monthly curves as a DataFrame indexed by month, for st.line_chart"""
+        import pandas as pd
+
+        index = SCENARIOS.index(scenario)
+        columns = {"Databricks compute": self.compute[index], "Databricks storage": self.storage}
+        if self.current is not None:
+            columns["Current platform (stay)"] = self.current
+            columns["Migrate (total)"] = self.migrate[index]
+        frame = pd.DataFrame(columns)
+        frame.index = pd.RangeIndex(1, frame.shape[0] + 1, name="month")
+        return frame
+
+    def to_markdown(self) -> str:
+        expected = SCENARIOS.index("Expected")
+        lines = [f"**{self.years}-year TCO projection** (Expected scenario; cutover in month {self.cutover_month})", ""]
+        compute, storage = self.yearly(self.compute[expected]), self.yearly(self.storage)
+        if self.current is None:
+            lines += ["| Year | Databricks compute | Storage | Databricks total |", "|---|---:|---:|---:|"]
+            for year in range(self.years):
+                lines.append(f"| {year + 1} | ${compute[year]:,.0f} | ${storage[year]:,.0f} | "
+                             f"${compute[year] + storage[year]:,.0f} |")
+        else:
+            stay, migrate = self.yearly(self.current), self.yearly(self.migrate[expected])
+            lines += [
+                "| Year | Current platform (stay) | Databricks compute | Storage | Migrate (incl. parallel run) | Savings |",
+                "|---|---:|---:|---:|---:|---:|",
+            ]
+            for year in range(self.years):
+                lines.append(
+                    f"| {year + 1} | ${stay[year]:,.0f} | ${compute[year]:,.0f} | ${storage[year]:,.0f} | "
+                    f"${migrate[year]:,.0f} | ${stay[year] - migrate[year]:,.0f} |"
+                )
+            totals = self.cumulative_savings[:, -1]
+            break_even = self.break_even_month()
+            lines += ["", f"| Scenario | {self.years}-year savings | Break-even month |", "|---|---:|---:|"]
+            for scenario, total in zip(SCENARIOS, totals):
+                month = break_even[scenario]
+                lines.append(f"| {scenario} | ${total:,.0f} | {month if month else 'not reached'} |")
+        if self.assumptions:
+            lines += ["", "*Projection assumptions:*"] + [f"- {a}" for a in self.assumptions]
+        return "\n".join(lines)
+
+# ============================================================================
+# PROJECTION
+# ============================================================================
+
+def scale_phases(phases: Sequence[MigrationPhase], total_months: float) -> Tuple[MigrationPhase, ...]:
+    """The phases stretched or compressed to a total migration duration"""
+    factor = total_months / sum(phase.months for phase in phases)
+    return tuple(MigrationPhase(p.name, p.months * factor, p.data_share, p.workload_share) for p in phases)
+
+
+def _adoption(phases: Sequence[MigrationPhase], month_mid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(data share, workload share) on Databricks per month, ramping linearly within each phase"""
+    ends = np.cumsum([phase.months for phase in phases])
+    boundaries = np.concatenate([[0.0], ends])
+    data = np.interp(month_mid, boundaries, [0.0] + [p.data_share for p in phases])
+    workload = np.interp(month_mid, boundaries, [0.0] + [p.workload_share for p in phases])
+    return data, workload
+
+
+def project_tco(estimate: CostEstimate, current_monthly_cost: Optional[float] = None,
+                years: int = DEFAULT_YEARS, data_growth: float = DEFAULT_DATA_GROWTH,
+                user_growth: float = DEFAULT_USER_GROWTH, escalation: float = DEFAULT_ESCALATION,
+                phases: Sequence[MigrationPhase] = MIGRATION_PHASES, migration_months: Optional[float] = None,
+                parallel_run_months: int = DEFAULT_PARALLEL_RUN_MONTHS) -> TcoProjection:
+    """
+    Project an estimate month by month over a number of years
+
+    Data-driven workloads and storage grow with data_growth (per month),
+    BI and ML with user_growth (per year). Databricks cost ramps with the
+    migration phases; the current platform grows with the same workload
+    plus price escalation and runs until parallel_run_months after
+    cutover. Every curve is one array expression over (scenario, month)
+
+    Usage:
+        projection = project_tco(estimate, current_monthly_cost=40_000, years=5)
+        projection.break_even_month()  # {"Conservative": 7, "Expected": 9, "High": None}
+    """
+    if not 1 <= years <= MAX_YEARS:
+        raise ValueError(f"years must be between 1 and {MAX_YEARS}")
+    if migration_months is not None:
+        phases = scale_phases(phases, migration_months)
+
+    month = np.arange(years * 12, dtype=float)         # months since the start of the migration
+    data_index = (1 + data_growth) ** month
+    user_index = (1 + user_growth) ** (month / 12)
+    data_share, workload_share = _adoption(phases, month + 0.5)
+
+    kinds = [w.kind for w in estimate.workloads]
+    growth = np.where(np.isin(kinds, DATA_DRIVEN_WORKLOADS)[:, None], data_index, user_index)   # (workload, month)
+    full_compute = estimate.scenario_costs @ growth                                              # (scenario, month)
+    full_storage = estimate.storage_monthly * data_index
+
+    cutover = int(np.ceil(sum(phase.months for phase in phases)))
+    current = None
+    assumptions = [
+        f"Data grows {data_growth:.1%} per month, users {user_growth:.0%} per year",
+        f"Migration over {cutover} months ({', '.join(p.name for p in phases)}); "
+        f"current platform kept {parallel_run_months} month(s) after cutover",
+    ]
+    if current_monthly_cost:
+        # Staying means the same workload growth on the current platform, plus its price escalation
+        expected = SCENARIOS.index("Expected")
+        workload_index = (full_compute[expected] + full_storage) / (full_compute[expected, 0] + full_storage[0])
+        current = current_monthly_cost * workload_index * (1 + escalation) ** (month / 12)
+        assumptions.append(
+            f"Current platform ${current_monthly_cost:,.0f}/month, growing with the workload and "
+            f"{escalation:.0%} price escalation per year"
+        )
+
+    return TcoProjection(
+        years=years,
+        compute=full_compute * workload_share,
+        storage=full_storage * data_share,
+        current=current,
+        current_share=(month < cutover + parallel_run_months).astype(float),
+        cutover_month=cutover,
+        assumptions=assumptions,
+    )
+
+
+def project_from_mapping(estimate: CostEstimate, mapping: Union[str, Dict], **kwargs: Any) -> TcoProjection:
+    """Projection with the current platform cost taken from the mapping"""
+    data = parse_mapping(mapping) or {}
+    return project_tco(estimate, parse_monthly_cost(data.get("current_cost_usd")), **kwargs)
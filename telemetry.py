@@ -0,0 +1,226 @@
+"""Per-turn latency and token telemetry for the FinOps Advisor
+Records retrieval time, prompt build time, time-to-first-token, tokens/s,
+token usage and total latency of every chat turn, exports them to a local
+JSONL metrics file and renders an operator sidebar"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Optional, Any
+
+from model_routing import model_prices
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+METRICS_FILE = os.getenv("FINOPS_METRICS_FILE", os.path.join("metrics", "turns.jsonl"))
+
+_write_lock = threading.Lock()
+
+# ============================================================================
+# TURN METRICS
+# ============================================================================
+
+@dataclass
+class TurnMetrics:
+    """Everything measured about one chat turn"""
+    app: str
+    model: str
+    session_id: str
+    turn_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    timestamp: str = field(default_factory=lambda: time.strftime("%Y-%m-%dT%H:%M:%S"))
+    stage: Optional[str] = None
+    route: Optional[str] = None
+    retrieval_s: float = 0.0
+    prompt_build_s: float = 0.0
+    extraction_s: float = 0.0
+    ttft_s: Optional[float] = None
+    generation_s: Optional[float] = None
+    total_s: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    tokens_per_s: Optional[float] = None
+    cost_usd: Optional[float] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+def estimate_cost(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> Optional[float]:
+    """USD cost of a request from token usage (None when the model price is unknown)"""
+    prices = model_prices().get(model)
+    if prices is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def chunk_usage(chunk: Any):
+    """Token usage attached to a streamed chunk (Groq sends it on the last chunk)"""
+    x_groq = getattr(chunk, "x_groq", None)
+    usage = getattr(x_groq, "usage", None) if x_groq is not None else None
+    return usage or getattr(chunk, "usage", None)
+
+
+class TurnRecorder:
+    """
+    Measures one chat turn
+
+    Usage:
+        recorder = TurnRecorder("rag", model, session_id)
+        with recorder.phase("retrieval"):
+            ...
+        recorder.start_generation()
+        for chunk in stream:
+            recorder.observe_chunk(chunk)
+        metrics = recorder.finish()
+    """
+
+    def __init__(self, app: str, model: str, session_id: str, stage: Optional[str] = None,
+                 route: Optional[str] = None):
+        self.metrics = TurnMetrics(app=app, model=model, session_id=session_id, stage=stage, route=route)
+        self._turn_start = time.perf_counter()
+        self._generation_start = None
+        self._first_token_at = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named phase ('retrieval', 'prompt_build' or 'extraction')"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(self.metrics, f"{name}_s", round(time.perf_counter() - start, 4))
+
+    def start_generation(self):
+        self._generation_start = time.perf_counter()
+
+    def observe_chunk(self, chunk: Any):
+        """Record first-token time and usage from a streamed chunk"""
+        if getattr(chunk, "cached", False):
+            self.metrics.cached = True
+
+        if self._first_token_at is None and chunk.choices and chunk.choices[0].delta.content:
+            self._first_token_at = time.perf_counter()
+
+        usage = chunk_usage(chunk)
+        if usage is not None:
+            self.metrics.prompt_tokens = getattr(usage, "prompt_tokens", None)
+            self.metrics.completion_tokens = getattr(usage, "completion_tokens", None)
+
+    def finish(self, error: Optional[str] = None) -> TurnMetrics:
+        """Close the turn, derive rates and cost, and export the record"""
+        end = time.perf_counter()
+        metrics = self.metrics
+        metrics.total_s = round(end - self._turn_start, 4)
+        metrics.error = error
+
+        if self._generation_start is not None and self._first_token_at is not None:
+            metrics.ttft_s = round(self._first_token_at - self._generation_start, 4)
+            metrics.generation_s = round(end - self._first_token_at, 4)
+            if metrics.completion_tokens and metrics.generation_s > 0:
+                metrics.tokens_per_s = round(metrics.completion_tokens / metrics.generation_s, 1)
+
+        metrics.cost_usd = estimate_cost(metrics.model, metrics.prompt_tokens, metrics.completion_tokens)
+
+        export_metrics(metrics)
+        return metrics
+
+
+def export_metrics(metrics: TurnMetrics, path: str = METRICS_FILE):
+    """Append a turn record to the local metrics file"""
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with _write_lock, open(path, "a") as f:
+            f.write(json.dumps(asdict(metrics)) + "\n")
+    except OSError as e:
+        print(f"Error writing metrics: {e}")
+
+
+def summarize_by_route(records: List[Dict]) -> Dict[str, Dict]:
+    """Average latency and total cost per route from turn records"""
+    groups = defaultdict(list)
+    for record in records:
+        groups[record.get("route") or "default"].append(record)
+
+    def mean(values):
+        values = [v for v in values if v is not None]
+        return round(sum(values) / len(values), 3) if values else None
+
+    return {
+        route: {
+            "turns": len(rows),
+            "errors": sum(1 for r in rows if r.get("error")),
+            "cache_hits": sum(1 for r in rows if r.get("cached")),
+            "avg_ttft_s": mean(r.get("ttft_s") for r in rows),
+            "avg_total_s": mean(r.get("total_s") for r in rows),
+            "avg_tokens_per_s": mean(r.get("tokens_per_s") for r in rows),
+            "avg_prompt_tokens": mean(r.get("prompt_tokens") for r in rows),
+            "avg_completion_tokens": mean(r.get("completion_tokens") for r in rows),
+            "total_cost_usd": round(sum(r.get("cost_usd") or 0.0 for r in rows), 6),
+        }
+        for route, rows in sorted(groups.items())
+    }
+
+# ============================================================================
+# OPERATOR SIDEBAR
+# ============================================================================
+
+def render_operator_sidebar(turns: List[TurnMetrics], cache_stats: Any = None):
+    """Show the last turn, conversation totals and response cache stats in the Streamlit sidebar"""
+    import streamlit as st
+
+    with st.sidebar:
+        st.markdown("### 📈 Operator metrics")
+
+        if cache_stats is not None:
+            st.caption(
+                f"Response cache: {cache_stats.hit_rate:.0%} hit rate "
+                f"({cache_stats.hits} hits / {cache_stats.misses} misses, {cache_stats.evictions} evicted)"
+            )
+
+        if not turns:
+            st.caption("No turns yet")
+            return
+
+        last = turns[-1]
+        col1, col2 = st.columns(2)
+        col1.metric("TTFT", f"{last.ttft_s:.2f}s" if last.ttft_s is not None else "–")
+        col2.metric("Total", f"{last.total_s:.2f}s" if last.total_s is not None else "–")
+        col1.metric("Tokens/s", f"{last.tokens_per_s:.0f}" if last.tokens_per_s else "–")
+        col2.metric("Retrieval", f"{last.retrieval_s * 1000:.0f}ms")
+        st.caption(
+            f"Prompt build {last.prompt_build_s * 1000:.0f}ms · "
+            f"tokens {last.prompt_tokens or '–'} in / {last.completion_tokens or '–'} out"
+        )
+
+        prompt_total = sum(t.prompt_tokens or 0 for t in turns)
+        completion_total = sum(t.completion_tokens or 0 for t in turns)
+        cost_total = sum(t.cost_usd or 0.0 for t in turns)
+        st.caption(
+            f"Conversation: {len(turns)} turns · {prompt_total:,} in / {completion_total:,} out tokens · "
+            f"${cost_total:.4f}"
+        )
+
+        st.markdown("**Per route**")
+        st.dataframe(
+            [{"route": route, **stats} for route, stats in summarize_by_route([asdict(t) for t in turns]).items()],
+            hide_index=True,
+            use_container_width=True
+        )
+
+# ============================================================================
+# METRICS FILE REPORT
+# ============================================================================
+
+if __name__ == "__main__":
+    # python telemetry.py [metrics/turns.jsonl] - latency and cost per route
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(json.dumps(summarize_by_route(records), indent=2))
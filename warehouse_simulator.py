@@ -0,0 +1,371 @@
+"""SQL Warehouse concurrency simulator for the FinOps Advisor
+Discrete-time simulation of query arrivals, run times, queueing and
+cluster autoscaling (min/max clusters, scale-up on queueing, scale-down on
+low load, auto-stop) for a concurrent user count and daily usage pattern.
+Simulated days run side by side as arrays, so thousands of warehouse
+hours take a fraction of a second"""
+
+import time
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cost_engine import (
+    CostEstimate,
+    WorkloadEstimate,
+    simulate_costs,
+    SCENARIO_FACTORS,
+    WORKLOAD_LABELS,
+    BUSINESS_DAYS_PER_MONTH,
+    SQL_USERS_PER_CLUSTER,
+    SQL_SMALL_SIZE,
+    SQL_MEDIUM_SIZE,
+    SQL_MEDIUM_FROM_TB,
+)
+from pricing_catalog import PricingCatalog, load_pricing_catalog, COMPUTE_SQL_SERVERLESS
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+STEP_S = 10                       # time resolution of arrivals, starts and queue waits
+SIMULATED_DAYS = 120              # 2,880 warehouse hours per simulation
+MIN_SIMULATED_DAYS = 20
+MAX_SIMULATED_QUERIES = 4_000_000 # fewer days for very large user counts
+WAIT_SAMPLE = 200_000             # queries whose queue wait is measured
+SIMULATION_SEED = 7
+
+# Workload
+QUERIES_PER_USER_HOUR = 30        # per active user at peak (a dashboard view runs several)
+QUERY_MEDIAN_S = 8.0              # median run time on a Small warehouse
+QUERY_SIGMA = 1.1                 # lognormal spread: most queries are short, a few are very long
+QUERY_MAX_S = 30 * 60
+SIZE_SPEEDUP_EXPONENT = 0.7       # run time ~ (Small DBU / size DBU) ** exponent
+
+# Warehouse behaviour (serverless defaults)
+QUERIES_PER_CLUSTER = SQL_USERS_PER_CLUSTER   # concurrent queries one cluster runs before queueing
+CLUSTER_START_S = 20
+SCALE_UP_QUEUED_S = 30            # queries waiting this long add a cluster
+SCALE_DOWN_LOW_LOAD_S = 15 * 60   # a cluster is released after this long with its capacity unused
+AUTO_STOP_S = 10 * 60
+
+TARGET_P95_WAIT_S = 10.0          # queueing a recommendation accepts at the 95th percentile
+MAX_CLUSTER_HEADROOM = 2          # max clusters simulated: this x the user-count rule
+
+# Share of peak users active in each hour of a business day
+PEAK_PATTERNS: Dict[str, Tuple[float, ...]] = {
+    "business_hours": (0, 0, 0, 0, 0, 0, 0.05, 0.2, 0.6, 0.9, 1.0, 0.9,
+                       0.6, 0.8, 1.0, 0.9, 0.7, 0.4, 0.15, 0.05, 0, 0, 0, 0),
+    "morning_peak": (0, 0, 0, 0, 0, 0, 0.1, 0.6, 1.0, 1.0, 0.7, 0.5,
+                     0.4, 0.4, 0.4, 0.3, 0.3, 0.2, 0.1, 0, 0, 0, 0, 0),
+    "global": (0.3, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.0, 1.0, 0.9,
+               0.8, 0.9, 1.0, 1.0, 0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.3),
+}
+DEFAULT_PEAK_PATTERN = "business_hours"
+
+WAREHOUSE_ASSUMPTION = "BI warehouse-hours from the SQL Warehouse simulation"
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+
+@dataclass
+class WarehouseSimulation:
+    """Queueing and warehouse-hours of a simulated SQL Warehouse"""
+    users: float
+    pattern: str
+    size: str
+    min_clusters: int
+    max_clusters: int
+    simulated_hours: float
+    queries: int
+    p50_wait_s: float
+    p95_wait_s: float
+    p99_wait_s: float
+    queued_share: float             # queries that waited at all
+    p95_clusters: int               # clusters running at the 95th percentile of busy time
+    peak_clusters: int
+    warehouse_hours_per_day: float  # cluster-hours, incl. start-up and idle time before auto-stop
+    dbu_per_hour: float             # per cluster
+    dbu_price: float
+    elapsed_ms: float
+    assumptions: List[str] = field(default_factory=list)
+
+    @property
+    def warehouse_hours_per_month(self) -> float:
+        return self.warehouse_hours_per_day * BUSINESS_DAYS_PER_MONTH
+
+    @property
+    def monthly_cost(self) -> float:
+        return self.warehouse_hours_per_month * self.dbu_per_hour * self.dbu_price
+
+    @property
+    def recommended_max_clusters(self) -> int:
+        return max(self.min_clusters, self.peak_clusters)
+
+    def to_markdown(self) -> str:
+        lines = [
+            f"**SQL Warehouse simulation** ({self.users:g} concurrent users, {self.pattern.replace('_', ' ')} "
+            f"pattern; {self.simulated_hours:,.0f} simulated hours, {self.queries:,} queries)",
+            "",
+            "| Size | Clusters (min-max) | Queue wait P50 / P95 / P99 | Queries queued | Clusters P95 / peak | "
+            "Warehouse-hours/month | $/month |",
+            "|---|---|---:|---:|---:|---:|---:|",
+            f"| {self.size} | {self.min_clusters}-{self.recommended_max_clusters} | "
+            f"{self.p50_wait_s:.0f} s / {self.p95_wait_s:.0f} s / {self.p99_wait_s:.0f} s | {self.queued_share:.1%} | "
+            f"{self.p95_clusters} / {self.peak_clusters} | {self.warehouse_hours_per_month:,.0f} | "
+            f"${self.monthly_cost:,.0f} |",
+        ]
+        if self.p95_wait_s > TARGET_P95_WAIT_S:
+            lines += ["", f"*P95 queue wait exceeds {TARGET_P95_WAIT_S:g} s even at {self.max_clusters} clusters; "
+                          f"consider a larger size or a separate warehouse for heavy users*"]
+        if self.assumptions:
+            lines += ["", "*Simulation assumptions:*"] + [f"- {a}" for a in self.assumptions]
+        return "\n".join(lines)
+
+# ============================================================================
+# SIMULATION
+# ============================================================================
+
+def _arrival_rates(users: float, pattern: str, steps_per_day: int) -> np.ndarray:
+    """Expected query arrivals per step over a day"""
+    hourly = np.asarray(PEAK_PATTERNS[pattern], dtype=float)
+    hours = np.arange(steps_per_day) * STEP_S / 3600
+    # Interpolate between hour midpoints, wrapping around midnight
+    share = np.interp(hours, np.arange(25) - 0.5, np.append(hourly[-1:], hourly), period=24)
+    return users * share * QUERIES_PER_USER_HOUR * STEP_S / 3600
+
+
+def _queue_waits(arrived: np.ndarray, started: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Queue wait in steps of a uniform sample of started queries (FIFO)
+
+    arrived/started are (day, step) cumulative counts; the n-th query
+    arrives in the first step where arrivals reach n and starts in the
+    first step where starts reach n
+    """
+    per_day = started[:, -1]
+    total = int(per_day.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    sample = np.sort(rng.choice(total, min(total, WAIT_SAMPLE), replace=False))
+    day_of = np.searchsorted(np.cumsum(per_day), sample, side="right")
+    first = np.concatenate([[0], np.cumsum(per_day)[:-1]])
+    waits = []
+    for day in np.unique(day_of):
+        n = sample[day_of == day] - first[day] + 1
+        waits.append(np.searchsorted(started[day], n) - np.searchsorted(arrived[day], n))
+    return np.concatenate(waits)
+
+
+@lru_cache(maxsize=256)
+def simulate_warehouse(users: float, pattern: str = DEFAULT_PEAK_PATTERN, size: str = SQL_SMALL_SIZE,
+                       min_clusters: int = 1, max_clusters: Optional[int] = None,
+                       days: int = SIMULATED_DAYS, seed: int = SIMULATION_SEED,
+                       cloud: str = "AWS", region: Optional[str] = None,
+                       catalog: Optional[PricingCatalog] = None) -> WarehouseSimulation:
+    """
+    Simulate a serverless SQL Warehouse serving concurrent users
+
+    Each simulated day steps through STEP_S slots; all days advance
+    together as (day,) arrays. Per step: Poisson arrivals following the
+    peak pattern, completions from a ring buffer of scheduled end steps,
+    FIFO starts up to QUERIES_PER_CLUSTER per cluster, then autoscaling
+    (add a cluster after SCALE_UP_QUEUED_S of queueing, release one after
+    SCALE_DOWN_LOW_LOAD_S of unused capacity, stop after AUTO_STOP_S idle,
+    restart on the next query). Memoized per argument combination
+    """
+    start_time = time.perf_counter()
+    if pattern not in PEAK_PATTERNS:
+        raise ValueError(f"Unknown peak pattern {pattern!r} (choose from {sorted(PEAK_PATTERNS)})")
+    catalog = catalog or load_pricing_catalog()
+    if max_clusters is None:
+        max_clusters = max(min_clusters, int(np.ceil(users / QUERIES_PER_CLUSTER)) * MAX_CLUSTER_HEADROOM)
+    rng = np.random.default_rng(seed)
+
+    steps = 24 * 3600 // STEP_S
+    rates = _arrival_rates(users, pattern, steps)
+    size_dbu = catalog.warehouse_dbu_per_hour(size)
+    median_s = QUERY_MEDIAN_S * (catalog.warehouse_dbu_per_hour(SQL_SMALL_SIZE) / size_dbu) ** SIZE_SPEEDUP_EXPONENT
+    ring_size = QUERY_MAX_S // STEP_S + 2
+    days = int(np.clip(MAX_SIMULATED_QUERIES / max(rates.sum(), 1.0), MIN_SIMULATED_DAYS, days))
+    day_index = np.arange(days)
+
+    # Nights without arrivals are skipped once running queries and auto-stop have played out
+    active = np.flatnonzero(rates > 0)
+    first_step = int(active[0]) if active.size else 0
+    last_step = min(steps, int(active[-1]) + 1 + ring_size + AUTO_STOP_S // STEP_S) if active.size else 0
+
+    scale_up_steps = SCALE_UP_QUEUED_S // STEP_S
+    scale_down_steps = SCALE_DOWN_LOW_LOAD_S // STEP_S
+    auto_stop_steps = AUTO_STOP_S // STEP_S
+    start_steps = -(-CLUSTER_START_S // STEP_S)
+    floor_clusters = max(min_clusters, 1)
+
+    clusters = np.zeros(days, dtype=np.int64)      # running
+    pending = np.zeros(days, dtype=np.int64)       # starting
+    ready_at = np.zeros(days, dtype=np.int64)
+    busy = np.zeros(days, dtype=np.int64)
+    queued = np.zeros(days, dtype=np.int64)
+    queued_for = np.zeros(days, dtype=np.int64)    # consecutive steps with a queue
+    low_load_for = np.zeros(days, dtype=np.int64)  # consecutive steps with a cluster's capacity unused
+    idle_for = np.zeros(days, dtype=np.int64)
+    completions = np.zeros((days, ring_size), dtype=np.int64)
+
+    arrivals = rng.poisson(rates, size=(days, steps))
+    arrived = np.cumsum(arrivals, axis=1)
+    started = np.zeros((days, steps), dtype=np.int64)
+    cluster_steps = np.zeros(days, dtype=np.int64)
+    peak_clusters = np.zeros(days, dtype=np.int64)
+    cluster_counts = np.zeros(max_clusters + 2, dtype=np.int64)   # steps spent at each running cluster count
+
+    # Run times in steps, drawn up front and handed out in start order
+    durations = np.ceil(rng.lognormal(np.log(median_s / STEP_S), QUERY_SIGMA, int(arrived[:, -1].sum())))
+    durations = np.clip(durations, 1, ring_size - 1).astype(np.int64)
+    drawn = 0
+
+    total_started = np.zeros(days, dtype=np.int64)
+    for t in range(first_step, last_step):
+        slot = t % ring_size
+        busy -= completions[:, slot]
+        completions[:, slot] = 0
+
+        ready = (pending > 0) & (ready_at <= t)
+        clusters += np.where(ready, pending, 0)
+        pending[ready] = 0
+
+        queued += arrivals[:, t]
+        starts = np.minimum(queued, np.maximum(clusters * QUERIES_PER_CLUSTER - busy, 0))
+        queued -= starts
+        busy += starts
+        total_started += starts
+        started[:, t] = total_started
+
+        count = int(total_started.sum()) - drawn
+        if count:
+            ends = (t + durations[drawn:drawn + count]) % ring_size
+            np.add.at(completions, (np.repeat(day_index, starts), ends), 1)
+            drawn += count
+
+        # Autoscaling: start from zero on demand, add a cluster when queries keep waiting
+        waiting = queued > 0
+        queued_for = np.where(waiting, queued_for + 1, 0)
+        provisioned = clusters + pending
+        cold = waiting & (provisioned == 0)
+        grow = cold | ((queued_for >= scale_up_steps) & (pending == 0) & (provisioned < max_clusters))
+        if grow.any():
+            pending += np.where(cold, floor_clusters, grow)
+            ready_at[grow] = t + start_steps
+            queued_for[grow] = 0
+
+        # Release a cluster after sustained unused capacity, stop the warehouse when idle
+        spare = (clusters > floor_clusters) & (busy <= (clusters - 1) * QUERIES_PER_CLUSTER) & ~waiting
+        low_load_for = np.where(spare, low_load_for + 1, 0)
+        shrink = low_load_for >= scale_down_steps
+        clusters -= shrink
+        low_load_for[shrink] = 0
+
+        idle_for = np.where((busy == 0) & ~waiting & (clusters > 0), idle_for + 1, 0)
+        stop = idle_for >= auto_stop_steps
+        clusters[stop] = 0
+        idle_for[stop] = 0
+
+        provisioned = clusters + pending
+        cluster_steps += provisioned
+        np.maximum(peak_clusters, provisioned, out=peak_clusters)
+        cluster_counts += np.bincount(provisioned, minlength=cluster_counts.size)
+    started[:, last_step:] = total_started[:, None]
+
+    waits = _queue_waits(arrived, started, rng) * STEP_S
+    p50, p95, p99 = np.percentile(waits, (50, 95, 99)) if waits.size else (0.0, 0.0, 0.0)
+    # Cluster count at the 95th percentile of the time the warehouse runs
+    running = cluster_counts[1:]
+    p95_clusters = int(np.searchsorted(np.cumsum(running), 0.95 * running.sum()) + 1) if running.sum() else 0
+    region = region or catalog.defaults[cloud]["region"]
+    return WarehouseSimulation(
+        users=users,
+        pattern=pattern,
+        size=size,
+        min_clusters=min_clusters,
+        max_clusters=max_clusters,
+        simulated_hours=days * 24,
+        queries=int(total_started.sum()),
+        p50_wait_s=float(p50),
+        p95_wait_s=float(p95),
+        p99_wait_s=float(p99),
+        queued_share=float((waits > 0).mean()) if waits.size else 0.0,
+        p95_clusters=p95_clusters,
+        peak_clusters=int(peak_clusters.max()),
+        warehouse_hours_per_day=float(cluster_steps.sum()) * STEP_S / 3600 / days,
+        dbu_per_hour=size_dbu,
+        dbu_price=catalog.dbu_rate(cloud, COMPUTE_SQL_SERVERLESS, region),
+        elapsed_ms=round((time.perf_counter() - start_time) * 1000, 2),
+        assumptions=[
+            f"{QUERIES_PER_USER_HOUR} queries per active user-hour, median run time {median_s:.0f} s on {size} "
+            f"(lognormal, long tail); up to {QUERIES_PER_CLUSTER} concurrent queries per cluster",
+            f"Scale-up after {SCALE_UP_QUEUED_S} s of queueing, scale-down after "
+            f"{SCALE_DOWN_LOW_LOAD_S // 60} min of spare capacity, auto-stop after {AUTO_STOP_S // 60} min idle",
+        ],
+    )
+
+# ============================================================================
+# COST ESTIMATE INTEGRATION
+# ============================================================================
+
+def simulate_for_estimate(estimate: CostEstimate, pattern: str = DEFAULT_PEAK_PATTERN,
+                          catalog: Optional[PricingCatalog] = None) -> Optional[WarehouseSimulation]:
+    """Simulation of the estimate's BI workload (None without one)"""
+    inputs = estimate.inputs
+    if inputs is None or "sql" not in inputs.workloads:
+        return None
+    size = SQL_MEDIUM_SIZE if inputs.warehouse_tb >= SQL_MEDIUM_FROM_TB else SQL_SMALL_SIZE
+    simulation = simulate_warehouse(
+        float(inputs.concurrent_users), pattern, size, cloud=inputs.cloud, region=inputs.region, catalog=catalog
+    )
+    if "concurrent_users" in estimate.assumed:
+        simulation = replace(simulation, assumptions=simulation.assumptions + [
+            f"Concurrent users not provided; simulated {inputs.concurrent_users:g}"
+        ])
+    return simulation
+
+
+def with_simulated_warehouse(estimate: CostEstimate, simulation: WarehouseSimulation) -> CostEstimate:
+    """
+    The estimate with its BI row priced from simulated warehouse-hours
+
+    The cost engine's one-cluster-per-10-users, 10-hours-a-day rule is
+    replaced by the simulation's cluster-hours; the other workloads and
+    the scenario factors are unchanged, Monte Carlo bands are recomputed
+    """
+    kinds = [w.kind for w in estimate.workloads]
+    if "sql" not in kinds:
+        return estimate
+    index = kinds.index("sql")
+    old = estimate.workloads[index]
+    hours = simulation.warehouse_hours_per_month
+    sql = WorkloadEstimate(
+        kind="sql",
+        name=old.name,
+        compute=WORKLOAD_LABELS["sql"][1],
+        dbu_per_hour=simulation.dbu_per_hour,
+        hours_per_month=hours,
+        dbu_per_month=simulation.dbu_per_hour * hours,
+        dbu_price=simulation.dbu_price,
+        monthly_cost=simulation.monthly_cost,
+    )
+    scenario_costs = estimate.scenario_costs.copy()
+    scenario_costs[:, index] = np.array(SCENARIO_FACTORS["sql"]) * sql.monthly_cost
+    workloads = list(estimate.workloads)
+    workloads[index] = sql
+    updated = replace(
+        estimate,
+        workloads=workloads,
+        scenario_costs=scenario_costs,
+        assumptions=[a for a in estimate.assumptions if a != WAREHOUSE_ASSUMPTION] + [WAREHOUSE_ASSUMPTION],
+        warehouse=simulation,
+    )
+    if estimate.simulation is not None:
+        updated.simulation = simulate_costs(updated)
+    return updated